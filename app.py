@@ -1,11 +1,40 @@
 import streamlit as st
 import requests
 import json
-from datetime import datetime
+import bisect
+import collections
+import contextlib
+import csv
+import random
+import re
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+import base64
+import functools
+import gzip
 import hashlib
+import html
+import io
+import itertools
+import math
+import mimetypes
+import os
+import sqlite3
+import tempfile
+import threading
 import time
-import uuid
-from supabase import create_client
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import httpx
+import urllib3
+import pyarrow as pa
+import pyarrow.parquet as pq
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pypdf import PdfReader
+from pypdf.errors import PdfReadError
+from supabase import create_client, ClientOptions
+from postgrest.exceptions import APIError
+from storage3.exceptions import StorageException
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
 # ===========================
@@ -289,7 +318,10 @@ def init_app():
                 'n8n': {
                     'add_item_webhook': st.secrets["n8n"]["add_item_webhook"],
                     'update_status_webhook': st.secrets["n8n"]["update_status_webhook"],
-                    'delete_item_webhook': st.secrets["n8n"]["delete_item_webhook"]
+                    'delete_item_webhook': st.secrets["n8n"]["delete_item_webhook"],
+                    'bulk_add_item_webhook': st.secrets["n8n"].get("bulk_add_item_webhook"),
+                    'bulk_update_status_webhook': st.secrets["n8n"].get("bulk_update_status_webhook"),
+                    'bulk_delete_item_webhook': st.secrets["n8n"].get("bulk_delete_item_webhook")
                 },
                 'supabase': {
                     'url': st.secrets["supabase"]["url"],
@@ -297,100 +329,3032 @@ def init_app():
                 },
                 'auth': {
                     'password': st.secrets.get("auth", {}).get("password", "admin123")
-                }
+                },
+                'tuning': dict(st.secrets.get("tuning", {}))
             }
             st.session_state.secrets_loaded = True
         except Exception as e:
             st.error(f"⚠️ Error loading secrets: {str(e)}")
             st.stop()
 
-def get_supabase_client():
-    """Get Supabase client."""
-    return create_client(
-        st.session_state.secrets['supabase']['url'],
-        st.session_state.secrets['supabase']['key']
-    )
+def get_setting(name, default):
+    """Read an optional tuning value from the ``[tuning]`` secrets table."""
+    return st.session_state.get('secrets', {}).get('tuning', {}).get(name, default)
+
+# ===========================
+# METRICS
+# ===========================
+METRICS_WINDOW = 1024  # recent samples kept per operation for percentiles
+METRICS_PREFIX = "kitchen_manager"
+NO_SPAN = contextlib.nullcontext()
+
+
+class Span:
+    """Context manager recording its duration under ``name``."""
+    
+    __slots__ = ("metrics", "name", "start")
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """Process-wide timing spans and counters for the hot paths.
+    
+    Each operation keeps its last ``window`` durations, so percentiles follow
+    recent behaviour, plus all-time count and total. When ``enabled`` is off,
+    ``span`` hands back a shared no-op context manager and ``count`` returns
+    straight away. Thread-safe; worker threads get the instance passed in.
+    """
+    
+    def __init__(self, window=METRICS_WINDOW, enabled=True):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+    
+    def span(self, name):
+        return Span(self, name) if self.enabled else NO_SPAN
+    
+    def observe(self, name, seconds):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = collections.deque(maxlen=self.window)
+                self._totals[name] = [0, 0.0]
+            samples.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+    
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+    
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._counters.clear()
+    
+    def snapshot(self):
+        """Per-operation percentiles (ms) over the window and all counters."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            totals = {name: tuple(values) for name, values in self._totals.items()}
+            counters = dict(self._counters)
+        
+        def percentile(values, q):
+            return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 3)
+        
+        spans = {}
+        for name in sorted(samples):
+            values = samples[name]
+            count, total = totals[name]
+            spans[name] = {
+                "count": count,
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / count * 1000, 3),
+                "p50_ms": percentile(values, 0.50),
+                "p95_ms": percentile(values, 0.95),
+                "p99_ms": percentile(values, 0.99),
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        return {"enabled": self.enabled, "spans": spans, "counters": dict(sorted(counters.items()))}
+    
+    def prometheus(self):
+        """The snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        metric = f"{METRICS_PREFIX}_operation_seconds"
+        lines = [
+            f"# HELP {metric} Duration of instrumented operations over the recent window.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, span in snapshot['spans'].items():
+            for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+                lines.append(f'{metric}{{operation="{name}",quantile="{quantile}"}} {span[key] / 1000}')
+            lines.append(f'{metric}_sum{{operation="{name}"}} {span["total_ms"] / 1000}')
+            lines.append(f'{metric}_count{{operation="{name}"}} {span["count"]}')
+        for name, value in snapshot['counters'].items():
+            counter = f"{METRICS_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines.append(f"# TYPE {counter} counter")
+            lines.append(f"{counter} {value}")
+        return "\n".join(lines) + "\n"
+
+
+@st.cache_resource
+def get_metrics_registry():
+    """Process-wide metrics shared by every session and worker thread.
+    
+    `tuning.metrics_enabled` is read once, when the registry is created.
+    """
+    return Metrics(enabled=bool(get_setting('metrics_enabled', True)))
+
+
+def get_metrics():
+    """Get the shared metrics."""
+    return get_metrics_registry()
+
+# ===========================
+# SUPABASE CONNECTION POOL
+# ===========================
+SUPABASE_POOL_LIMITS = httpx.Limits(
+    max_connections=20,
+    max_keepalive_connections=10,
+    keepalive_expiry=60
+)
+SUPABASE_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+SUPABASE_HEALTH_CHECK_INTERVAL = 60  # seconds
+
+
+class SupabasePool:
+    """Process-wide Supabase client sharing one keep-alive HTTP connection pool.
+
+    Streamlit re-executes this script on every rerun, so the pool itself is held
+    by ``st.cache_resource`` (see ``get_supabase_pool``) and shared by all sessions.
+    The client is rebuilt when the configured URL/key change or after a
+    connection-level failure.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._http = None
+        self._fingerprint = None
+        self.builds = 0
+        self.reuses = 0
+        self.reconnects = 0
+        self.last_build_ms = 0.0
+        self.last_health_check = 0.0
+        self.healthy = None
+
+    @staticmethod
+    def _fingerprint_for(url, key):
+        return hashlib.sha256(f"{url}\n{key}".encode()).hexdigest()
+
+    def _close(self):
+        """Drop the current client and close its pooled connections."""
+        if self._http is not None:
+            try:
+                self._http.close()
+            except Exception:
+                pass
+        self._client = None
+        self._http = None
+        self._fingerprint = None
+
+    def _build(self, url, key):
+        start = time.perf_counter()
+        self._close()
+        self._http = httpx.Client(limits=SUPABASE_POOL_LIMITS, timeout=SUPABASE_TIMEOUT)
+        self._client = create_client(url, key, options=ClientOptions(httpx_client=self._http))
+        self._fingerprint = self._fingerprint_for(url, key)
+        self.builds += 1
+        self.last_build_ms = (time.perf_counter() - start) * 1000
+        self.healthy = None
+
+    def get(self, url, key):
+        """Return the shared client, building it on first use or when secrets change."""
+        with self._lock:
+            if self._client is None or self._fingerprint != self._fingerprint_for(url, key):
+                self._build(url, key)
+            else:
+                self.reuses += 1
+            return self._client
+
+    def reset(self):
+        """Force the next ``get`` to build a fresh client."""
+        with self._lock:
+            self._close()
+            self.healthy = False
+
+    def run(self, url, key, operation):
+        """Run ``operation(client)`` and reconnect once on a connection-level failure."""
+        try:
+            return operation(self.get(url, key))
+        except httpx.TransportError:
+            self.reset()
+            self.reconnects += 1
+            return operation(self.get(url, key))
+
+    def health_check(self, url, key, force=False):
+        """Cheap round trip against ``kitchen_data``; rebuilds the client if it fails."""
+        if not force and time.time() - self.last_health_check < SUPABASE_HEALTH_CHECK_INTERVAL:
+            return self.healthy
+        self.last_health_check = time.time()
+        try:
+            self.run(url, key, lambda client: client.table('kitchen_data').select('id').limit(1).execute())
+            self.healthy = True
+        except Exception:
+            self.reset()
+        return self.healthy
+
+    def stats(self):
+        return {
+            "builds": self.builds,
+            "reuses": self.reuses,
+            "reconnects": self.reconnects,
+            "last_build_ms": round(self.last_build_ms, 2),
+            "healthy": self.healthy,
+        }
+
+
+@st.cache_resource
+def get_supabase_pool():
+    """Get the process-wide Supabase pool."""
+    return SupabasePool()
+
+
+def get_supabase_client():
+    """Get the shared Supabase client."""
+    return get_supabase_pool().get(
+        st.session_state.secrets['supabase']['url'],
+        st.session_state.secrets['supabase']['key']
+    )
+
+
+def supabase_runner():
+    """Bind the shared pool to the current secrets.
+    
+    The returned callable takes ``operation(client)`` and needs no Streamlit
+    context, so it can be handed to worker threads.
+    """
+    return functools.partial(
+        get_supabase_pool().run,
+        st.session_state.secrets['supabase']['url'],
+        st.session_state.secrets['supabase']['key']
+    )
+
+
+def run_supabase(operation):
+    """Run ``operation(client)`` against the shared client, reconnecting on failure."""
+    return supabase_runner()(operation)
+
+IMMUTABLE_CACHE_SECONDS = "31536000"  # content-addressed objects never change
+UPLOAD_WORKERS = 4  # concurrent uploads, override with tuning.upload_workers
+
+
+def content_addressed_path(file_bytes: bytes, file_name: str) -> str:
+    """Storage path keyed by the SHA-256 of the bytes, so identical files share one object."""
+    file_ext = file_name.split('.')[-1].lower()
+    return f"public/{hashlib.sha256(file_bytes).hexdigest()}.{file_ext}"
+
+
+def store_file_bytes(run, file_bytes: bytes, file_name: str, content_type: str,
+                     bucket_name: str = "kitchen-images", resumable=None, on_progress=None,
+                     resumable_threshold: int | None = None) -> str:
+    """Upload raw bytes to Supabase Storage and return the public URL.
+    
+    Objects are content-addressed: when the same bytes are already stored the
+    upload is skipped and the existing public URL is returned. Files larger than
+    ``resumable_threshold`` bytes (default ``RESUMABLE_THRESHOLD``) go through
+    ``resumable`` (from ``resumable_runner()``) in chunks when it is given.
+    
+    ``run`` comes from ``supabase_runner()``. Raises on failure and never touches
+    Streamlit state, so it is safe to call from upload worker threads.
+    """
+    file_path = content_addressed_path(file_bytes, file_name)
+    if resumable_threshold is None:
+        resumable_threshold = RESUMABLE_THRESHOLD
+    
+    if resumable is not None and len(file_bytes) > resumable_threshold:
+        if not run(lambda supabase: supabase.storage.from_(bucket_name).exists(file_path)):
+            resumable(bucket_name, file_path, file_bytes, content_type, on_progress=on_progress)
+        return run(lambda supabase: supabase.storage.from_(bucket_name).get_public_url(file_path))
+    
+    def upload(supabase):
+        bucket = supabase.storage.from_(bucket_name)
+        
+        if not bucket.exists(file_path):
+            try:
+                # Upload the bytes; the path never changes content, so let caches keep it
+                bucket.upload(
+                    file=file_bytes,
+                    path=file_path,
+                    file_options={"content-type": content_type, "cache-control": IMMUTABLE_CACHE_SECONDS}
+                )
+            except StorageException as e:
+                # Lost a race with a concurrent upload of the same bytes
+                if str(getattr(e, 'status', '')) != "409" and "already exists" not in str(e).lower():
+                    raise
+        
+        # Return the public URL
+        return bucket.get_public_url(file_path)
+    
+    return run(upload)
+
+
+def upload_file_to_supabase(file: UploadedFile, bucket_name: str = "kitchen-images",
+                            on_progress=None) -> str | None:
+    """Uploads a Streamlit file object to Supabase Storage and returns the public URL.
+    
+    Large files are uploaded in resumable chunks; ``on_progress(sent, total)``
+    is called after each one.
+    """
+    metrics = get_metrics()
+    try:
+        file_bytes = file.getvalue()
+        with metrics.span('upload_file'):
+            url = store_file_bytes(
+                supabase_runner(),
+                file_bytes,
+                file.name,
+                file.type,
+                bucket_name,
+                resumable=resumable_runner(),
+                on_progress=on_progress,
+                resumable_threshold=int(get_setting('resumable_threshold', RESUMABLE_THRESHOLD))
+            )
+        metrics.count('upload_bytes', len(file_bytes))
+        return url
+    except Exception as e:
+        st.error(f"Storage Error: {str(e)}")
+        return None
+
+
+def upload_files_to_supabase(files: list[UploadedFile], bucket_name: str = "kitchen-images",
+                             store=store_file_bytes, show_progress=True) -> list[tuple[object, str | None]]:
+    """Upload several files concurrently with per-file progress.
+    
+    ``store(run, file_bytes, file_name, content_type, bucket_name, resumable=...,
+    resumable_threshold=...)`` does the work for each file. Returns one ``(result, error)`` pair per file, in the
+    same order as ``files``. Callers reporting their own progress pass
+    ``show_progress=False``.
+    """
+    if not files:
+        return []
+    
+    run = supabase_runner()
+    resumable = resumable_runner()
+    resumable_threshold = int(get_setting('resumable_threshold', RESUMABLE_THRESHOLD))
+    metrics = get_metrics()
+    results = [(None, None)] * len(files)
+    if show_progress:
+        progress = st.progress(0.0, text=f"Uploading {len(files)} image(s)...")
+        status_rows = [st.empty() for _ in files]
+        for row, file in zip(status_rows, files):
+            row.caption(f"⏳ {file.name}")
+    
+    def timed_store(file_bytes, file_name, content_type):
+        with metrics.span('upload_file'):
+            result = store(run, file_bytes, file_name, content_type, bucket_name,
+                           resumable=resumable, resumable_threshold=resumable_threshold)
+        metrics.count('upload_bytes', len(file_bytes))
+        return result
+    
+    workers = max(1, min(int(get_setting('upload_workers', UPLOAD_WORKERS)), len(files)))
+    with metrics.span('upload_files'), \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload") as executor:
+        # Read the bytes on the script thread; workers only do processing and network I/O
+        futures = {
+            executor.submit(timed_store, file.getvalue(), file.name, file.type): idx
+            for idx, file in enumerate(files)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            idx = futures[future]
+            try:
+                results[idx] = (future.result(), None)
+            except Exception as e:
+                results[idx] = (None, str(e))
+            if show_progress:
+                result, error = results[idx]
+                status_rows[idx].caption(f"❌ {files[idx].name}: {error}" if error else f"✅ {files[idx].name}")
+                progress.progress(done / len(files), text=f"Uploaded {done}/{len(files)} image(s)")
+    
+    return results
+
+# ===========================
+# RESUMABLE UPLOADS
+# ===========================
+UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024  # Supabase expects 6MB TUS chunks, override with tuning.upload_chunk_size
+RESUMABLE_THRESHOLD = 6 * 1024 * 1024  # larger files are uploaded in chunks, override with tuning.resumable_threshold
+UPLOAD_CHUNK_RETRIES = 5  # attempts per chunk, override with tuning.upload_chunk_retries
+UPLOAD_CHUNK_BACKOFF = 0.5  # seconds, base of the jittered exponential backoff
+UPLOAD_CHUNK_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+UPLOAD_STATE_TTL = 24 * 60 * 60  # seconds; Supabase drops unfinished uploads after a day, override with tuning.upload_state_ttl
+TUS_VERSION = "1.0.0"
+
+
+class ResumableUploadError(Exception):
+    """A chunked upload gave up; its progress is kept so the next attempt resumes."""
+
+
+class ResumableUploader:
+    """Chunked uploads to Supabase Storage over its TUS endpoint.
+    
+    Each upload's TUS location and confirmed offset are written to a small JSON
+    file under ``state_dir``, keyed by bucket and object path. An upload that
+    is cut off by a dropped connection, a rerun or a restart continues from the
+    last confirmed byte the next time the same file is uploaded. A failed chunk
+    is retried on its own with backoff, after re-reading the server's offset,
+    so confirmed bytes are never sent twice. Progress older than ``state_ttl``
+    seconds, or from an upload the server rejected outright, is discarded.
+    """
+    
+    def __init__(self, state_dir, metrics, http=None, state_ttl=UPLOAD_STATE_TTL):
+        self.state_dir = state_dir
+        self.metrics = metrics
+        self.state_ttl = state_ttl
+        self.http = http or httpx.Client(limits=SUPABASE_POOL_LIMITS, timeout=UPLOAD_CHUNK_TIMEOUT)
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.resumed = 0
+        self.chunks = 0
+        self.chunk_retries = 0
+        self.bytes_sent = 0
+        os.makedirs(state_dir, exist_ok=True)
+        self._expire()
+    
+    def _state_path(self, bucket_name, path):
+        return os.path.join(self.state_dir, f"{hashlib.sha256(f'{bucket_name}/{path}'.encode()).hexdigest()}.json")
+    
+    def _load(self, state_path):
+        try:
+            with open(state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _expired(self, state):
+        return time.time() - state.get('created_at', 0) > self.state_ttl
+    
+    def _expire(self):
+        """Delete state files for uploads too old to resume; returns the states still pending."""
+        states = []
+        for file_name in sorted(os.listdir(self.state_dir)):
+            if not file_name.endswith('.json'):
+                continue
+            state_path = os.path.join(self.state_dir, file_name)
+            state = self._load(state_path)
+            if state and not self._expired(state):
+                states.append(state)
+                continue
+            try:
+                os.remove(state_path)
+            except OSError:
+                pass
+        return states
+    
+    def _save(self, state_path, state):
+        tmp_path = f"{state_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
+    
+    def _create(self, base_url, headers, bucket_name, path, size, content_type):
+        metadata = {
+            "bucketName": bucket_name,
+            "objectName": path,
+            "contentType": content_type,
+            "cacheControl": IMMUTABLE_CACHE_SECONDS,
+        }
+        response = self.http.post(
+            f"{base_url.rstrip('/')}/storage/v1/upload/resumable",
+            headers={
+                **headers,
+                "Upload-Length": str(size),
+                "Upload-Metadata": ",".join(
+                    f"{key} {base64.b64encode(value.encode()).decode()}" for key, value in metadata.items()
+                ),
+                "x-upsert": "true",
+            }
+        )
+        response.raise_for_status()
+        return str(response.url.join(response.headers['Location']))
+    
+    def _offset(self, location, headers):
+        """The server's confirmed offset, or None when the upload has expired."""
+        response = self.http.head(location, headers=headers)
+        if response.status_code in (404, 410):
+            return None
+        response.raise_for_status()
+        return int(response.headers['Upload-Offset'])
+    
+    def upload(self, base_url, key, bucket_name, path, data, content_type,
+               chunk_size=UPLOAD_CHUNK_SIZE, retries=UPLOAD_CHUNK_RETRIES, on_progress=None):
+        """Upload ``data`` to ``bucket_name/path``, resuming any earlier partial upload."""
+        headers = {"Authorization": f"Bearer {key}", "apikey": key, "Tus-Resumable": TUS_VERSION}
+        state_path = self._state_path(bucket_name, path)
+        state = self._load(state_path)
+        offset = None
+        if state and state.get('size') == len(data) and not self._expired(state):
+            try:
+                offset = self._offset(state['location'], headers)
+            except httpx.HTTPError:
+                offset = None
+            if offset is not None:
+                with self._lock:
+                    self.resumed += 1
+        if offset is None:
+            state = {
+                "bucket": bucket_name,
+                "path": path,
+                "size": len(data),
+                "location": self._create(base_url, headers, bucket_name, path, len(data), content_type),
+                "created_at": time.time(),
+            }
+            offset = 0
+        state['offset'] = offset
+        self._save(state_path, state)
+        with self._lock:
+            self.uploads += 1
+        
+        view = memoryview(data)
+        failures = 0
+        while offset < len(data):
+            chunk = view[offset:offset + chunk_size]
+            try:
+                response = self.http.patch(
+                    state['location'],
+                    headers={
+                        **headers,
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream",
+                    },
+                    content=bytes(chunk)
+                )
+                response.raise_for_status()
+                confirmed = int(response.headers['Upload-Offset'])
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                # Only connection problems, offset conflicts and server errors are worth retrying
+                if status is not None and status < 500 and status not in (409, 423):
+                    os.remove(state_path)
+                    raise
+                failures += 1
+                with self._lock:
+                    self.chunk_retries += 1
+                self.metrics.count('upload_chunk_retries')
+                if failures >= retries:
+                    raise ResumableUploadError(
+                        f"Upload stopped at {offset}/{len(data)} bytes after {failures} failed attempts: {e}"
+                    ) from e
+                time.sleep(random.uniform(0, UPLOAD_CHUNK_BACKOFF * 2 ** failures))
+                try:
+                    server_offset = self._offset(state['location'], headers)
+                except httpx.HTTPError:
+                    continue
+                if server_offset is None:
+                    os.remove(state_path)
+                    raise ResumableUploadError("The upload expired on the server; start it again") from e
+                offset = server_offset
+            else:
+                failures = 0
+                with self._lock:
+                    self.chunks += 1
+                    self.bytes_sent += confirmed - offset
+                self.metrics.count('upload_chunks')
+                offset = confirmed
+            
+            state['offset'] = offset
+            self._save(state_path, state)
+            if on_progress:
+                on_progress(offset, len(data))
+        
+        os.remove(state_path)
+    
+    def pending(self):
+        """Partial uploads waiting to be resumed; expired ones are deleted on the way."""
+        return self._expire()
+    
+    def stats(self):
+        return {
+            "uploads": self.uploads,
+            "resumed": self.resumed,
+            "chunks": self.chunks,
+            "chunk_retries": self.chunk_retries,
+            "bytes_sent": self.bytes_sent,
+            "pending": len(self.pending()),
+        }
+
+
+@st.cache_resource
+def get_resumable_uploader():
+    """Get the process-wide resumable uploader."""
+    return ResumableUploader(
+        os.path.join(get_data_dir(), "uploads"),
+        get_metrics(),
+        state_ttl=float(get_setting('upload_state_ttl', UPLOAD_STATE_TTL))
+    )
+
+
+def resumable_runner():
+    """Bind the resumable uploader to the current secrets and settings.
+    
+    Returns None when `tuning.resumable_uploads` is off. Like
+    ``supabase_runner()``, the result is safe to hand to worker threads.
+    """
+    if not get_setting('resumable_uploads', True):
+        return None
+    return functools.partial(
+        get_resumable_uploader().upload,
+        st.session_state.secrets['supabase']['url'],
+        st.session_state.secrets['supabase']['key'],
+        chunk_size=int(get_setting('upload_chunk_size', UPLOAD_CHUNK_SIZE)),
+        retries=int(get_setting('upload_chunk_retries', UPLOAD_CHUNK_RETRIES))
+    )
+
+# ===========================
+# IMAGE PREPROCESSING
+# ===========================
+IMAGE_MAX_DIMENSION = 1600  # px, override with tuning.image_max_dimension
+IMAGE_THUMBNAIL_DIMENSION = 400  # px, override with tuning.image_thumbnail_dimension
+IMAGE_QUALITY = 80  # WebP quality, override with tuning.image_quality
+
+
+def preprocess_image(file_bytes: bytes, max_dimension: int = IMAGE_MAX_DIMENSION,
+                     thumbnail_dimension: int = IMAGE_THUMBNAIL_DIMENSION,
+                     quality: int = IMAGE_QUALITY) -> tuple[bytes, bytes]:
+    """Downscale and re-encode an image as WebP, returning ``(full, thumbnail)`` bytes.
+    
+    EXIF orientation is applied to the pixels and all metadata is dropped.
+    """
+    image = open_image(file_bytes)
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    return encode_webp(image, max_dimension, quality), encode_webp(image, thumbnail_dimension, quality)
+
+
+def open_image(file_bytes: bytes) -> Image.Image:
+    """Decode an image with EXIF orientation applied, as RGB or RGBA."""
+    with Image.open(io.BytesIO(file_bytes)) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+        image.load()
+    return image
+
+
+def encode_webp(image: Image.Image, dimension: int, quality: int = IMAGE_QUALITY) -> bytes:
+    """Encode a copy of ``image`` fitted within ``dimension`` pixels as WebP."""
+    resized = image.copy()
+    resized.thumbnail((dimension, dimension), Image.LANCZOS)
+    out = io.BytesIO()
+    resized.save(out, format="WEBP", quality=quality, method=4)
+    return out.getvalue()
+
+
+def store_image_bytes(run, file_bytes: bytes, file_name: str, content_type: str,
+                      bucket_name: str = "kitchen-images", settings: dict | None = None,
+                      resumable=None, resumable_threshold: int = RESUMABLE_THRESHOLD) -> dict:
+    """Preprocess an image and upload the full-size and thumbnail variants.
+    
+    Returns ``{"url": ..., "thumbnail_url": ...}``. Files Pillow cannot decode
+    are uploaded unchanged with no thumbnail.
+    """
+    settings = settings or {}
+    try:
+        full, thumb = preprocess_image(
+            file_bytes,
+            max_dimension=int(settings.get('image_max_dimension', IMAGE_MAX_DIMENSION)),
+            thumbnail_dimension=int(settings.get('image_thumbnail_dimension', IMAGE_THUMBNAIL_DIMENSION)),
+            quality=int(settings.get('image_quality', IMAGE_QUALITY))
+        )
+    except (UnidentifiedImageError, OSError):
+        return {
+            "url": store_file_bytes(run, file_bytes, file_name, content_type, bucket_name,
+                                    resumable=resumable, resumable_threshold=resumable_threshold),
+            "thumbnail_url": None,
+        }
+    
+    stem = file_name.rsplit('.', 1)[0]
+    return {
+        "url": store_file_bytes(run, full, f"{stem}.webp", "image/webp", bucket_name,
+                                resumable=resumable, resumable_threshold=resumable_threshold),
+        "thumbnail_url": store_file_bytes(run, thumb, f"{stem}_thumb.webp", "image/webp", bucket_name),
+    }
+
+
+def upload_images_to_supabase(files: list[UploadedFile], bucket_name: str = "kitchen-images",
+                              show_progress=True) -> list[tuple[dict | None, str | None]]:
+    """Preprocess and upload images concurrently; see ``upload_files_to_supabase``."""
+    store = functools.partial(store_image_bytes, settings=dict(st.session_state.secrets.get('tuning', {})))
+    return upload_files_to_supabase(files, bucket_name, store=store, show_progress=show_progress)
+
+
+# ===========================
+# IMAGE CACHE
+# ===========================
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024  # disk budget, override with tuning.image_cache_bytes
+IMAGE_CARD_DIMENSION = 400  # px, override with tuning.image_card_dimension
+IMAGE_FETCH_TIMEOUT = 15  # seconds
+IMAGE_FAILURE_TTL = 60  # seconds before a failed image is fetched again
+IMAGE_FETCH_WORKERS = 4  # background fetches, override with tuning.image_fetch_workers
+
+
+def fetch_image_bytes(url, source_dir=None, session=None, timeout=IMAGE_FETCH_TIMEOUT):
+    """Download an image, or read it from ``source_dir`` standing in for the bucket.
+    
+    With ``source_dir`` the part of the URL after ``/object/public/`` (the bucket
+    and object path) is resolved inside that directory.
+    """
+    if source_dir:
+        object_path = url.split('/object/public/', 1)[-1].split('?', 1)[0]
+        root = os.path.abspath(source_dir)
+        path = os.path.abspath(os.path.join(root, object_path))
+        if not path.startswith(root + os.sep):
+            raise ValueError(f"Image path escapes the source directory: {url}")
+        with open(path, 'rb') as f:
+            return f.read()
+    response = (session or requests).get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+class ImageCache:
+    """Process-wide LRU cache of card-sized images on local disk.
+    
+    Each source image is fetched once, downscaled to a WebP thumbnail and kept
+    under ``directory``; every session is then served that local copy instead of
+    downloading the original from Supabase Storage. Misses never block a
+    render: ``get`` returns None and the image is loaded on a background worker,
+    one load per image however many cards ask. Least recently used files are
+    evicted once the cache grows past ``budget`` bytes. Files already on disk
+    are picked up again when the cache is created.
+    """
+    
+    def __init__(self, directory, budget, fetch, dimension=IMAGE_CARD_DIMENSION, workers=IMAGE_FETCH_WORKERS):
+        self.directory = directory
+        self.budget = budget
+        self.fetch = fetch
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-cache")
+        # key -> Future of the load in flight
+        self._loading = {}
+        self._failures = {}
+        # key -> (file name, cached size, source size), least recently used first
+        self._entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.evictions = 0
+        self.source_bytes = 0
+        self.requested_bytes = 0
+        self.served_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+    
+    def _scan(self):
+        # Files are named <key>.<source size>.webp; mtime keeps the LRU order
+        found = []
+        for file_name in os.listdir(self.directory):
+            parts = file_name.split('.')
+            if len(parts) != 3 or parts[2] != 'webp' or not parts[1].isdigit():
+                continue
+            stat = os.stat(os.path.join(self.directory, file_name))
+            found.append((stat.st_mtime, parts[0], file_name, stat.st_size, int(parts[1])))
+        for _, key, file_name, size, source_size in sorted(found):
+            self._entries[key] = (file_name, size, source_size)
+            self.size += size
+    
+    def get(self, url):
+        """Return cached card-sized image bytes for ``url``, or None on a miss.
+        
+        A miss starts a background load unless one is already running or the
+        image failed within the last ``IMAGE_FAILURE_TTL`` seconds.
+        """
+        key = hashlib.sha256(url.encode()).hexdigest()
+        data = self._read(key)
+        if data is None:
+            # The browser downloads the original this time, whether or not a load starts
+            with self._lock:
+                self.misses += 1
+            self.prefetch(url)
+        return data
+    
+    def prefetch(self, url):
+        """Start loading ``url`` in the background; returns the load's Future, or None."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        with self._lock:
+            if key in self._entries:
+                return None
+            if key not in self._loading:
+                failed_at = self._failures.get(key)
+                if failed_at is not None and time.time() - failed_at < IMAGE_FAILURE_TTL:
+                    return None
+                self._loading[key] = self._executor.submit(self._load_in_background, url, key)
+            return self._loading[key]
+    
+    def _load_in_background(self, url, key):
+        try:
+            return self._load(url, key)
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+    
+    def _read(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        file_name, size, source_size = entry
+        path = os.path.join(self.directory, file_name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self.size -= size
+            return None
+        with self._lock:
+            self.hits += 1
+            self.requested_bytes += source_size
+            self.served_bytes += len(data)
+        return data
+    
+    def _load(self, url, key):
+        file_name = None
+        try:
+            source = self.fetch(url)
+            data = encode_webp(open_image(source), self.dimension)
+            file_name = f"{key}.{len(source)}.webp"
+            tmp_path = os.path.join(self.directory, f"{file_name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(self.directory, file_name))
+        except (requests.exceptions.RequestException, UnidentifiedImageError, Image.DecompressionBombError,
+                OSError, ValueError):
+            # Unreachable, undecodable, oversized, or a full or read-only disk
+            if file_name:
+                try:
+                    os.remove(os.path.join(self.directory, f"{file_name}.tmp"))
+                except OSError:
+                    pass
+            with self._lock:
+                self.failures += 1
+                self._failures[key] = time.time()
+            return None
+        
+        with self._lock:
+            self._failures.pop(key, None)
+            self._entries[key] = (file_name, len(data), len(source))
+            self.size += len(data)
+            self.source_bytes += len(source)
+            evicted = self._evict()
+        for file_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, file_name))
+            except OSError:
+                pass
+        return data
+    
+    def _evict(self):
+        """Drop least recently used entries until under budget; returns their file names."""
+        evicted = []
+        while self.size > self.budget and len(self._entries) > 1:
+            _, (file_name, size, _) = self._entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+            evicted.append(file_name)
+        return evicted
+    
+    def clear(self):
+        """Delete every cached image."""
+        with self._lock:
+            file_names = [entry[0] for entry in self._entries.values()]
+            self._entries.clear()
+            self._failures.clear()
+            self.size = 0
+        for file_name in file_names:
+            try:
+                os.remove(os.path.join(self.directory, file_name))
+            except OSError:
+                pass
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size,
+            "budget_bytes": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loading": len(self._loading),
+            "failures": self.failures,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "source_bytes_fetched": self.source_bytes,
+            "bytes_served": self.served_bytes,
+            # Originals that hits spared the browser, less what the cache fetched itself
+            "bytes_saved": self.requested_bytes - self.source_bytes,
+        }
+
+
+@st.cache_resource
+def get_image_cache():
+    """Get the process-wide card image cache."""
+    return ImageCache(
+        os.path.join(get_data_dir(), "images"),
+        int(get_setting('image_cache_bytes', IMAGE_CACHE_BYTES)),
+        functools.partial(
+            fetch_image_bytes,
+            source_dir=get_setting('image_source_dir', None),
+            session=requests.Session()
+        ),
+        int(get_setting('image_card_dimension', IMAGE_CARD_DIMENSION)),
+        int(get_setting('image_fetch_workers', IMAGE_FETCH_WORKERS))
+    )
+
+
+def get_card_image(url):
+    """Card-sized image for ``url`` from the shared cache.
+    
+    Until the cache has it the browser loads the URL itself.
+    """
+    return get_image_cache().get(url) or url
+
+# ===========================
+# MENU CACHE
+# ===========================
+MENU_CACHE_TTL = 30  # seconds, override with tuning.menu_cache_ttl
+
+
+class MenuCache:
+    """Cross-session, in-process TTL cache for menu queries.
+
+    Held by ``st.cache_resource`` so every session reads the same entries. Loads
+    are single-flight per key: concurrent misses for the same key wait for one
+    query instead of all hitting Supabase, while other keys load independently.
+    Queued mutations ``patch`` entries in place; ``invalidate`` drops every
+    entry. A load that overlaps a patch or invalidation of its key returns its
+    result without caching it, so stale data is never stored.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._entries = {}
+        self._generation = 0
+        self._key_generations = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.invalidations = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self.hits += 1
+                return True, entry[1]
+            return False, None
+
+    def get_or_load(self, key, ttl, loader, bypass=False):
+        """Return the cached value for ``key`` or call ``loader()`` and store it."""
+        if not bypass:
+            found, value = self._lookup(key)
+            if found:
+                return value
+        # [lock, sessions using it]; dropped once no session needs it
+        with self._lock:
+            slot = self._load_locks.setdefault(key, [threading.Lock(), 0])
+            slot[1] += 1
+        try:
+            with slot[0]:
+                if bypass:
+                    self.bypasses += 1
+                else:
+                    # Another session may have loaded it while we waited
+                    found, value = self._lookup(key)
+                    if found:
+                        return value
+                    self.misses += 1
+                with self._lock:
+                    generation = (self._generation, self._key_generations.get(key, 0))
+                value = loader()
+                with self._lock:
+                    if generation == (self._generation, self._key_generations.get(key, 0)):
+                        self._entries[key] = (time.time() + ttl, value)
+                return value
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._load_locks[key]
+
+    def patch(self, key, update):
+        """Replace a cached value with ``update(value)``, keeping its expiry.
+        
+        Does nothing when ``key`` is not cached; the next load picks the change up.
+        """
+        self.patch_matching(lambda cached_key: cached_key == key, update)
+    
+    def patch_matching(self, match, update):
+        """``patch`` every cached or loading key for which ``match(key)`` is true."""
+        with self._lock:
+            for key in [key for key in set(self._entries) | set(self._load_locks) if match(key)]:
+                self._key_generations[key] = self._key_generations.get(key, 0) + 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries[key] = (entry[0], update(entry[1]))
+    
+    def invalidate(self):
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+@st.cache_resource
+def get_menu_cache():
+    """Get the process-wide menu cache."""
+    return MenuCache()
+
+
+def invalidate_menu_cache():
+    """Invalidate cached menu data so every session sees the latest change."""
+    get_menu_cache().invalidate()
+
+# ===========================
+# WEBHOOK CLIENT
+# ===========================
+WEBHOOK_CONNECT_TIMEOUT = 5  # seconds, override with tuning.webhook_connect_timeout
+WEBHOOK_READ_TIMEOUT = 30  # seconds, override with tuning.webhook_read_timeout
+WEBHOOK_RETRIES = 2  # extra attempts for idempotent calls, override with tuning.webhook_retries
+WEBHOOK_BACKOFF = 0.5  # seconds, base of the jittered exponential backoff
+WEBHOOK_RETRY_STATUSES = {429, 502, 503, 504}
+WEBHOOK_BREAKER_THRESHOLD = 5  # consecutive failures before the circuit opens
+WEBHOOK_BREAKER_COOLDOWN = 30  # seconds before a trial call is let through
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without touching the network while the webhook circuit is open."""
+
+
+class WebhookClient:
+    """Shared n8n webhook client with connection reuse, retries and a circuit breaker.
+    
+    One ``requests.Session`` keeps connections to n8n alive across calls and
+    sessions. Idempotent calls are retried on connection errors, timeouts and
+    gateway-style statuses with jittered exponential backoff. After
+    ``WEBHOOK_BREAKER_THRESHOLD`` consecutive failures the circuit opens and
+    calls fail immediately until the cooldown passes; then one trial call is let
+    through to close it again.
+    """
+    
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.short_circuits = 0
+    
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.time() - self._opened_at >= WEBHOOK_BREAKER_COOLDOWN:
+            return "half-open"
+        return "open"
+    
+    def _admit(self):
+        """Raise ``CircuitOpenError`` unless this call may go out."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self.short_circuits += 1
+            raise CircuitOpenError("n8n is unavailable, not sending request (circuit open)")
+    
+    def _record(self, ok):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self.failures += 1
+            self.metrics.count('webhook_failures')
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= WEBHOOK_BREAKER_THRESHOLD:
+                self._opened_at = time.time()
+    
+    def post(self, url, payload, idempotent=False, retries=WEBHOOK_RETRIES,
+             timeout=(WEBHOOK_CONNECT_TIMEOUT, WEBHOOK_READ_TIMEOUT), name="webhook", headers=None):
+        """POST ``payload`` as JSON and return the response; raises ``RequestException``.
+        
+        Calls that go out are timed under ``name``, retries and backoff included.
+        """
+        self._admit()
+        attempts = 1 + (max(0, int(retries)) if idempotent else 0)
+        
+        with self.metrics.span(name):
+            for attempt in range(attempts):
+                self.calls += 1
+                last_attempt = attempt == attempts - 1
+                try:
+                    response = self.session.post(url, json=payload, timeout=timeout, headers=headers)
+                    if response.status_code in WEBHOOK_RETRY_STATUSES and not last_attempt:
+                        self._backoff(attempt)
+                        continue
+                    response.raise_for_status()
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                    if not last_attempt:
+                        self._backoff(attempt)
+                        continue
+                    self._record(False)
+                    raise
+                except requests.exceptions.HTTPError as e:
+                    # 4xx means n8n answered; only server-side errors count against the circuit
+                    self._record(e.response is None or e.response.status_code < 500)
+                    raise
+                except Exception:
+                    self._record(False)
+                    raise
+                self._record(True)
+                return response
+    
+    def _backoff(self, attempt):
+        self.retries += 1
+        self.metrics.count('webhook_retries')
+        time.sleep(random.uniform(0, WEBHOOK_BACKOFF * 2 ** attempt))
+    
+    def stats(self):
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "short_circuits": self.short_circuits,
+        }
+
+
+@st.cache_resource
+def get_webhook_client():
+    """Get the process-wide webhook client."""
+    return WebhookClient(get_metrics())
+
+
+def request_never_sent(error):
+    """Whether ``error`` shows n8n cannot have acted on the request, so resending is safe.
+    
+    True for an open circuit, a failed connection and a 429. Read timeouts,
+    dropped connections and 5xx responses are ambiguous: n8n may already have
+    run the workflow.
+    """
+    if isinstance(error, (CircuitOpenError, requests.exceptions.ConnectTimeout)):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError):
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        # NewConnectionError and NameResolutionError are ConnectTimeoutErrors
+        return isinstance(reason, urllib3.exceptions.ConnectTimeoutError)
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code == 429
+    return False
+
+
+def post_webhook(name, payload, idempotent=False):
+    """POST ``payload`` to the configured n8n webhook ``name`` through the shared client."""
+    return get_webhook_client().post(
+        st.session_state.secrets['n8n'][name],
+        payload,
+        idempotent=idempotent,
+        name=name,
+        retries=get_setting('webhook_retries', WEBHOOK_RETRIES),
+        timeout=(
+            get_setting('webhook_connect_timeout', WEBHOOK_CONNECT_TIMEOUT),
+            get_setting('webhook_read_timeout', WEBHOOK_READ_TIMEOUT)
+        )
+    )
+
+# ===========================
+# MUTATION OUTBOX
+# ===========================
+DATA_DIR = ".kitchen_manager"  # local state directory, override with tuning.data_dir
+OUTBOX_MAX_ATTEMPTS = 8  # attempts before a mutation is marked failed
+OUTBOX_MAX_BACKOFF = 300  # seconds
+OUTBOX_POLL_INTERVAL = 1.0  # seconds
+STATUS_DEBOUNCE = 1.5  # seconds a status change waits for a follow-up, override with tuning.status_debounce
+
+# Mutation kind -> (n8n webhook secret, idempotent)
+MUTATION_WEBHOOKS = {
+    "add": ('add_item_webhook', False),
+    "add_batch": ('bulk_add_item_webhook', False),
+    "status": ('update_status_webhook', True),
+    "delete": ('delete_item_webhook', True),
+    "status_batch": ('bulk_update_status_webhook', True),
+    "delete_batch": ('bulk_delete_item_webhook', True),
+}
+# Kinds where a newer unsent mutation for an item replaces the older one
+COALESCED_MUTATIONS = {"status"}
+
+
+def mutation_item_ids(row):
+    """Items an outbox row touches; batched rows carry their ids in the payload."""
+    if row['item_id'] is not None:
+        return [row['item_id']]
+    if row['kind'] in ('status_batch', 'delete_batch'):
+        return [str(item_id) for item_id in json.loads(row['payload'])['item_ids']]
+    return []
+
+
+def get_data_dir():
+    """Directory for local state files, created on first use."""
+    path = get_setting('data_dir', DATA_DIR)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def idempotency_key(row):
+    """Key shared by every send of the same outbox row and payload.
+    
+    The creation time keeps ids from a reset outbox distinct; the payload digest
+    gives a coalesced row a new key.
+    """
+    digest = hashlib.sha256(row['payload'].encode()).hexdigest()[:12]
+    return f"kitchen-outbox-{row['id']}-{int(row['created_at'] * 1000)}-{digest}"
+
+
+class MutationOutbox:
+    """Durable SQLite queue of webhook mutations drained by a background worker.
+    
+    ``enqueue`` only writes a row, so the UI returns immediately. The worker
+    thread posts rows to n8n in order, retrying failures with exponential
+    backoff; rows that keep failing are marked ``failed`` until retried or
+    discarded from the Settings page. ``on_sent(kind, payload)`` is called
+    on the worker thread after each delivery. Rows for the same item are never sent out
+    of order. Queued rows survive a process restart and are picked up again
+    when the outbox is next created.
+    
+    Every row is sent with a stable ``Idempotency-Key`` header so n8n can drop
+    repeats. Non-idempotent rows are only resent when the request provably never
+    reached n8n; after an ambiguous failure they are marked ``failed`` for
+    someone to check before retrying by hand.
+    
+    Coalesced kinds are last-write-wins: while an item's latest row of that
+    kind is still unsent, a new mutation overwrites its payload instead of
+    queueing another call, and ``delay`` pushes the send back so a burst of
+    changes goes out once.
+    """
+    
+    def __init__(self, path, client, on_sent=None):
+        self.client = client
+        self.on_sent = on_sent
+        self.post_options = {}
+        self.sent = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                item_id TEXT,
+                url TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                idempotent INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                next_attempt_at REAL NOT NULL
+            )
+        """)
+        self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+        self._thread.start()
+    
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+    
+    def enqueue(self, kind, url, payload, item_id=None, idempotent=False, coalesce=False, delay=0):
+        """Persist a mutation and wake the worker; returns the outbox row id.
+        
+        With ``coalesce`` the mutation may overwrite the item's unsent row of
+        the same kind, whose id is returned. The row is not sent before
+        ``delay`` seconds have passed.
+        """
+        now = time.time()
+        with self._lock:
+            row_id = self._coalesce_target(kind, str(item_id)) if coalesce and item_id is not None else None
+            if row_id is not None:
+                self._db.execute(
+                    "UPDATE outbox SET url = ?, payload = ?, next_attempt_at = ? WHERE id = ?",
+                    (url, json.dumps(payload), now + delay, row_id)
+                )
+                self.coalesced += 1
+            else:
+                row_id = self._db.execute(
+                    "INSERT INTO outbox (kind, item_id, url, payload, idempotent, created_at, next_attempt_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (kind, None if item_id is None else str(item_id), url, json.dumps(payload), int(idempotent),
+                     now, now + delay)
+                ).lastrowid
+        self._wake.set()
+        return row_id
+    
+    def _coalesce_target(self, kind, item_id):
+        """The item's latest row if a new ``kind`` mutation may overwrite it, else None.
+        
+        Only a pending row of the same kind qualifies, and only when no later
+        batched row touches the item. Call with the lock held.
+        """
+        row = self._db.execute(
+            "SELECT id, kind, status FROM outbox WHERE item_id = ? ORDER BY id DESC LIMIT 1", (item_id,)
+        ).fetchone()
+        if row is None or row['kind'] != kind or row['status'] != 'pending':
+            return None
+        later = self._db.execute("SELECT * FROM outbox WHERE id > ? AND item_id IS NULL", (row['id'],)).fetchall()
+        if any(item_id in mutation_item_ids(later_row) for later_row in later):
+            return None
+        return row['id']
+    
+    def item_states(self):
+        """Latest unsent mutation per item: ``{item_id: row}``.
+        
+        Queued adds have no item id yet and are keyed by their provisional row id.
+        """
+        states = {}
+        for row in self._query("SELECT * FROM outbox ORDER BY id"):
+            if row['kind'] == 'add_batch':
+                for position in range(len(json.loads(row['payload'])['items'])):
+                    states[f"pending-{row['id']}-{position}"] = dict(row)
+            elif row['kind'] in ('status_batch', 'delete_batch'):
+                for item_id in mutation_item_ids(row):
+                    states[item_id] = dict(row)
+            else:
+                states[row['item_id'] or f"pending-{row['id']}"] = dict(row)
+        return states
+    
+    def rows(self, status=None):
+        if status is None:
+            return [dict(row) for row in self._query("SELECT * FROM outbox ORDER BY id")]
+        return [dict(row) for row in self._query("SELECT * FROM outbox WHERE status = ? ORDER BY id", (status,))]
+    
+    def counts(self):
+        rows = self._query("SELECT status, COUNT(*) AS n FROM outbox GROUP BY status")
+        counts = {"pending": 0, "failed": 0}
+        counts.update({row['status']: row['n'] for row in rows})
+        return counts
+    
+    def retry(self, row_id=None):
+        """Move failed rows (or one row) back to pending."""
+        sql = "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'failed'"
+        params = (time.time(),)
+        if row_id is not None:
+            sql += " AND id = ?"
+            params += (row_id,)
+        self._query(sql, params)
+        self._wake.set()
+    
+    def discard(self, row_id):
+        self._query("DELETE FROM outbox WHERE id = ?", (row_id,))
+    
+    def _next_wait(self):
+        """Seconds until the next pending row comes due, capped at the poll interval.
+        
+        Rows already due but held back behind another row wait for the next poll.
+        """
+        now = time.time()
+        row = self._query(
+            "SELECT MIN(next_attempt_at) AS due FROM outbox WHERE status = 'pending' AND next_attempt_at > ?", (now,)
+        )[0]
+        if row['due'] is None:
+            return OUTBOX_POLL_INTERVAL
+        return min(OUTBOX_POLL_INTERVAL, row['due'] - now)
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self._next_wait())
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception:
+                # Keep the worker alive; rows stay queued for the next pass
+                pass
+    
+    def drain(self):
+        """Send every due row once, keeping per-item order.
+        
+        A batched row waits for every item it touches, and holds all of them
+        back while it is unsent.
+        """
+        blocked = set()
+        for row in self.rows():
+            item_ids = mutation_item_ids(row)
+            if blocked.intersection(item_ids):
+                blocked.update(item_ids)
+                continue
+            if row['status'] != 'pending' or row['next_attempt_at'] > time.time():
+                blocked.update(item_ids)
+                continue
+            if not self._send(row):
+                blocked.update(item_ids)
+    
+    def _send(self, row):
+        try:
+            self.client.post(row['url'], json.loads(row['payload']), idempotent=bool(row['idempotent']),
+                             name=MUTATION_WEBHOOKS.get(row['kind'], ("webhook",))[0],
+                             headers={"Idempotency-Key": idempotency_key(row)}, **self.post_options)
+        except CircuitOpenError:
+            # n8n is known to be down; wait out the cooldown without using up attempts
+            self._query("UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                        (time.time() + WEBHOOK_BREAKER_COOLDOWN, row['id']))
+            return False
+        except requests.exceptions.RequestException as e:
+            attempts = row['attempts'] + 1
+            resend = row['idempotent'] or request_never_sent(e)
+            status = 'failed' if attempts >= OUTBOX_MAX_ATTEMPTS or not resend else 'pending'
+            error = str(e) if resend else f"Not resent, n8n may already have applied it: {e}"
+            self._query(
+                "UPDATE outbox SET status = ?, attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                (status, attempts, error, time.time() + min(OUTBOX_MAX_BACKOFF, 2 ** attempts), row['id'])
+            )
+            return False
+        # A row coalesced while it was in flight keeps its newer payload for the next pass
+        self._query("DELETE FROM outbox WHERE id = ? AND payload = ?", (row['id'], row['payload']))
+        self.sent += 1
+        if self.on_sent:
+            self.on_sent(row['kind'], json.loads(row['payload']))
+        return True
+    
+    def stats(self):
+        return {
+            **self.counts(),
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "worker_alive": self._thread.is_alive()
+        }
+
+
+@st.cache_resource
+def get_outbox():
+    """Get the process-wide mutation outbox, starting its worker."""
+    return MutationOutbox(
+        os.path.join(get_data_dir(), "outbox.sqlite3"),
+        get_webhook_client(),
+        on_sent=get_menu_sync_state().forget_sent
+    )
+
+
+def queue_mutation(kind, payload, item_id=None):
+    """Write a mutation to the outbox for the background worker to send."""
+    webhook, idempotent = MUTATION_WEBHOOKS[kind]
+    outbox = get_outbox()
+    # The worker has no session; hand it the current webhook settings
+    outbox.post_options = {
+        "retries": get_setting('webhook_retries', WEBHOOK_RETRIES),
+        "timeout": (
+            get_setting('webhook_connect_timeout', WEBHOOK_CONNECT_TIMEOUT),
+            get_setting('webhook_read_timeout', WEBHOOK_READ_TIMEOUT)
+        ),
+    }
+    coalesce = kind in COALESCED_MUTATIONS
+    return outbox.enqueue(
+        kind,
+        st.session_state.secrets['n8n'][webhook],
+        payload,
+        item_id,
+        idempotent,
+        coalesce=coalesce,
+        delay=get_setting('status_debounce', STATUS_DEBOUNCE) if coalesce else 0
+    )
+
+# ===========================
+# API FUNCTIONS
+# ===========================
+def add_menu_item(item_data):
+    """Queue a new menu item for the add-item webhook."""
+    try:
+        outbox_id = queue_mutation('add', item_data)
+        patch_menu_items('add', item_data, outbox_id)
+        return True, "Item added! ⏳ Syncing with n8n..."
+    except sqlite3.Error as e:
+        return False, f"Error adding item: {str(e)}"
+
+def add_menu_items(items):
+    """Queue several new menu items.
+    
+    They go out as one bulk webhook call when `n8n.bulk_add_item_webhook` is
+    configured, otherwise as one add-item call each. Batched items carry their
+    own ``idempotency_key`` so n8n can skip the ones a retried batch already added.
+    """
+    try:
+        if st.session_state.secrets['n8n'].get('bulk_add_item_webhook'):
+            batch_id = os.urandom(8).hex()
+            payload = {
+                "batch_id": batch_id,
+                "items": [
+                    {**item_data, "idempotency_key": f"{batch_id}-{position}"}
+                    for position, item_data in enumerate(items)
+                ]
+            }
+            outbox_id = queue_mutation('add_batch', payload)
+            patch_menu_items('add_batch', payload, outbox_id)
+        else:
+            for item_data in items:
+                outbox_id = queue_mutation('add', item_data)
+                patch_menu_items('add', item_data, outbox_id)
+        return True, f"{len(items)} items queued! ⏳ Syncing with n8n..."
+    except sqlite3.Error as e:
+        return False, f"Error adding items: {str(e)}"
+
+def update_item_status(item_id, active, availability="available"):
+    """Queue a menu item status update for the webhook."""
+    try:
+        payload = {
+            "item_id": item_id,
+            "active": active,
+            "availability": availability
+        }
+        queue_mutation('status', payload, item_id)
+        patch_menu_items('status', payload)
+        return True, "Status update queued! ⏳"
+    except sqlite3.Error as e:
+        return False, f"Error updating status: {str(e)}"
+
+def delete_menu_item(item_id):
+    """Queue a menu item deletion for the webhook."""
+    try:
+        queue_mutation('delete', {"item_id": item_id}, item_id)
+        patch_menu_items('delete', {"item_id": item_id})
+        return True, "Deletion queued! ⏳"
+    except sqlite3.Error as e:
+        return False, f"Error deleting item: {str(e)}"
+
+def queue_item_batch(kind, item_ids, fields=None):
+    """Queue one ``kind`` mutation for several items.
+    
+    It goes out as a single ``<kind>_batch`` webhook call when that bulk webhook
+    is configured, otherwise as one call per item. Either way the cached menu
+    is patched once.
+    """
+    fields = fields or {}
+    batch_kind = f"{kind}_batch"
+    payload = {"item_ids": list(item_ids), **fields}
+    outbox_id = None
+    if st.session_state.secrets['n8n'].get(MUTATION_WEBHOOKS[batch_kind][0]):
+        outbox_id = queue_mutation(batch_kind, payload)
+    else:
+        for item_id in item_ids:
+            queue_mutation(kind, {"item_id": item_id, **fields}, item_id)
+    patch_menu_items(batch_kind, payload, outbox_id)
+
+def update_items_status(item_ids, active, availability="available"):
+    """Queue a status update for several menu items."""
+    try:
+        queue_item_batch('status', item_ids, {"active": active, "availability": availability})
+        return True, f"Status update for {len(item_ids)} items queued! ⏳"
+    except sqlite3.Error as e:
+        return False, f"Error updating status: {str(e)}"
+
+def delete_menu_items(item_ids):
+    """Queue the deletion of several menu items."""
+    try:
+        queue_item_batch('delete', item_ids)
+        return True, f"Deletion of {len(item_ids)} items queued! ⏳"
+    except sqlite3.Error as e:
+        return False, f"Error deleting items: {str(e)}"
+
+# Only the columns the cards need; skips large `content` / `embedding` columns
+MENU_COLUMNS = "id, created_at, metadata"
+MENU_FETCH_BATCH = 1000  # PostgREST caps unbounded selects at max-rows (1000 on Supabase)
+
+# Flag values that count as true, in any case and with surrounding whitespace;
+# shared by ``parse_flag`` and the server-side status filter
+FLAG_TRUE_VALUES = ("true", "1", "yes")
+FLAG_TRUE_PATTERN = f"^[[:space:]]*({'|'.join(FLAG_TRUE_VALUES)})[[:space:]]*$"
+
+MENU_PAGE_SIZE = 12  # cards per page, override with tuning.menu_page_size
+MENU_PAGE_SIZE_OPTIONS = [12, 24, 48, 96]
+
+# Sort option -> (order-by column, descending). `metadata->price` keeps the JSON
+# number so Postgres orders numerically instead of as text.
+MENU_SORT_ORDERS = {
+    "Name": ("metadata->>item_name", False),
+    "Price (Low to High)": ("metadata->price", False),
+    "Price (High to Low)": ("metadata->price", True),
+    "Recently Added": ("created_at", True),
+}
+
+
+def build_menu_query(supabase, columns=MENU_COLUMNS, status="All", category="All", sort_by=None, count=None):
+    """Build a `kitchen_data` menu query with filters and ordering applied server-side."""
+    query = supabase.table('kitchen_data').select(columns, count=count).eq('metadata->>type', 'menu')
+    
+    if status == "Active":
+        query = query.filter('metadata->>active', 'imatch', FLAG_TRUE_PATTERN)
+    elif status == "Inactive":
+        # Rows without an `active` flag count as inactive
+        query = query.or_(f'metadata->>active.is.null,metadata->>active.not.imatch."{FLAG_TRUE_PATTERN}"')
+    
+    if category != "All":
+        query = query.eq('metadata->>category', category)
+    
+    if sort_by in MENU_SORT_ORDERS:
+        column, desc = MENU_SORT_ORDERS[sort_by]
+        query = query.order(column, desc=desc)
+    # Tie-breaker so page windows are stable
+    return query.order('id')
+
+
+def iter_batches(make_query, offset=0, batch_size=MENU_FETCH_BATCH, run=None):
+    """Page through a query in `batch_size` windows, yielding each page of rows.
+    
+    Pass ``run`` from ``supabase_runner()`` when calling off the script thread.
+    """
+    run = run or supabase_runner()
+    while True:
+        start = offset
+        response = run(
+            lambda supabase: make_query(supabase).range(start, start + batch_size - 1).execute()
+        )
+        yield response.data
+        if len(response.data) < batch_size:
+            return
+        offset += batch_size
+
+
+def fetch_all_batches(make_query, offset=0, batch_size=MENU_FETCH_BATCH, run=None):
+    """Page through a query in `batch_size` windows and return every row."""
+    return [row for rows in iter_batches(make_query, offset, batch_size, run) for row in rows]
+
+
+# ===========================
+# MENU ITEM MODEL
+# ===========================
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MENU_CATEGORIES = ["breakfast", "lunch", "dinner", "snacks", "drinks", "dessert"]
+SPICE_LEVELS = ["mild", "medium", "hot"]
+
+
+class MenuRowError(ValueError):
+    """A `kitchen_data` menu row that cannot be parsed into a ``MenuItem``."""
+
+
+def parse_flag(value):
+    """Boolean flags may arrive as JSON booleans or as strings."""
+    if isinstance(value, str):
+        return value.strip().lower() in FLAG_TRUE_VALUES
+    return bool(value)
+
+
+def parse_price(value, field="price"):
+    """Price as a float; missing prices count as 0."""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        raise MenuRowError(f"{field} is not a number: {value!r}")
+
+
+@dataclass(frozen=True, slots=True)
+class MenuItem:
+    """One menu row from `kitchen_data`, parsed and validated once at fetch time.
+    
+    ``metadata`` keeps the raw JSON for the details view and for optimistic
+    patches; everything the UI sorts, filters or renders on is normalised here.
+    """
+    id: object
+    name: str
+    price: float
+    basket_price: float | None
+    description: str
+    category: str
+    active: bool
+    popular: bool
+    image_url: str | None
+    created_at: datetime | None
+    ingredients: str
+    allergens: str
+    metadata: dict
+    
+    @classmethod
+    def from_row(cls, row):
+        """Parse a `kitchen_data` row; raises ``MenuRowError`` if it is malformed."""
+        metadata = row.get('metadata')
+        if not isinstance(metadata, dict):
+            raise MenuRowError(f"metadata is {type(metadata).__name__}, expected an object")
+        if row.get('id') is None:
+            raise MenuRowError("row has no id")
+        
+        created_at = None
+        if row.get('created_at'):
+            try:
+                created_at = datetime.fromisoformat(row['created_at'])
+            except (TypeError, ValueError):
+                raise MenuRowError(f"created_at is not a timestamp: {row['created_at']!r}")
+        
+        basket_price = metadata.get('basket_price')
+        return cls(
+            id=row['id'],
+            name=str(metadata.get('item_name') or 'Unnamed Item'),
+            price=parse_price(metadata.get('price')),
+            basket_price=parse_price(basket_price, 'basket_price') if basket_price not in (None, '') else None,
+            description=str(metadata.get('description') or 'No description'),
+            category=str(metadata.get('category') or 'general'),
+            active=parse_flag(metadata.get('active', False)),
+            popular=parse_flag(metadata.get('popular', False)),
+            image_url=metadata.get('main_image_thumbnail_url') or metadata.get('main_image_url'),
+            created_at=created_at,
+            ingredients=str(metadata.get('ingredients') or ''),
+            allergens=str(metadata.get('allergens') or ''),
+            metadata=metadata
+        )
+    
+    @property
+    def provisional(self):
+        """Stand-in for an add the outbox has not sent yet."""
+        return isinstance(self.id, str) and self.id.startswith('pending-')
+
+
+def format_price(value):
+    """Render a price without trailing zeros, e.g. 250 or 99.5."""
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+def parse_menu_rows(rows):
+    """Parse rows into ``{id: MenuItem}``, collecting ``{id: error}`` for malformed rows."""
+    items, problems = {}, {}
+    for row in rows:
+        try:
+            items[row['id']] = MenuItem.from_row(row)
+        except MenuRowError as e:
+            problems[row.get('id')] = str(e)
+    return items, problems
+
+# ===========================
+# MENU SYNC
+# ===========================
+MENU_SYNC_CURSOR = "updated_at"  # change-tracking column, override with tuning.menu_sync_cursor
+MENU_FULL_SYNC_INTERVAL = 300  # seconds between full reconciliations, override with tuning.menu_full_sync_interval
+MENU_SYNC_OVERLAP = 2  # seconds re-read behind the watermark for late commits
+
+
+class MenuSyncState:
+    """Server-side copy of the menu kept between loads for incremental sync.
+    
+    ``rows`` holds the last known server rows by id and ``watermark`` the
+    highest cursor value seen. A delta sync fetches only rows whose cursor is at
+    or after the watermark and merges them; rows flagged ``metadata.deleted``
+    act as tombstones. A delta sync cannot see hard deletes, so items the outbox
+    deletes are dropped once it delivers them (``forget_sent``); deletes made
+    elsewhere are picked up by the periodic full sync.
+    
+    After every sync that changed something the rows are written to a gzipped
+    JSON snapshot. A new process starts from that snapshot (``live`` is False
+    until its first successful sync) so the menu renders without waiting on
+    Supabase, and the same rows keep being served while Supabase is unreachable.
+    """
+    
+    def __init__(self, snapshot_path=None):
+        self.lock = threading.Lock()
+        # Guards the `refreshing` check-and-set only; `lock` is held for a whole sync
+        self.refresh_lock = threading.Lock()
+        self.snapshot_path = snapshot_path
+        self.rows = {}
+        self.items = {}
+        self.problems = {}
+        self.watermark = None
+        self.cursor_supported = True
+        self.synced_at = None
+        self.full_synced_at = 0.0
+        self.live = False
+        self.refreshing = False
+        self.last_error = None
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.rows_fetched = 0
+        self.load_snapshot()
+    
+    def advance(self, rows, cursor):
+        """Move the watermark to the newest cursor value in ``rows``."""
+        values = [datetime.fromisoformat(row[cursor]) for row in rows if row.get(cursor)]
+        if self.watermark is not None:
+            values.append(datetime.fromisoformat(self.watermark))
+        if values:
+            self.watermark = max(values).isoformat()
+    
+    def replace_rows(self, rows):
+        """Replace the held rows, parsing each one into a ``MenuItem``."""
+        self.rows = {row['id']: row for row in rows}
+        self.items, self.problems = parse_menu_rows(rows)
+    
+    def merge_rows(self, rows):
+        """Merge changed rows by id, parsing only those; returns whether anything changed."""
+        changed = False
+        for row in rows:
+            row_id = row['id']
+            metadata = row.get('metadata')
+            if isinstance(metadata, dict) and metadata.get('deleted'):
+                changed = self.rows.pop(row_id, None) is not None or changed
+                self.items.pop(row_id, None)
+                self.problems.pop(row_id, None)
+            elif self.rows.get(row_id) != row:
+                self.rows[row_id] = row
+                self.items.pop(row_id, None)
+                self.problems.pop(row_id, None)
+                try:
+                    self.items[row_id] = MenuItem.from_row(row)
+                except MenuRowError as e:
+                    self.problems[row_id] = str(e)
+                changed = True
+        return changed
+    
+    def forget_sent(self, kind, payload):
+        """Drop the items of a delivered ``delete``/``delete_batch`` mutation; other kinds are ignored."""
+        if kind == 'delete':
+            item_ids = [payload['item_id']]
+        elif kind == 'delete_batch':
+            item_ids = payload['item_ids']
+        else:
+            return
+        with self.lock:
+            changed = False
+            for item_id in item_ids:
+                changed = self.rows.pop(item_id, None) is not None or changed
+                self.items.pop(item_id, None)
+                self.problems.pop(item_id, None)
+            if changed:
+                try:
+                    self.save_snapshot()
+                except OSError:
+                    pass
+    
+    def load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with gzip.open(self.snapshot_path, 'rt', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self.replace_rows(snapshot['rows'])
+            self.watermark = snapshot.get('watermark')
+            self.synced_at = snapshot.get('synced_at')
+        except (OSError, ValueError, KeyError):
+            # A corrupt snapshot only costs us the fast start
+            self.replace_rows([])
+    
+    def save_snapshot(self):
+        """Atomically replace the snapshot with the current rows."""
+        if not self.snapshot_path:
+            return
+        tmp_path = f"{self.snapshot_path}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+            json.dump(
+                {"synced_at": self.synced_at, "watermark": self.watermark, "rows": list(self.rows.values())},
+                f,
+                separators=(',', ':')
+            )
+        os.replace(tmp_path, self.snapshot_path)
+    
+    def stats(self):
+        return {
+            "rows": len(self.rows),
+            "malformed_rows": len(self.problems),
+            "watermark": self.watermark,
+            "cursor_supported": self.cursor_supported,
+            "live": self.live,
+            "synced_at": self.synced_at,
+            "last_error": self.last_error,
+            "full_syncs": self.full_syncs,
+            "delta_syncs": self.delta_syncs,
+            "rows_fetched": self.rows_fetched,
+        }
+
+
+@st.cache_resource
+def get_menu_sync_state():
+    """Get the process-wide menu sync state, warm-started from the local snapshot."""
+    return MenuSyncState(os.path.join(get_data_dir(), "menu_snapshot.json.gz"))
+
+
+def sync_menu_rows(full=False, state=None, run=None, cursor=None, interval=None, metrics=None):
+    """Bring the server-side menu copy up to date and return its ``MenuItem``s.
+    
+    Runs a full load on a process's first sync, when ``full`` is set, when the
+    full sync interval has passed, or when the table has no usable cursor
+    column; otherwise only rows changed since the watermark are fetched.
+    Settings default to the current session's; pass them explicitly when
+    calling off the script thread.
+    """
+    state = state or get_menu_sync_state()
+    run = run or supabase_runner()
+    cursor = cursor or get_setting('menu_sync_cursor', MENU_SYNC_CURSOR)
+    interval = interval or get_setting('menu_full_sync_interval', MENU_FULL_SYNC_INTERVAL)
+    metrics = metrics or get_metrics()
+    
+    with state.lock:
+        if full or not state.live or not state.cursor_supported or state.watermark is None \
+                or time.time() - state.full_synced_at > interval:
+            with metrics.span('menu_sync_full'):
+                try:
+                    columns = MENU_COLUMNS if cursor in MENU_COLUMNS else f"{MENU_COLUMNS}, {cursor}"
+                    rows = fetch_all_batches(lambda supabase: build_menu_query(supabase, columns=columns), run=run)
+                except APIError as e:
+                    if e.code != "42703":  # undefined column
+                        raise
+                    # No cursor column on this table: fall back to full loads only
+                    state.cursor_supported = False
+                    rows = fetch_all_batches(lambda supabase: build_menu_query(supabase), run=run)
+            
+            state.replace_rows(rows)
+            state.watermark = None
+            state.advance(rows, cursor)
+            state.full_synced_at = time.time()
+            state.full_syncs += 1
+            changed = True
+        else:
+            # Re-read a little behind the watermark; merging by id makes overlap harmless
+            since = (datetime.fromisoformat(state.watermark) - timedelta(seconds=MENU_SYNC_OVERLAP)).isoformat()
+            with metrics.span('menu_sync_delta'):
+                rows = fetch_all_batches(
+                    lambda supabase: build_menu_query(supabase, columns=f"{MENU_COLUMNS}, {cursor}").gte(cursor, since),
+                    run=run
+                )
+            
+            changed = state.merge_rows(rows)
+            state.advance(rows, cursor)
+            state.delta_syncs += 1
+        
+        state.rows_fetched += len(rows)
+        metrics.count('menu_rows_fetched', len(rows))
+        state.synced_at = time.time()
+        state.live = True
+        state.last_error = None
+        if changed:
+            try:
+                state.save_snapshot()
+            except OSError:
+                pass
+        return list(state.items.values())
+
+
+def start_background_sync(state):
+    """Run a full sync on a worker thread, then drop the cached (stale) menu.
+    
+    At most one background sync runs per process, however many sessions ask.
+    """
+    with state.refresh_lock:
+        if state.refreshing:
+            return
+        state.refreshing = True
+    run = supabase_runner()
+    cursor = get_setting('menu_sync_cursor', MENU_SYNC_CURSOR)
+    interval = get_setting('menu_full_sync_interval', MENU_FULL_SYNC_INTERVAL)
+    cache = get_menu_cache()
+    metrics = get_metrics()
+    
+    def refresh():
+        try:
+            sync_menu_rows(full=True, state=state, run=run, cursor=cursor, interval=interval, metrics=metrics)
+            cache.invalidate()
+        except Exception as e:
+            state.last_error = str(e)
+        finally:
+            state.refreshing = False
+    
+    threading.Thread(target=refresh, name="menu-sync", daemon=True).start()
+
+# ===========================
+# MENU LOADING
+# ===========================
+def fetch_menu_items(force_refresh=False):
+    """Fetch all menu items as ``MenuItem``s, served from the shared menu cache.
+    
+    The cached list is the menu state every session renders from. Queued
+    mutations patch it in place (see ``apply_mutation``). Each reload syncs the
+    changes since the last load from Supabase (a full reconciliation when
+    ``force_refresh`` is set) and re-applies mutations the outbox has not sent
+    yet. When Supabase is slow to start or unreachable the last snapshot is
+    served instead; see ``render_freshness``.
+    """
+    def load():
+        state = get_menu_sync_state()
+        if state.rows and (state.refreshing or not state.live):
+            # Cold start or a sync already running: serve the snapshot now
+            start_background_sync(state)
+            items = list(state.items.values())
+        else:
+            try:
+                items = sync_menu_rows(full=force_refresh, state=state)
+            except Exception as e:
+                state.last_error = str(e)
+                if not state.rows:
+                    raise
+                # Degraded mode: keep serving the last good menu
+                items = list(state.items.values())
+        
+        for mutation in get_outbox().rows('pending'):
+            items = apply_mutation(items, mutation['kind'], json.loads(mutation['payload']), mutation['id'])
+        return items
+    
+    try:
+        with get_metrics().span('fetch_menu_items'):
+            return get_menu_cache().get_or_load(
+                'menu',
+                get_setting('menu_cache_ttl', MENU_CACHE_TTL),
+                load,
+                bypass=force_refresh
+            )
+    except Exception as e:
+        st.error(f"Error fetching menu items: {str(e)}")
+        return []
+
+
+def provisional_menu_row(item_data, outbox_id, position=None):
+    """Stand-in row for an item the outbox has not added yet."""
+    metadata = {key: value for key, value in item_data.items() if value is not None}
+    metadata.update(type='menu', item_name=item_data.get('name'), active=True)
+    return {
+        'id': f"pending-{outbox_id}" if position is None else f"pending-{outbox_id}-{position}",
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'metadata': metadata
+    }
+
+
+def apply_mutation(items, kind, payload, outbox_id=None):
+    """Return ``items`` with one queued mutation applied; ``items`` is not modified.
+    
+    Applying the same mutation twice is harmless: an add whose provisional items
+    are already present is skipped. A load can pick up an outbox row before the
+    same add is patched in.
+    """
+    if kind in ('status', 'status_batch', 'delete', 'delete_batch'):
+        item_ids = set(payload['item_ids']) if kind.endswith('_batch') else {payload['item_id']}
+    if kind in ('status', 'status_batch'):
+        return [
+            replace(
+                item,
+                active=payload['active'],
+                metadata={**item.metadata, 'active': payload['active'], 'availability': payload['availability']}
+            )
+            if item.id in item_ids else item
+            for item in items
+        ]
+    if kind in ('delete', 'delete_batch'):
+        return [item for item in items if item.id not in item_ids]
+    if kind in ('add', 'add_batch'):
+        added = provisional_items(kind, payload, outbox_id)
+        present = {item.id for item in items if item.provisional}
+        added = [item for item in added if item.id not in present]
+        return items + added if added else items
+    return items
+
+
+def provisional_items(kind, payload, outbox_id):
+    """Stand-in ``MenuItem``s for a queued ``add`` or ``add_batch``."""
+    if kind == 'add':
+        return [MenuItem.from_row(provisional_menu_row(payload, outbox_id))]
+    return [
+        MenuItem.from_row(provisional_menu_row(item_data, outbox_id, position))
+        for position, item_data in enumerate(payload['items'])
+    ]
+
+
+def patch_menu_items(kind, payload, outbox_id=None):
+    """Optimistically apply a queued mutation to the cached menu and card pages for every session."""
+    cache = get_menu_cache()
+    cache.patch('menu', lambda items: apply_mutation(items, kind, payload, outbox_id))
+    cache.patch_matching(
+        lambda key: isinstance(key, tuple) and key[0] == 'page',
+        lambda page: apply_page_mutation(page, kind, payload, outbox_id)
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class MenuPage:
+    """One filtered, sorted window of the card list.
+    
+    ``held`` pages were cut from the held menu because the database could not
+    serve them; see ``fetch_menu_page``.
+    """
+    status: str
+    category: str
+    offset: int
+    items: list
+    total: int
+    held: bool = False
+    # Outbox ids of the queued adds already applied
+    added: frozenset = frozenset()
+
+
+def item_in_view(item, status="All", category="All"):
+    """Whether ``item`` passes the status and category filters."""
+    if status != "All" and item.active != (status == "Active"):
+        return False
+    return category == "All" or item.category == category
+
+
+def apply_page_mutation(page, kind, payload, outbox_id=None):
+    """Return ``page`` with one queued mutation applied; ``page`` is not modified.
+    
+    Items that stop matching the page's filters drop out. Queued adds that match
+    are counted on every page and shown at the top of the first one. Counts on
+    other pages catch up on their next load. Like ``apply_mutation``, an add is
+    applied at most once.
+    """
+    if kind in ('add', 'add_batch'):
+        if outbox_id in page.added:
+            return page
+        added = [item for item in provisional_items(kind, payload, outbox_id)
+                 if item_in_view(item, page.status, page.category)]
+        items = added + page.items if page.offset == 0 else page.items
+        return replace(page, items=items, total=page.total + len(added), added=page.added | {outbox_id})
+    items = [item for item in apply_mutation(page.items, kind, payload, outbox_id)
+             if item_in_view(item, page.status, page.category)]
+    return replace(page, items=items, total=page.total - (len(page.items) - len(items)))
+
+
+def held_menu_page(index, status="All", category="All", sort_by="Name", offset=0, limit=MENU_PAGE_SIZE):
+    """Cut one window of menu cards from the held menu's ``MenuIndex``."""
+    items = index.query(status, category, sort_by)
+    return MenuPage(status, category, offset, items[offset:offset + limit], len(items), held=True)
+
+
+def fetch_menu_page(index, status="All", category="All", sort_by="Name", offset=0, limit=MENU_PAGE_SIZE,
+                    force_refresh=False):
+    """Fetch one filtered, sorted window of menu cards as a ``MenuPage``.
+    
+    Filters, ordering and the window run in the database, so payload and query
+    time scale with the page size rather than the table. Pages are cached per
+    window and patched in place by queued mutations; unsent mutations are
+    re-applied on every load, as in ``fetch_menu_items``.
+    
+    While the menu is served from the snapshot (a cold start, or Supabase
+    unreachable), or when the page query fails, the window is cut from
+    ``index``, the ``MenuIndex`` of the held menu, so the cards match the stats.
+    """
+    state = get_menu_sync_state()
+    if not state.live or state.last_error:
+        return held_menu_page(index, status, category, sort_by, offset, limit)
+    
+    def load():
+        response = run_supabase(
+            lambda supabase: build_menu_query(
+                supabase, status=status, category=category, sort_by=sort_by, count='exact'
+            ).range(offset, offset + limit - 1).execute()
+        )
+        # Malformed rows are reported from the menu sync; here they are just skipped
+        items, _ = parse_menu_rows(response.data)
+        page = MenuPage(status, category, offset, list(items.values()), response.count or 0)
+        for mutation in get_outbox().rows('pending'):
+            page = apply_page_mutation(page, mutation['kind'], json.loads(mutation['payload']), mutation['id'])
+        return page
+    
+    try:
+        with get_metrics().span('fetch_menu_page'):
+            return get_menu_cache().get_or_load(
+                ('page', status, category, sort_by, offset, limit),
+                get_setting('menu_cache_ttl', MENU_CACHE_TTL),
+                load,
+                bypass=force_refresh
+            )
+    except Exception:
+        # The held menu is still good; serve this view from it
+        return held_menu_page(index, status, category, sort_by, offset, limit)
+
+
+def fetch_menu_ids(status="All", category="All"):
+    """Ids of every menu item matching the filters, fetched as an id-only projection."""
+    rows = fetch_all_batches(lambda supabase: build_menu_query(supabase, columns="id", status=status, category=category))
+    return [row['id'] for row in rows]
+
+# ===========================
+# MENU INDEX
+# ===========================
+class MenuIndex:
+    """Filter, sort and stats structures for one version of the menu.
+    
+    Built once per cached menu list (see ``get_menu_index``) so reruns do not
+    rescan the items. Status and category filters are posting sets of item
+    positions, used to narrow search hits. The card list is normally paged by
+    the database; when it can't be, ``query`` serves it from presorted position
+    lists, which are built on first use and memoised per view.
+    """
+    
+    def __init__(self, items):
+        self.items = items
+        self.by_status = {"Active": set(), "Inactive": set()}
+        self.by_category = {}
+        
+        self.positions = {}
+        for pos, item in enumerate(items):
+            self.positions[item.id] = pos
+            self.by_status["Active" if item.active else "Inactive"].add(pos)
+            self.by_category.setdefault(item.category, set()).add(pos)
+        
+        self.categories = sorted(self.by_category)
+        self.stats = {
+            "total": len(items),
+            "active": len(self.by_status["Active"]),
+            "popular": sum(item.popular for item in items),
+            "avg_price": sum(item.price for item in items) / len(items) if items else 0,
+        }
+        self._orders = None
+        self._views = {}
+    
+    @property
+    def orders(self):
+        """Sort option -> presorted item positions."""
+        if self._orders is None:
+            items = self.items
+            positions = range(len(items))
+            by_price = sorted(positions, key=lambda pos: items[pos].price)
+            self._orders = {
+                "Name": sorted(positions, key=lambda pos: items[pos].name),
+                "Price (Low to High)": by_price,
+                "Price (High to Low)": by_price[::-1],
+                "Recently Added": sorted(positions, key=lambda pos: items[pos].created_at or EPOCH, reverse=True),
+            }
+        return self._orders
+    
+    def query(self, status="All", category="All", sort_by="Name"):
+        """Items matching the filters, in ``sort_by`` order."""
+        key = (status, category, sort_by)
+        if key not in self._views:
+            postings = []
+            if status != "All":
+                postings.append(self.by_status.get(status, set()))
+            if category != "All":
+                postings.append(self.by_category.get(category, set()))
+            
+            order = self.orders.get(sort_by, self.orders["Name"])
+            if not postings:
+                positions = order
+            else:
+                matches = set.intersection(*postings) if len(postings) > 1 else postings[0]
+                positions = [pos for pos in order if pos in matches]
+            self._views[key] = [self.items[pos] for pos in positions]
+        return self._views[key]
+    
+    def filter_ids(self, item_ids, status="All", category="All"):
+        """Items for ``item_ids`` (e.g. ranked search hits) that pass the filters, in the given order."""
+        allowed = [self.by_status.get(status, set()) if status != "All" else None,
+                   self.by_category.get(category, set()) if category != "All" else None]
+        items = []
+        for item_id in item_ids:
+            pos = self.positions.get(item_id)
+            if pos is not None and all(posting is None or pos in posting for posting in allowed):
+                items.append(self.items[pos])
+        return items
+
+
+@st.cache_resource
+def get_menu_index_memo():
+    """Process-wide slot holding the index of the latest menu list."""
+    return {"lock": threading.Lock(), "items": None, "index": None}
+
+
+def get_menu_index(items):
+    """Return the ``MenuIndex`` for ``items``, building it once per menu version.
+    
+    Every load or patch of the cached menu produces a new list object, so list
+    identity is the data version.
+    """
+    memo = get_menu_index_memo()
+    with memo["lock"]:
+        if memo["items"] is not items:
+            memo["index"] = MenuIndex(items)
+            memo["items"] = items
+        return memo["index"]
+
+# ===========================
+# MENU SEARCH
+# ===========================
+# Field -> ranking weight
+SEARCH_FIELDS = {"name": 3.0, "ingredients": 1.5, "allergens": 1.0, "description": 1.0}
+SEARCH_PREFIX_FACTOR = 0.7
+SEARCH_FUZZY_FACTOR = 0.4
+SEARCH_FUZZY_MIN_LENGTH = 4  # shorter query words must match exactly or by prefix
+SEARCH_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return SEARCH_TOKEN.findall(text.lower())
+
+
+def deletion_variants(term):
+    """``term`` with each single character removed (symmetric-delete fuzzy matching)."""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class SearchIndex:
+    """Inverted index over menu item names, descriptions, ingredients and allergens.
+    
+    ``postings`` maps each term to ``{item_id: weight}``. A sorted vocabulary
+    serves prefix matches, and a map from single-deletion variants back to terms
+    finds words within one edit of a query word. ``sync`` reindexes only items
+    whose ``MenuItem`` changed since the last call, so a new menu version costs
+    one identity pass plus the changed rows.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.docs = {}
+        self.postings = {}
+        self.vocabulary = []
+        self.variants = {}
+    
+    def _add_term(self, term):
+        bisect.insort(self.vocabulary, term)
+        for variant in deletion_variants(term):
+            self.variants.setdefault(variant, set()).add(term)
+    
+    def _drop_term(self, term):
+        del self.postings[term]
+        self.vocabulary.pop(bisect.bisect_left(self.vocabulary, term))
+        for variant in deletion_variants(term):
+            terms = self.variants.get(variant)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self.variants[variant]
+    
+    def add(self, item):
+        weights = {}
+        for field, weight in SEARCH_FIELDS.items():
+            for term in tokenize(getattr(item, field)):
+                weights[term] = max(weights.get(term, 0.0), weight)
+        for term, weight in weights.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                self._add_term(term)
+            self.postings[term][item.id] = weight
+        self.docs[item.id] = (item, tuple(weights))
+    
+    def remove(self, item_id):
+        _, terms = self.docs.pop(item_id)
+        for term in terms:
+            posting = self.postings[term]
+            posting.pop(item_id, None)
+            if not posting:
+                self._drop_term(term)
+    
+    def sync(self, items):
+        """Bring the index in line with ``items``, touching only what changed."""
+        with self.lock:
+            current = {item.id: item for item in items}
+            for item_id in [item_id for item_id in self.docs if item_id not in current]:
+                self.remove(item_id)
+            for item_id, item in current.items():
+                indexed = self.docs.get(item_id)
+                if indexed is not None and indexed[0] is item:
+                    continue
+                if indexed is not None:
+                    self.remove(item_id)
+                self.add(item)
+    
+    def _matches(self, word):
+        """Indexed terms for one query word, with their match factor."""
+        matches = {}
+        if word in self.postings:
+            matches[word] = 1.0
+        start = bisect.bisect_left(self.vocabulary, word)
+        for term in itertools.takewhile(lambda t: t.startswith(word), self.vocabulary[start:start + 200]):
+            matches.setdefault(term, SEARCH_PREFIX_FACTOR)
+        if len(word) >= SEARCH_FUZZY_MIN_LENGTH:
+            # Missing letter: the word is a deletion variant of the term
+            fuzzy = set(self.variants.get(word, ()))
+            for variant in deletion_variants(word):
+                # Extra letter: the variant is the term itself
+                if variant in self.postings:
+                    fuzzy.add(variant)
+                # Wrong letter: both share a deletion variant
+                fuzzy.update(self.variants.get(variant, ()))
+            for term in fuzzy:
+                matches.setdefault(term, SEARCH_FUZZY_FACTOR)
+        return matches
+    
+    def search(self, query, limit=None):
+        """Item ids matching every query word, best first."""
+        words = tokenize(query)
+        if not words:
+            return []
+        with self.lock:
+            scores = None
+            for word in words:
+                word_scores = {}
+                for term, factor in self._matches(word).items():
+                    for item_id, weight in self.postings[term].items():
+                        score = weight * factor
+                        if score > word_scores.get(item_id, 0.0):
+                            word_scores[item_id] = score
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {item_id: scores[item_id] + score for item_id, score in word_scores.items() if item_id in scores}
+                if not scores:
+                    return []
+            ranked = sorted(scores, key=lambda item_id: (-scores[item_id], self.docs[item_id][0].name))
+        return ranked[:limit] if limit else ranked
+
+
+@st.cache_resource
+def get_search_index():
+    """Get the process-wide menu search index."""
+    return SearchIndex()
+
+
+def search_menu(items, query):
+    """Ranked ids of ``items`` matching ``query``, syncing the index first."""
+    index = get_search_index()
+    index.sync(items)
+    return index.search(query)
+
+# ===========================
+# KNOWLEDGE BASE INGESTION
+# ===========================
+KNOWLEDGE_TYPE = "knowledge"  # metadata.type of document chunks, override with tuning.knowledge_type
+KNOWLEDGE_BUCKET = "kitchen-documents"  # override with tuning.knowledge_bucket
+KNOWLEDGE_CHUNK_SIZE = 1000  # characters, override with tuning.knowledge_chunk_size
+KNOWLEDGE_CHUNK_OVERLAP = 200  # characters, override with tuning.knowledge_chunk_overlap
+KNOWLEDGE_INSERT_BATCH = 100  # rows per insert, override with tuning.knowledge_insert_batch
+EMBEDDING_DIMENSIONS = 1536  # must match the `embedding` column, override with tuning.embedding_dimensions
+
+
+def chunk_text(pages, size=KNOWLEDGE_CHUNK_SIZE, overlap=KNOWLEDGE_CHUNK_OVERLAP):
+    """Split streamed page text into overlapping chunks of at most ``size`` characters.
+    
+    ``pages`` yields ``(page_number, text)`` and chunks come out as
+    ``(page_number, text)`` for the page each chunk starts on, so only the
+    current page and the unfinished chunk are held in memory. Whitespace is
+    collapsed and chunks break between words where possible.
+    """
+    if not 0 <= overlap < size:
+        raise ValueError("Chunk overlap must be smaller than the chunk size")
+    buffer = ""
+    page_starts = []  # (offset in buffer, page number)
+    carried = 0  # length of the overlap carried over from the previous chunk
+    
+    def page_at(offset):
+        return [page for start, page in page_starts if start <= offset][-1]
+    
+    for page_number, text in pages:
+        text = " ".join(text.split())
+        if not text:
+            continue
+        if buffer:
+            buffer += " "
+        page_starts.append((len(buffer), page_number))
+        buffer += text
+        
+        while len(buffer) >= size:
+            end = buffer.rfind(" ", size // 2, size + 1)
+            if end <= 0:
+                end = size
+            yield page_at(0), buffer[:end].strip()
+            
+            # Start the next chunk up to `overlap` characters back, on a word boundary
+            start = end - min(overlap, end // 2)
+            space = buffer.find(" ", start, end)
+            start = space + 1 if space != -1 else start
+            while start < len(buffer) and buffer[start] == " ":
+                start += 1
+            page_starts = [(0, page_at(start))] + [(offset - start, page) for offset, page in page_starts if offset > start]
+            buffer = buffer[start:]
+            carried = max(end - start, 0)
+    
+    if buffer.strip() and len(buffer) > carried:
+        yield page_at(0), buffer.strip()
+
+
+def hashing_embedder(texts, dimensions=EMBEDDING_DIMENSIONS):
+    """Offline bag-of-words embeddings via feature hashing, L2-normalised.
+    
+    Deterministic and dependency-free, so ingestion can be tested without a
+    model or network; swap in a real model through ``EMBEDDERS``.
+    """
+    vectors = []
+    for text in texts:
+        weights = collections.Counter()
+        for token in tokenize(text):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            weights[int.from_bytes(digest[:4], 'little') % dimensions] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in weights.values())) or 1.0
+        vector = [0.0] * dimensions
+        for position, value in weights.items():
+            vector[position] = round(value / norm, 6)
+        vectors.append(vector)
+    return vectors
+
+
+# Embedder name -> callable(texts, dimensions) returning one vector per text, selected
+# with tuning.knowledge_embedder. "none" leaves `embedding` empty for n8n to fill in.
+EMBEDDERS = {
+    "none": None,
+    "hashing": hashing_embedder,
+}
+
+
+def pdf_pages(reader, on_page=None):
+    """Yield ``(page_number, text)`` one page at a time, reporting progress to ``on_page``."""
+    total = len(reader.pages)
+    for number, page in enumerate(reader.pages, start=1):
+        yield number, page.extract_text() or ""
+        if on_page:
+            on_page(number, total)
+
+
+def ingest_pdf(run, file, source_name, document_url=None, settings=None, on_page=None, metrics=None):
+    """Stream a PDF into ``kitchen_data`` as knowledge chunks; returns ``(chunks, pages)``.
+    
+    Chunks are embedded and inserted ``knowledge_insert_batch`` rows at a time.
+    Chunks from an earlier ingest of the same document are removed only after
+    the new set is fully inserted; if the ingest fails, its own partial chunks
+    are removed instead. ``file`` is any binary file object and
+    ``run`` comes from ``supabase_runner()``.
+    """
+    settings = settings or {}
+    metrics = metrics or Metrics()
+    size = int(settings.get('knowledge_chunk_size', KNOWLEDGE_CHUNK_SIZE))
+    overlap = int(settings.get('knowledge_chunk_overlap', KNOWLEDGE_CHUNK_OVERLAP))
+    batch_size = int(settings.get('knowledge_insert_batch', KNOWLEDGE_INSERT_BATCH))
+    dimensions = int(settings.get('embedding_dimensions', EMBEDDING_DIMENSIONS))
+    embedder_name = settings.get('knowledge_embedder', 'none')
+    if embedder_name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder: {embedder_name}")
+    embedder = EMBEDDERS[embedder_name]
+    
+    file.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(1 << 20), b""):
+        digest.update(block)
+    document_id = digest.hexdigest()
+    file.seek(0)
+    ingest_id = os.urandom(8).hex()
+    reader = PdfReader(file)
+    
+    def insert(batch):
+        if embedder:
+            for row, vector in zip(batch, embedder([row['content'] for row in batch], dimensions)):
+                row['embedding'] = vector
+        run(lambda supabase: supabase.table('kitchen_data').insert(batch).execute())
+        metrics.count('knowledge_chunks_inserted', len(batch))
+    
+    with metrics.span('ingest_pdf'):
+        try:
+            batch = []
+            chunks = 0
+            for page_number, text in chunk_text(pdf_pages(reader, on_page), size, overlap):
+                batch.append({
+                    "content": text,
+                    "metadata": {
+                        "type": settings.get('knowledge_type', KNOWLEDGE_TYPE),
+                        "source": source_name,
+                        "document_id": document_id,
+                        "document_url": document_url,
+                        "ingest_id": ingest_id,
+                        "page": page_number,
+                        "chunk": chunks,
+                    },
+                })
+                chunks += 1
+                if len(batch) >= batch_size:
+                    insert(batch)
+                    batch = []
+            if batch:
+                insert(batch)
+        except BaseException:
+            # Drop this ingest's partial chunks so the document is never half-indexed;
+            # stopping the script mid-ingest lands here too
+            try:
+                run(lambda supabase: supabase.table('kitchen_data').delete()
+                    .eq('metadata->>ingest_id', ingest_id)
+                    .execute())
+            except Exception:
+                pass  # leftovers go once a later ingest of the document succeeds
+            raise
+        
+        # Replace chunks left by an earlier ingest of the same file
+        run(lambda supabase: supabase.table('kitchen_data').delete()
+            .eq('metadata->>document_id', document_id)
+            .neq('metadata->>ingest_id', ingest_id)
+            .execute())
+    
+    return chunks, len(reader.pages)
+
+# ===========================
+# MENU IMPORT
+# ===========================
+IMPORT_BATCH_SIZE = 25  # items per upload/queue batch, override with tuning.import_batch_size
+IMPORT_MAX_IMAGE_BYTES = 20 * 1024 * 1024  # per archive entry, guards against zip bombs
+IMPORT_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+IMPORT_COLUMNS = [
+    "name", "price", "basket_price", "description", "ingredients", "category", "spice_level",
+    "allergens", "main_image", "other_images", "portion_size", "preparation_time", "popular", "seasonal"
+]
+# Alternative column name -> import column
+IMPORT_ALIASES = {
+    "item_name": "name",
+    "image": "main_image",
+    "main_image_url": "main_image",
+    "other_image_urls": "other_images",
+}
+
 
-def upload_file_to_supabase(file: UploadedFile, bucket_name: str = "kitchen-images") -> str | None:
-    """Uploads a Streamlit file object to Supabase Storage and returns the public URL."""
+class ImportedFile:
+    """An image read from the import archive, shaped like an ``UploadedFile``."""
+    __slots__ = ('name', 'type', 'data')
+    
+    def __init__(self, name, data):
+        self.name = name
+        self.type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        self.data = data
+    
+    def getvalue(self):
+        return self.data
+
+
+def read_import_rows(file_name, data):
+    """Parse CSV, JSON or JSON Lines import data into a list of rows.
+    
+    JSON may be a list of items or ``{"items": [...]}``. Raises ``ValueError``
+    or ``csv.Error`` for unreadable files.
+    """
+    text = data.decode('utf-8-sig')
+    lower_name = file_name.lower()
+    if lower_name.endswith('.csv'):
+        return list(csv.DictReader(io.StringIO(text, newline='')))
+    if lower_name.endswith(('.jsonl', '.ndjson')):
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    rows = json.loads(text)
+    if isinstance(rows, dict):
+        rows = rows.get('items')
+    if not isinstance(rows, list):
+        raise ValueError('expected a list of items or {"items": [...]}')
+    return rows
+
+
+def archive_images(archive):
+    """Image entries of the import zip, keyed by lowercased file name."""
+    return {
+        os.path.basename(info.filename).lower(): info
+        for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith('__MACOSX/')
+        and info.filename.lower().endswith(IMPORT_IMAGE_EXTENSIONS)
+    }
+
+
+def is_image_url(value):
+    return value.startswith(('http://', 'https://'))
+
+
+def normalize_import_row(row, images):
+    """Validate one import row; returns ``(fields, errors)``.
+    
+    ``images`` maps archive file names to zip entries. Image references are
+    either archive file names or http(s) URLs.
+    """
+    if not isinstance(row, dict):
+        return None, ["row is not an object"]
+    row = {
+        IMPORT_ALIASES.get(key, key): value
+        for key, value in (
+            (str(key).strip().lower().replace(' ', '_'), value) for key, value in row.items() if key is not None
+        )
+    }
+    
+    def text(key):
+        value = row.get(key)
+        return str(value).strip() if value is not None else ''
+    
+    errors = []
+    fields = {
+        "name": text('name'),
+        "description": text('description'),
+        "ingredients": text('ingredients') or None,
+        "category": text('category').lower(),
+        "spice_level": text('spice_level').lower() or None,
+        "allergens": text('allergens') or None,
+        "portion_size": text('portion_size') or None,
+        "preparation_time": text('preparation_time') or None,
+        "popular": parse_flag(row.get('popular') or False),
+        "seasonal": parse_flag(row.get('seasonal') or False),
+    }
+    if not fields['name']:
+        errors.append("name is required")
+    if not fields['description']:
+        errors.append("description is required")
+    if fields['category'] not in MENU_CATEGORIES:
+        errors.append(f"category must be one of {', '.join(MENU_CATEGORIES)}")
+    if fields['spice_level'] == 'none':
+        fields['spice_level'] = None
+    if fields['spice_level'] is not None and fields['spice_level'] not in SPICE_LEVELS:
+        errors.append(f"spice_level must be one of {', '.join(SPICE_LEVELS)}")
+    
+    try:
+        fields['price'] = parse_price(text('price'))
+        if fields['price'] <= 0:
+            errors.append("price must be greater than 0")
+    except MenuRowError as e:
+        errors.append(str(e))
     try:
-        supabase = get_supabase_client()
+        basket_price = parse_price(text('basket_price'), 'basket_price')
+        fields['basket_price'] = basket_price if basket_price > 0 else None
+    except MenuRowError as e:
+        errors.append(str(e))
+    
+    other_images = row.get('other_images') or []
+    if isinstance(other_images, str):
+        other_images = other_images.split(';')
+    fields['main_image'] = text('main_image')
+    fields['other_images'] = [str(ref).strip() for ref in other_images if str(ref).strip()]
+    if not fields['main_image']:
+        errors.append("main_image is required")
+    for ref in [fields['main_image']] + fields['other_images']:
+        if not ref or is_image_url(ref):
+            continue
+        info = images.get(os.path.basename(ref).lower())
+        if info is None:
+            errors.append(f"image {ref} is not in the archive")
+        elif info.file_size > IMPORT_MAX_IMAGE_BYTES:
+            errors.append(f"image {ref} is larger than {IMPORT_MAX_IMAGE_BYTES // 2 ** 20} MB")
+    return fields, errors
+
+
+def validate_import(rows, images, existing_names):
+    """Validate every row before anything is uploaded.
+    
+    Returns ``(valid, report)``: ``valid`` is a list of ``(row number, fields)``
+    and ``report`` has one ``{row, name, status, message}`` entry per row.
+    Names must be unique within the file and not already on the menu.
+    """
+    valid, report = [], []
+    seen = set()
+    for number, row in enumerate(rows, start=1):
+        fields, errors = normalize_import_row(row, images)
+        name = fields['name'] if fields else ''
+        key = name.casefold()
+        if key and key in seen:
+            errors.append("duplicate name in this file")
+        elif key and key in existing_names:
+            errors.append("an item with this name is already on the menu")
+        seen.add(key)
+        if errors:
+            report.append({"row": number, "name": name, "status": "❌ invalid", "message": "; ".join(errors)})
+        else:
+            valid.append((number, fields))
+            report.append({"row": number, "name": name, "status": "✅ valid", "message": ""})
+    return valid, report
+
+
+def import_menu_items(valid, archive=None, images=None, batch_size=IMPORT_BATCH_SIZE, on_batch=None):
+    """Upload images and queue adds batch by batch for validated rows.
+    
+    Only one batch of archive images is held in memory at a time. Returns
+    ``{row number: (status, message)}``; ``on_batch(done, total)`` reports
+    progress in rows.
+    """
+    images = images or {}
+    outcome = {}
+    for start in range(0, len(valid), batch_size):
+        batch = valid[start:start + batch_size]
         
-        # Get the raw bytes from the file object
-        file_bytes = file.getvalue()
+        # Each archive image is read and uploaded once per batch
+        files = {}
+        for _, fields in batch:
+            for ref in [fields['main_image']] + fields['other_images']:
+                key = os.path.basename(ref).lower()
+                if not is_image_url(ref) and key not in files:
+                    info = images[key]
+                    files[key] = ImportedFile(os.path.basename(info.filename), archive.read(info))
+        uploaded = dict(zip(files, upload_images_to_supabase(list(files.values()), show_progress=False)))
         
-        # Create a unique file path
-        file_ext = file.name.split('.')[-1]
-        file_path = f"public/{uuid.uuid4()}.{file_ext}"
+        def resolve(ref):
+            if is_image_url(ref):
+                return {"url": ref, "thumbnail_url": None}, None
+            return uploaded[os.path.basename(ref).lower()]
         
-        # Upload the bytes
-        supabase.storage.from_(bucket_name).upload(
-            file=file_bytes,
-            path=file_path,
-            file_options={"content-type": file.type}
-        )
+        items, numbers = [], []
+        for number, fields in batch:
+            main_image, main_error = resolve(fields['main_image'])
+            if not main_image:
+                outcome[number] = ("❌ failed", f"main image upload failed: {main_error}")
+                continue
+            other_images, warnings = [], []
+            for ref in fields['other_images']:
+                image, error = resolve(ref)
+                if image:
+                    other_images.append(image)
+                else:
+                    warnings.append(f"{ref} upload failed: {error}")
+            
+            item_data = {key: value for key, value in fields.items() if key not in ('main_image', 'other_images')}
+            item_data.update(
+                main_image_url=main_image['url'],
+                main_image_thumbnail_url=main_image['thumbnail_url'],
+                other_image_urls=[image['url'] for image in other_images],
+                other_image_thumbnail_urls=[image['thumbnail_url'] for image in other_images]
+            )
+            items.append(item_data)
+            numbers.append((number, "; ".join(warnings)))
         
-        # Return the public URL
-        return supabase.storage.from_(bucket_name).get_public_url(file_path)
-    except Exception as e:
-        st.error(f"Storage Error: {str(e)}")
-        return None
+        if items:
+            success, message = add_menu_items(items)
+            for number, warning in numbers:
+                outcome[number] = ("✅ queued", warning) if success else ("❌ failed", message)
+        if on_batch:
+            on_batch(min(start + batch_size, len(valid)), len(valid))
+    return outcome
+
+
+def rows_to_csv(rows, fieldnames):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def import_template_csv():
+    """Example import file with every supported column."""
+    return rows_to_csv([{
+        "name": "Kacchi Biryani",
+        "price": 350,
+        "basket_price": 1200,
+        "description": "Slow-cooked mutton biryani",
+        "ingredients": "Basmati rice, mutton, potato",
+        "category": "lunch",
+        "spice_level": "medium",
+        "allergens": "Dairy",
+        "main_image": "kacchi.jpg",
+        "other_images": "kacchi-2.jpg;https://example.com/kacchi-3.jpg",
+        "portion_size": "1 person",
+        "preparation_time": "45 minutes",
+        "popular": "yes",
+        "seasonal": "no",
+    }], IMPORT_COLUMNS)
 
 # ===========================
-# API FUNCTIONS
+# EXPORT
 # ===========================
-def add_menu_item(item_data):
-    """Add a new menu item via webhook."""
-    try:
-        response = requests.post(
-            st.session_state.secrets['n8n']['add_item_webhook'],
-            json=item_data,
-            timeout=30
-        )
-        response.raise_for_status()
-        return True, "Item added successfully! ✅"
-    except requests.exceptions.RequestException as e:
-        return False, f"Error adding item: {str(e)}"
+EXPORT_BATCH_SIZE = MENU_FETCH_BATCH  # rows per page, override with tuning.export_batch_size
+# Format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "JSON Lines": ("jsonl", "application/x-ndjson"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+# Exported field -> Arrow type. Fields come from the row itself (`content`) or its metadata.
+EXPORT_MENU_FIELDS = {
+    "item_name": pa.string(),
+    "price": pa.float64(),
+    "basket_price": pa.float64(),
+    "description": pa.string(),
+    "ingredients": pa.string(),
+    "category": pa.string(),
+    "spice_level": pa.string(),
+    "allergens": pa.string(),
+    "active": pa.bool_(),
+    "availability": pa.string(),
+    "popular": pa.bool_(),
+    "seasonal": pa.bool_(),
+    "portion_size": pa.string(),
+    "preparation_time": pa.string(),
+    "main_image_url": pa.string(),
+    "main_image_thumbnail_url": pa.string(),
+    "other_image_urls": pa.list_(pa.string()),
+    "other_image_thumbnail_urls": pa.list_(pa.string()),
+}
+EXPORT_KNOWLEDGE_FIELDS = {
+    "source": pa.string(),
+    "document_id": pa.string(),
+    "document_url": pa.string(),
+    "page": pa.int64(),
+    "chunk": pa.int64(),
+    "content": pa.string(),
+}
 
-def update_item_status(item_id, active, availability="available"):
-    """Update menu item status via webhook."""
-    try:
-        response = requests.post(
-            st.session_state.secrets['n8n']['update_status_webhook'],
-            json={
-                "item_id": item_id,
-                "active": active,
-                "availability": availability
-            },
-            timeout=30
-        )
-        response.raise_for_status()
-        return True, "Status updated successfully! ✅"
-    except requests.exceptions.RequestException as e:
-        return False, f"Error updating status: {str(e)}"
 
-def delete_menu_item(item_id):
-    """Delete menu item via webhook."""
+def export_value(value, field_type):
+    """Coerce a raw JSON value to the field's type; unusable values become None."""
+    if value is None or value == '':
+        return None
+    if pa.types.is_boolean(field_type):
+        return parse_flag(value)
+    if pa.types.is_list(field_type):
+        return [str(part) for part in value] if isinstance(value, list) else [str(value)]
+    if isinstance(value, (dict, list)):
+        return json.dumps(value) if pa.types.is_string(field_type) else None
     try:
-        response = requests.post(
-            st.session_state.secrets['n8n']['delete_item_webhook'],
-            json={"item_id": item_id},
-            timeout=30
-        )
-        response.raise_for_status()
-        return True, "Item deleted successfully! ✅"
-    except requests.exceptions.RequestException as e:
-        return False, f"Error deleting item: {str(e)}"
+        if pa.types.is_floating(field_type):
+            return float(value)
+        if pa.types.is_integer(field_type):
+            return int(value)
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def flatten_export_row(row, fields):
+    metadata = row.get('metadata') if isinstance(row.get('metadata'), dict) else {}
+    flat = {"id": str(row.get('id')), "created_at": row.get('created_at')}
+    for field, field_type in fields.items():
+        flat[field] = export_value(row[field] if field in row else metadata.get(field), field_type)
+    return flat
 
-def fetch_menu_items():
-    """Fetch all menu items from Supabase."""
-    try:
-        supabase = get_supabase_client()
-        response = supabase.table('kitchen_data').select('*').eq('metadata->>type', 'menu').execute()
-        return response.data
-    except Exception as e:
-        st.error(f"Error fetching menu items: {str(e)}")
-        return []
+
+def export_rows(pages, export_format, fields, output, compress=False):
+    """Write pages of `kitchen_data` rows to the binary file ``output`` as they arrive.
+    
+    Only one page is held in memory at a time. CSV and JSON Lines can be
+    gzipped; Parquet writes one compressed row group per page. Returns the
+    number of rows written.
+    """
+    written = 0
+    if export_format == "Parquet":
+        schema = pa.schema([("id", pa.string()), ("created_at", pa.string())] + list(fields.items()))
+        with pq.ParquetWriter(output, schema, compression="zstd") as writer:
+            for rows in pages:
+                if rows:
+                    writer.write_table(pa.Table.from_pylist([flatten_export_row(row, fields) for row in rows], schema=schema))
+                    written += len(rows)
+        return written
+    
+    stream = gzip.GzipFile(fileobj=output, mode='wb') if compress else output
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    writer = None
+    if export_format == "CSV":
+        writer = csv.DictWriter(text, fieldnames=["id", "created_at"] + list(fields))
+        writer.writeheader()
+    for rows in pages:
+        for row in rows:
+            flat = flatten_export_row(row, fields)
+            if writer:
+                # Lists use the same `;` separator as the bulk import
+                writer.writerow({key: ";".join(value) if isinstance(value, list) else value for key, value in flat.items()})
+            else:
+                text.write(json.dumps(flat, ensure_ascii=False) + "\n")
+        written += len(rows)
+    text.flush()
+    text.detach()
+    if compress:
+        stream.close()
+    return written
+
+
+def export_file_name(dataset, export_format, compress=False):
+    extension = EXPORT_FORMATS[export_format][0]
+    suffix = ".gz" if compress and export_format != "Parquet" else ""
+    return f"kitchen_{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}{suffix}"
+
+
+def make_export(make_query, export_format, fields, compress=False, run=None, batch_size=EXPORT_BATCH_SIZE, metrics=None):
+    """Page through ``make_query`` into a temporary file and return it rewound.
+    
+    Rows spill to disk as they are written, so memory stays at one page plus
+    the finished file. Pass ``run`` and ``metrics`` when calling off the
+    script thread.
+    """
+    metrics = metrics or Metrics()
+    # Unbuffered, because download buttons only accept raw or in-memory files
+    output = tempfile.TemporaryFile(buffering=0)
+    buffered = io.BufferedWriter(output)
+    with metrics.span('export'):
+        written = export_rows(
+            iter_batches(make_query, batch_size=batch_size, run=run),
+            export_format,
+            fields,
+            buffered,
+            compress=compress and export_format != "Parquet"
+        )
+    buffered.detach()
+    metrics.count('export_rows', written)
+    output.seek(0)
+    return output
 
 # ===========================
 # UI COMPONENTS
@@ -404,14 +3368,38 @@ def render_header():
     </div>
     """, unsafe_allow_html=True)
 
-def render_stats(items):
-    """Render statistics cards."""
+def render_freshness():
+    """Flag a menu served from the local snapshot instead of a live sync."""
+    state = get_menu_sync_state()
+    if not state.rows or (state.live and not state.last_error):
+        return
+    
+    as_of = datetime.fromtimestamp(state.synced_at).strftime("%b %d, %H:%M:%S") if state.synced_at else "an unknown time"
+    if state.refreshing:
+        detail = "Refreshing in the background..."
+    elif state.last_error:
+        detail = f"Supabase is unreachable ({state.last_error}). Changes will appear once it is back."
+    else:
+        detail = "Click 🔄 Refresh Data to load the latest menu."
+    st.warning(f"🕒 Showing a saved menu, stale as of {as_of}. {detail}")
+
+def render_row_problems():
+    """Report menu rows that were skipped because they could not be parsed."""
+    problems = get_menu_sync_state().problems
+    if not problems:
+        return
+    with st.expander(f"⚠️ {len(problems)} malformed menu row(s) skipped"):
+        for row_id, error in problems.items():
+            st.markdown(f"- Row `{row_id}`: {error}")
+
+def render_stats(stats):
+    """Render statistics cards from ``MenuIndex.stats``."""
     col1, col2, col3, col4 = st.columns(4)
     
-    total_items = len(items)
-    active_items = len([i for i in items if i.get('metadata', {}).get('active', False)])
-    popular_items = len([i for i in items if i.get('metadata', {}).get('popular', False)])
-    avg_price = sum([float(i.get('metadata', {}).get('price', 0)) for i in items]) / total_items if total_items > 0 else 0
+    total_items = stats['total']
+    active_items = stats['active']
+    popular_items = stats['popular']
+    avg_price = stats['avg_price']
     
     with col1:
         st.markdown(f"""
@@ -445,20 +3433,41 @@ def render_stats(items):
         </div>
         """, unsafe_allow_html=True)
 
-def render_menu_card(item):
-    """Render a single menu card."""
-    metadata = item.get('metadata', {})
-    item_id = item.get('id')
+def sync_locked(sync_state):
+    """Whether an item's queued mutation blocks further changes to it.
+    
+    Queued status changes don't: the outbox coalesces follow-up toggles.
+    """
+    return sync_state is not None and sync_state['status'] == 'pending' \
+        and sync_state['kind'] not in ('status', 'status_batch')
+
+def item_locked(item, sync_state):
+    """Whether ``item`` can't be changed yet; provisional items have no server id."""
+    return item.provisional or sync_locked(sync_state)
+
+@st.fragment
+def render_menu_card(item, sync_state=None):
+    """Render a single menu card.
+    
+    Runs as a fragment: view/confirm clicks rerun only this card, while changes
+    to the menu data rerun the whole page so stats and filters stay in step.
+    ``sync_state`` is the item's latest outbox row, if a mutation is still queued.
+    """
+    metadata = item.metadata
+    item_id = item.id
+    # Provisional rows stand in for queued adds and have no server id to act on
+    sync_pending = item.provisional or (sync_state is not None and sync_state['status'] == 'pending')
+    locked = item_locked(item, sync_state)
     
     # Extract data
-    name = metadata.get('item_name', 'Unnamed Item')
-    price = metadata.get('price', 0)
-    basket_price = metadata.get('basket_price')
-    description = metadata.get('description', 'No description')
-    category = metadata.get('category', 'general')
-    active = metadata.get('active', False)
-    popular = metadata.get('popular', False)
-    main_image = metadata.get('main_image_url')
+    name = item.name
+    price = format_price(item.price)
+    basket_price = format_price(item.basket_price) if item.basket_price else None
+    description = item.description
+    category = item.category
+    active = item.active
+    popular = item.popular
+    main_image = item.image_url
     
     # Card container
     with st.container():
@@ -467,7 +3476,7 @@ def render_menu_card(item):
         # Image column
         with col1:
             if main_image:
-                st.image(main_image, use_container_width=True)
+                st.image(get_card_image(main_image), use_container_width=True)
             else:
                 st.markdown("""
                 <div style='background: #f0f0f0; padding: 3rem; text-align: center; border-radius: 10px;'>
@@ -501,6 +3510,20 @@ def render_menu_card(item):
                 badge_html += "<span class='meta-badge badge-popular'>⭐ Popular</span>"
             
             badge_html += f"<span class='meta-badge badge-category'>📂 {category.title()}</span>"
+            
+            if sync_state is not None:
+                action = {
+                    "add": "Addition",
+                    "add_batch": "Addition",
+                    "status": "Status change",
+                    "status_batch": "Status change",
+                    "delete": "Deletion",
+                    "delete_batch": "Deletion",
+                }.get(sync_state['kind'], "Change")
+                if sync_pending:
+                    badge_html += f"<span class='meta-badge badge-popular'>⏳ {action} pending</span>"
+                else:
+                    badge_html += f"<span class='meta-badge badge-inactive' title='{html.escape(sync_state['last_error'] or '')}'>⚠️ {action} failed</span>"
             badge_html += "</div>"
             
             st.markdown(badge_html, unsafe_allow_html=True)
@@ -515,18 +3538,29 @@ def render_menu_card(item):
             with col_btn2:
                 new_status = not active
                 status_label = "🔴 Deactivate" if active else "🟢 Activate"
-                if st.button(status_label, key=f"toggle_{item_id}", use_container_width=True):
+                if st.button(status_label, key=f"toggle_{item_id}", disabled=locked, use_container_width=True):
                     success, message = update_item_status(item_id, new_status)
                     if success:
-                        st.success(message)
+                        st.toast(message)
                         st.rerun()
                     else:
                         st.error(message)
             
             with col_btn3:
-                if st.button("🗑️ Delete", key=f"delete_{item_id}", use_container_width=True):
+                if st.button("🗑️ Delete", key=f"delete_{item_id}", disabled=sync_pending, use_container_width=True):
                     st.session_state[f'confirm_delete_{item_id}'] = True
             
+            with col_btn4:
+                # Selection lives in the session so bulk actions outside this fragment see it
+                selection = st.session_state.setdefault('menu_selection', set())
+                st.session_state[f'select_{item_id}'] = item_id in selection
+                st.checkbox(
+                    "Select",
+                    key=f"select_{item_id}",
+                    disabled=locked,
+                    on_change=lambda: selection.symmetric_difference_update({item_id})
+                )
+            
             # Show details if toggled
             if st.session_state.get(f'show_details_{item_id}', False):
                 with st.expander("📋 Full Details", expanded=True):
@@ -540,21 +3574,136 @@ def render_menu_card(item):
                     if st.button("✅ Yes, Delete", key=f"confirm_yes_{item_id}", type="primary", use_container_width=True):
                         success, message = delete_menu_item(item_id)
                         if success:
-                            st.success(message)
+                            st.toast(message)
                             st.session_state[f'confirm_delete_{item_id}'] = False
-                            time.sleep(1)
                             st.rerun()
                         else:
                             st.error(message)
                 with col_no:
                     if st.button("❌ Cancel", key=f"confirm_no_{item_id}", use_container_width=True):
                         st.session_state[f'confirm_delete_{item_id}'] = False
-                        st.rerun()
+                        st.rerun(scope="fragment")
         
         st.markdown("<hr style='margin: 2rem 0; border: none; border-top: 1px solid #e0e0e0;'>", unsafe_allow_html=True)
 
+@st.fragment
+def render_bulk_actions(total, filter_ids, sync_states):
+    """Render select-all and batch status/delete actions for the filtered items.
+    
+    Actions apply to the selected items within the current filter and queue one
+    mutation for all of them. ``filter_ids()`` lists the ids of the ``total``
+    items in the filter; it only runs when an action needs them.
+    """
+    selection = st.session_state.setdefault('menu_selection', set())
+    
+    def selectable():
+        return [item_id for item_id in filter_ids() if not sync_locked(sync_states.get(str(item_id)))]
+    
+    col_all, col_clear, col_on, col_off, col_delete = st.columns(5)
+    with col_all:
+        if st.button(f"☑️ Select All ({total})", disabled=not total, use_container_width=True):
+            selection.update(selectable())
+            st.rerun()
+    with col_clear:
+        if st.button("⬜ Clear Selection", use_container_width=True):
+            selection.clear()
+            st.session_state.pop('confirm_bulk_delete', None)
+            st.rerun()
+    
+    action = None
+    with col_on:
+        if st.button("🟢 Activate Selected", use_container_width=True):
+            action = functools.partial(update_items_status, active=True)
+    with col_off:
+        if st.button("🔴 Deactivate Selected", use_container_width=True):
+            action = functools.partial(update_items_status, active=False)
+    with col_delete:
+        if st.button("🗑️ Delete Selected", use_container_width=True):
+            st.session_state['confirm_bulk_delete'] = True
+    
+    selected = []
+    if selection and (action or st.session_state.get('confirm_bulk_delete')):
+        selected = [item_id for item_id in selectable() if item_id in selection]
+    
+    if st.session_state.get('confirm_bulk_delete') and selected:
+        st.warning(f"⚠️ Are you sure you want to delete **{len(selected)} items**? This action cannot be undone!")
+        col_yes, col_no = st.columns(2)
+        with col_yes:
+            if st.button("✅ Yes, Delete All", type="primary", use_container_width=True):
+                action = delete_menu_items
+        with col_no:
+            if st.button("❌ Cancel", key="cancel_bulk_delete", use_container_width=True):
+                st.session_state['confirm_bulk_delete'] = False
+                st.rerun(scope="fragment")
+    
+    if (action or st.session_state.get('confirm_bulk_delete')) and not selected:
+        st.session_state['confirm_bulk_delete'] = False
+        st.warning("⚠️ Select items in the current filter first")
+    elif action:
+        success, message = action(selected)
+        if success:
+            st.toast(message)
+            selection.difference_update(selected)
+            st.session_state['confirm_bulk_delete'] = False
+            # Cards and stats live outside this fragment
+            st.rerun()
+        else:
+            st.error(message)
+
+def get_page_size_options():
+    """Page sizes offered in the picker, including the configured default."""
+    default = int(get_setting('menu_page_size', MENU_PAGE_SIZE))
+    return default, sorted(set(MENU_PAGE_SIZE_OPTIONS + [default]))
+
+
+def get_page_size():
+    """Cards per page, from the page-size picker or `tuning.menu_page_size`."""
+    default, options = get_page_size_options()
+    if st.session_state.get('menu_page_size') not in options:
+        st.session_state['menu_page_size'] = default
+    return st.session_state['menu_page_size']
+
+
+def render_pagination(total, page_size):
+    """Render page controls; the current page lives in `st.session_state.menu_page`."""
+    page_count = max(1, -(-total // page_size))
+    page = min(st.session_state.get('menu_page', 0), page_count - 1)
+    st.session_state['menu_page'] = page
+    
+    first = page * page_size + 1 if total else 0
+    last = min(total, (page + 1) * page_size)
+    
+    col_prev, col_info, col_size, col_next = st.columns([1, 2, 1, 1])
+    
+    with col_prev:
+        if st.button("◀ Previous", key="page_prev", disabled=page == 0, use_container_width=True):
+            st.session_state['menu_page'] = page - 1
+            st.rerun()
+    
+    with col_info:
+        st.markdown(
+            f"<p style='text-align: center; color: #7f8c8d; margin: 0.5rem 0;'>"
+            f"Showing {first}–{last} of {total} items · Page {page + 1} of {page_count}</p>",
+            unsafe_allow_html=True
+        )
+    
+    with col_size:
+        st.selectbox(
+            "Items per page",
+            get_page_size_options()[1],
+            key="menu_page_size",
+            label_visibility="collapsed",
+            on_change=lambda: st.session_state.update(menu_page=0)
+        )
+    
+    with col_next:
+        if st.button("Next ▶", key="page_next", disabled=page >= page_count - 1, use_container_width=True):
+            st.session_state['menu_page'] = page + 1
+            st.rerun()
+
+@st.fragment
 def render_add_item_form():
-    """Render add new item form."""
+    """Render add new item form; edits rerun only the form fragment."""
     with st.expander("➕ Add New Menu Item", expanded=False):
         st.markdown("### 📝 Item Information")
         
@@ -565,11 +3714,11 @@ def render_add_item_form():
             price = st.number_input("Price (৳) *", min_value=0, value=0, step=10)
             category = st.selectbox(
                 "Category *",
-                ["breakfast", "lunch", "dinner", "snacks", "drinks", "dessert"]
+                MENU_CATEGORIES
             )
             spice_level = st.selectbox(
                 "Spice Level",
-                ["None", "mild", "medium", "hot"]
+                ["None"] + SPICE_LEVELS
             )
         
         with col2:
@@ -624,23 +3773,24 @@ def render_add_item_form():
                 st.error("⚠️ Please fill in all required fields (marked with *)")
                 return
             
-            # Upload images
-            with st.spinner("Uploading images..."):
-                # Upload main image
-                main_image_url = upload_file_to_supabase(main_image_file)
-                if not main_image_url:
-                    st.error("❌ Failed to upload main image. Please try again.")
-                    return
-                
-                # Upload additional images
-                other_image_urls = []
-                if other_image_files:
-                    for img_file in other_image_files:
-                        url = upload_file_to_supabase(img_file)
-                        if url:
-                            other_image_urls.append(url)
-                        else:
-                            st.warning(f"⚠️ Failed to upload {img_file.name}")
+            # Upload the main and additional images concurrently
+            other_image_files = other_image_files or []
+            results = upload_images_to_supabase([main_image_file] + other_image_files)
+            
+            main_image, main_error = results[0]
+            if not main_image:
+                st.error(f"❌ Failed to upload main image. Please try again. ({main_error})")
+                return
+            
+            # Keep additional images in their uploaded order
+            other_image_urls = []
+            other_thumbnail_urls = []
+            for img_file, (uploaded, error) in zip(other_image_files, results[1:]):
+                if uploaded:
+                    other_image_urls.append(uploaded['url'])
+                    other_thumbnail_urls.append(uploaded['thumbnail_url'])
+                else:
+                    st.warning(f"⚠️ Failed to upload {img_file.name}")
             
             # Prepare data
             item_data = {
@@ -652,23 +3802,228 @@ def render_add_item_form():
                 "category": category,
                 "spice_level": spice_level if spice_level != "None" else None,
                 "allergens": allergens if allergens else None,
-                "main_image_url": main_image_url,
+                "main_image_url": main_image['url'],
+                "main_image_thumbnail_url": main_image['thumbnail_url'],
                 "other_image_urls": other_image_urls,
+                "other_image_thumbnail_urls": other_thumbnail_urls,
                 "portion_size": portion_size if portion_size else None,
                 "preparation_time": preparation_time if preparation_time else None,
                 "popular": popular,
                 "seasonal": seasonal
             }
             
-            # Send to webhook
+            # Queue for the webhook
             with st.spinner("Adding item to menu..."):
                 success, message = add_menu_item(item_data)
-                if success:
-                    st.success(message)
-                    time.sleep(2)
-                    st.rerun()
-                else:
-                    st.error(message)
+            if success:
+                # The new card lives outside this fragment
+                st.toast(message)
+                st.rerun()
+            else:
+                st.error(message)
+
+@st.fragment
+def render_bulk_import():
+    """Render the CSV/JSON bulk import; rows are validated before anything is uploaded."""
+    report = st.session_state.get('import_report')
+    with st.expander("📦 Bulk Import", expanded=report is not None):
+        st.caption(
+            "Upload a CSV or JSON file of items and, optionally, a zip of the images it names. "
+            "Images may also be http(s) URLs. Separate additional images with `;`."
+        )
+        st.download_button(
+            "📄 Download CSV template",
+            import_template_csv(),
+            file_name="menu_import_template.csv",
+            mime="text/csv"
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            data_file = st.file_uploader("Items File *", type=["csv", "json", "jsonl"], key="import_data_upload")
+        with col2:
+            image_archive = st.file_uploader("Images (.zip)", type=["zip"], key="import_images_upload")
+        
+        if report is not None:
+            st.markdown("### 📋 Import Report")
+            st.dataframe(report, hide_index=True, use_container_width=True)
+            st.download_button(
+                "📥 Download report",
+                rows_to_csv(report, ["row", "name", "status", "message"]),
+                file_name="menu_import_report.csv",
+                mime="text/csv"
+            )
+            if st.button("Clear report"):
+                st.session_state.pop('import_report')
+                st.rerun(scope="fragment")
+        
+        if not data_file:
+            return
+        
+        try:
+            rows = read_import_rows(data_file.name, data_file.getvalue())
+            archive = zipfile.ZipFile(image_archive) if image_archive else None
+        except (ValueError, csv.Error, zipfile.BadZipFile) as e:
+            st.error(f"❌ Could not read the import files: {str(e)}")
+            return
+        
+        images = archive_images(archive) if archive else {}
+        existing_names = {item.name.casefold() for item in fetch_menu_items()}
+        valid, validation = validate_import(rows, images, existing_names)
+        invalid = len(rows) - len(valid)
+        st.info(f"🔎 {len(valid)} of {len(rows)} rows are valid" + (f", {invalid} will be skipped" if invalid else ""))
+        if invalid:
+            st.dataframe(
+                [entry for entry in validation if entry['message']],
+                hide_index=True,
+                use_container_width=True
+            )
+        
+        if st.button(f"📦 Import {len(valid)} Items", type="primary", disabled=not valid, use_container_width=True):
+            progress = st.progress(0.0, text=f"Importing {len(valid)} items...")
+            outcome = import_menu_items(
+                valid,
+                archive=archive,
+                images=images,
+                batch_size=int(get_setting('import_batch_size', IMPORT_BATCH_SIZE)),
+                on_batch=lambda done, total: progress.progress(done / total, text=f"Imported {done}/{total} items")
+            )
+            for entry in validation:
+                if entry['row'] in outcome:
+                    entry['status'], entry['message'] = outcome[entry['row']]
+            st.session_state['import_report'] = validation
+            queued = sum(status == "✅ queued" for status, _ in outcome.values())
+            st.toast(f"{queued} items queued! ⏳ Syncing with n8n...")
+            # The new cards live outside this fragment
+            st.rerun()
+
+@st.fragment
+def render_menu_export(status="All", category="All", sort_by=None):
+    """Render the export controls; the file is only built when the download starts."""
+    with st.expander("📤 Export", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            dataset = st.radio("Data", ["Menu", "Knowledge Base"], horizontal=True, key="export_dataset")
+        with col2:
+            export_format = st.selectbox("Format", list(EXPORT_FORMATS), key="export_format")
+        with col3:
+            compress = st.checkbox("Compress (.gz)", disabled=export_format == "Parquet", key="export_compress")
+        
+        if dataset == "Menu":
+            st.caption(f"Status: {status} · Category: {category} · Sort: {sort_by}. Search is not applied.")
+            fields = EXPORT_MENU_FIELDS
+            make_query = functools.partial(build_menu_query, status=status, category=category, sort_by=sort_by)
+        else:
+            fields = EXPORT_KNOWLEDGE_FIELDS
+            knowledge_type = get_setting('knowledge_type', KNOWLEDGE_TYPE)
+            make_query = lambda supabase: (
+                supabase.table('kitchen_data')
+                .select("id, created_at, content, metadata")
+                .eq('metadata->>type', knowledge_type)
+                .order('id')
+            )
+        
+        # Resolved here: the download callable runs off the script thread
+        build = functools.partial(
+            make_export,
+            make_query,
+            export_format,
+            fields,
+            compress=compress,
+            run=supabase_runner(),
+            batch_size=int(get_setting('export_batch_size', EXPORT_BATCH_SIZE)),
+            metrics=get_metrics()
+        )
+        st.download_button(
+            f"📥 Download {EXPORT_FORMATS[export_format][0].upper()}",
+            build,
+            file_name=export_file_name(dataset.lower().replace(' ', '_'), export_format, compress),
+            mime="application/gzip" if compress and export_format != "Parquet" else EXPORT_FORMATS[export_format][1],
+            on_click="ignore",
+            use_container_width=True
+        )
+
+def render_knowledge_upload():
+    """Render the PDF upload and ingestion form for the knowledge base."""
+    st.markdown("### 📤 Upload PDF")
+    st.caption("FAQs, guides and manuals are split into chunks and added to the knowledge base the chatbot searches.")
+    
+    pdf_files = st.file_uploader(
+        "Documents",
+        type=["pdf"],
+        accept_multiple_files=True,
+        key="knowledge_upload"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        chunk_size = st.number_input(
+            "Chunk Size (characters)",
+            min_value=200,
+            max_value=8000,
+            value=int(get_setting('knowledge_chunk_size', KNOWLEDGE_CHUNK_SIZE)),
+            step=100
+        )
+    with col2:
+        chunk_overlap = st.number_input(
+            "Chunk Overlap (characters)",
+            min_value=0,
+            max_value=2000,
+            value=int(get_setting('knowledge_chunk_overlap', KNOWLEDGE_CHUNK_OVERLAP)),
+            step=50
+        )
+    
+    if st.button("📥 Add to Knowledge Base", type="primary", disabled=not pdf_files, use_container_width=True):
+        if chunk_overlap >= chunk_size:
+            st.error("⚠️ Chunk overlap must be smaller than the chunk size")
+            return
+        
+        settings = dict(st.session_state.secrets.get('tuning', {}))
+        settings.update(knowledge_chunk_size=chunk_size, knowledge_chunk_overlap=chunk_overlap)
+        run = supabase_runner()
+        metrics = get_metrics()
+        bucket_name = get_setting('knowledge_bucket', KNOWLEDGE_BUCKET)
+        
+        for pdf_file in pdf_files:
+            progress = st.progress(0.0, text=f"Uploading {pdf_file.name}...")
+            document_url = upload_file_to_supabase(
+                pdf_file,
+                bucket_name,
+                on_progress=lambda sent, total, name=pdf_file.name: progress.progress(
+                    sent / total, text=f"Uploading {name}: {sent / 2 ** 20:.1f}/{total / 2 ** 20:.1f} MB"
+                )
+            )
+            if not document_url:
+                progress.empty()
+                continue
+            
+            start = time.perf_counter()
+            try:
+                chunks, pages = ingest_pdf(
+                    run,
+                    pdf_file,
+                    pdf_file.name,
+                    document_url=document_url,
+                    settings=settings,
+                    on_page=lambda done, total, name=pdf_file.name: progress.progress(
+                        done / total, text=f"Reading {name}: page {done}/{total}"
+                    ),
+                    metrics=metrics
+                )
+            except (PdfReadError, ValueError) as e:
+                progress.empty()
+                st.error(f"❌ Could not read {pdf_file.name}: {str(e)}")
+                continue
+            except Exception as e:
+                progress.empty()
+                st.error(f"❌ Error adding {pdf_file.name}: {str(e)}")
+                continue
+            
+            progress.empty()
+            st.success(
+                f"✅ {pdf_file.name}: {chunks} chunks from {pages} pages "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
 
 # ===========================
 # MAIN APP
@@ -693,8 +4048,13 @@ def main():
         st.markdown("---")
         
         if st.button("🔄 Refresh Data", use_container_width=True):
+            st.session_state['force_refresh'] = True
             st.rerun()
         
+        outbox_counts = get_outbox().counts()
+        if outbox_counts['pending'] or outbox_counts['failed']:
+            st.caption(f"📮 Syncing: {outbox_counts['pending']} pending · {outbox_counts['failed']} failed")
+        
         if st.button("🚪 Logout", use_container_width=True):
             st.session_state.clear()
             st.rerun()
@@ -713,22 +4073,42 @@ def main():
     if page == "📋 Menu Items":
         # Add new item form
         render_add_item_form()
+        render_bulk_import()
         
         st.markdown("## 🍴 Current Menu Items")
         
-        # Fetch items
+        force_refresh = st.session_state.pop('force_refresh', False)
+        
+        # The held menu feeds stats, categories and search
         with st.spinner("Loading menu items..."):
-            items = fetch_menu_items()
+            items = fetch_menu_items(force_refresh=force_refresh)
+        
+        render_freshness()
+        render_row_problems()
         
         if not items:
-            st.info("📭 No menu items found. Add your first item above!")
+            # A failed load has already been reported; don't claim the menu is empty
+            if not get_menu_sync_state().last_error:
+                st.info("📭 No menu items found. Add your first item above!")
             return
         
+        index = get_menu_index(items)
+        
+        metrics = get_metrics()
+        
         # Stats
-        render_stats(items)
+        with metrics.span('render_stats'):
+            render_stats(index.stats)
         
         st.markdown("---")
         
+        search_query = st.text_input(
+            "Search",
+            placeholder="🔍 Search by name, description, ingredients or allergens...",
+            label_visibility="collapsed",
+            key="menu_search"
+        ).strip()
+        
         # Filters
         col_filter1, col_filter2, col_filter3 = st.columns(3)
         
@@ -736,44 +4116,63 @@ def main():
             filter_status = st.selectbox("Filter by Status", ["All", "Active", "Inactive"])
         
         with col_filter2:
-            categories = ["All"] + list(set([i.get('metadata', {}).get('category', 'general') for i in items]))
+            categories = ["All"] + index.categories
             filter_category = st.selectbox("Filter by Category", categories)
         
         with col_filter3:
-            sort_by = st.selectbox("Sort by", ["Name", "Price (Low to High)", "Price (High to Low)", "Recently Added"])
+            sort_by = st.selectbox("Sort by", list(MENU_SORT_ORDERS))
+        
+        render_menu_export(filter_status, filter_category, sort_by)
         
-        # Apply filters
-        filtered_items = items
+        # Start from the first page whenever the filters change
+        view = (search_query, filter_status, filter_category, sort_by)
+        if st.session_state.get('menu_view') != view:
+            st.session_state['menu_view'] = view
+            st.session_state['menu_page'] = 0
         
-        if filter_status != "All":
-            filtered_items = [i for i in filtered_items if i.get('metadata', {}).get('active', False) == (filter_status == "Active")]
+        page_size = get_page_size()
+        page_index = st.session_state.get('menu_page', 0)
+        if search_query:
+            # Search hits keep relevance order and are narrowed by the index
+            hits = index.filter_ids(search_menu(items, search_query), filter_status, filter_category)
+            total = len(hits)
+            page_index = min(page_index, max(0, -(-total // page_size) - 1))
+            page_items = hits[page_index * page_size:(page_index + 1) * page_size]
+            filter_ids = lambda: [item.id for item in hits if not item.provisional]
+        else:
+            # Filtering, sorting and paging run in the database while it is reachable
+            menu_page = fetch_menu_page(
+                index, filter_status, filter_category, sort_by, page_index * page_size, page_size, force_refresh
+            )
+            if not menu_page.items and page_index and menu_page.total:
+                # The list shrank since the last page change: show its last page
+                page_index = max(0, -(-menu_page.total // page_size) - 1)
+                menu_page = fetch_menu_page(
+                    index, filter_status, filter_category, sort_by, page_index * page_size, page_size
+                )
+            total, page_items = menu_page.total, menu_page.items
+            if menu_page.held:
+                filter_ids = lambda: [
+                    item.id for item in index.query(filter_status, filter_category, sort_by) if not item.provisional
+                ]
+            else:
+                filter_ids = functools.partial(fetch_menu_ids, filter_status, filter_category)
         
-        if filter_category != "All":
-            filtered_items = [i for i in filtered_items if i.get('metadata', {}).get('category') == filter_category]
+        st.markdown(f"### Showing {total} items")
         
-        # Apply sorting
-        if sort_by == "Name":
-            filtered_items = sorted(filtered_items, key=lambda x: x.get('metadata', {}).get('item_name', ''))
-        elif sort_by == "Price (Low to High)":
-            filtered_items = sorted(filtered_items, key=lambda x: float(x.get('metadata', {}).get('price', 0)))
-        elif sort_by == "Price (High to Low)":
-            filtered_items = sorted(filtered_items, key=lambda x: float(x.get('metadata', {}).get('price', 0)), reverse=True)
-        elif sort_by == "Recently Added":
-            filtered_items = sorted(filtered_items, key=lambda x: x.get('created_at', ''), reverse=True)
+        sync_states = get_outbox().item_states()
+        render_bulk_actions(total, filter_ids, sync_states)
         
-        st.markdown(f"### Showing {len(filtered_items)} items")
+        # Render only the current page of cards
+        with metrics.span('render_cards'):
+            for item in page_items:
+                render_menu_card(item, sync_states.get(str(item.id)))
         
-        # Render cards
-        for item in filtered_items:
-            render_menu_card(item)
+        render_pagination(total, page_size)
     
     elif page == "📚 Knowledge Base":
         st.markdown("## 📚 Knowledge Base Management")
-        st.info("🚧 Knowledge base management coming soon! You can upload PDFs via the form endpoint for now.")
-        
-        st.markdown("### 📤 Upload PDF")
-        st.markdown(f"Use this form URL to upload FAQs and guides:")
-        st.code("https://your-n8n-url.com/form/hungrypanda-knowledge-upload")
+        render_knowledge_upload()
     
     elif page == "⚙️ Settings":
         st.markdown("## ⚙️ Settings")
@@ -783,12 +4182,106 @@ def main():
             st.code(st.session_state.secrets['n8n']['add_item_webhook'])
             st.code(st.session_state.secrets['n8n']['update_status_webhook'])
             st.code(st.session_state.secrets['n8n']['delete_item_webhook'])
+            for webhook in ('bulk_add_item_webhook', 'bulk_update_status_webhook', 'bulk_delete_item_webhook'):
+                if st.session_state.secrets['n8n'].get(webhook):
+                    st.code(st.session_state.secrets['n8n'][webhook])
+        
+        with st.expander("Webhook Client"):
+            st.json(get_webhook_client().stats())
+        
+        with st.expander("Mutation Outbox"):
+            outbox = get_outbox()
+            st.json(outbox.stats())
+            failed = outbox.rows('failed')
+            if failed and st.button("🔁 Retry All Failed"):
+                outbox.retry()
+                st.rerun()
+            for row in failed:
+                st.markdown(f"**#{row['id']} {row['kind']}** item `{row['item_id']}` · {row['attempts']} attempts")
+                st.caption(row['last_error'])
+                col_retry, col_discard = st.columns(2)
+                with col_retry:
+                    if st.button("🔁 Retry", key=f"outbox_retry_{row['id']}", use_container_width=True):
+                        outbox.retry(row['id'])
+                        st.rerun()
+                with col_discard:
+                    if st.button("🗑️ Discard", key=f"outbox_discard_{row['id']}", use_container_width=True):
+                        outbox.discard(row['id'])
+                        st.rerun()
         
         st.markdown("### 🗄️ Database")
         with st.expander("Supabase Configuration"):
             st.code(st.session_state.secrets['supabase']['url'])
             st.text("Key: " + "*" * 20)
         
+        with st.expander("Resumable Uploads"):
+            uploader = get_resumable_uploader()
+            st.json(uploader.stats())
+            for state in uploader.pending():
+                st.caption(f"⏸️ {state['bucket']}/{state['path']}: {state['offset'] / 2 ** 20:.1f} of {state['size'] / 2 ** 20:.1f} MB")
+        
+        with st.expander("Connection Pool"):
+            pool = get_supabase_pool()
+            if st.button("🩺 Run Health Check"):
+                pool.health_check(
+                    st.session_state.secrets['supabase']['url'],
+                    st.session_state.secrets['supabase']['key'],
+                    force=True
+                )
+            st.json(pool.stats())
+        
+        with st.expander("Menu Cache"):
+            st.text(f"TTL: {get_setting('menu_cache_ttl', MENU_CACHE_TTL)}s")
+            st.json(get_menu_cache().stats())
+            st.markdown("**Incremental sync**")
+            st.json(get_menu_sync_state().stats())
+            if st.button("🧹 Invalidate Menu Cache"):
+                invalidate_menu_cache()
+        
+        with st.expander("Image Cache"):
+            image_cache = get_image_cache()
+            st.json(image_cache.stats())
+            if st.button("🧹 Clear Image Cache"):
+                image_cache.clear()
+        
+        st.markdown("### 📈 Performance")
+        metrics = get_metrics()
+        if not metrics.enabled:
+            st.info("Instrumentation is off. Set `metrics_enabled = true` under `[tuning]` and restart the app to collect timings.")
+        snapshot = metrics.snapshot()
+        if snapshot['spans']:
+            st.dataframe(
+                [{"operation": name, **values} for name, values in snapshot['spans'].items()],
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.caption("No timings recorded yet.")
+        if snapshot['counters']:
+            st.json(snapshot['counters'])
+        
+        col_json, col_prom, col_reset = st.columns(3)
+        with col_json:
+            st.download_button(
+                "⬇️ Export JSON",
+                json.dumps(snapshot, indent=2),
+                file_name="kitchen_manager_metrics.json",
+                mime="application/json",
+                use_container_width=True
+            )
+        with col_prom:
+            st.download_button(
+                "⬇️ Export Prometheus",
+                metrics.prometheus(),
+                file_name="kitchen_manager_metrics.prom",
+                mime="text/plain",
+                use_container_width=True
+            )
+        with col_reset:
+            if st.button("🧹 Reset Metrics", use_container_width=True):
+                metrics.reset()
+                st.rerun()
+        
         st.markdown("### 🔒 Security")
         if st.button("🔄 Clear Session & Logout"):
             st.session_state.clear()
@@ -0,0 +1,624 @@
+"""Benchmark Kitchen Manager against in-process Supabase and n8n stand-ins.
+
+Seeds a fake ``kitchen_data`` table with N synthetic menu rows, drives
+``app.main()`` through Streamlit's app-testing runner and prints one JSON
+document with page timings, fetch/render breakdowns, memory and webhook
+round trips per size, plus a resumable upload run with injected failures.
+Nothing talks to the real Supabase or n8n.
+
+    python benchmark.py                              # 100, 1k and 10k items
+    python benchmark.py --sizes 1000 --output bench.json
+    python benchmark.py --baseline bench.json        # exit 1 on regressions
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+import streamlit as st
+import supabase
+from streamlit import logger as streamlit_logger
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+SIZES = [100, 1000, 10000]
+WARM_RERUNS = 5
+WEBHOOK_LATENCY = 0.05  # seconds
+DELIVERY_TIMEOUT = 15  # seconds to wait for the outbox to post a mutation
+TOGGLE_BURST = 5  # clicks on one card's status toggle
+BURST_SETTLE = 3  # seconds after the first post in which a duplicate would land
+REGRESSION_TOLERANCE = 0.25  # fraction slower than the baseline that counts as a regression
+UPLOAD_SIZE = 24 * 1024 * 1024  # bytes for the resumable upload scenario
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_FAIL_EVERY = 5  # every Nth chunk drops halfway through
+
+# Functions timed inside each page run (their totals per run)
+TIMED_FUNCTIONS = [
+    "fetch_menu_items",
+    "fetch_menu_page",
+    "get_menu_index",
+    "search_menu",
+    "render_stats",
+    "render_menu_card",
+    "render_add_item_form",
+    "render_pagination",
+]
+
+# ===========================
+# FAKE SUPABASE
+# ===========================
+CATEGORIES = ["breakfast", "lunch", "dinner", "snacks", "drinks", "dessert"]
+WORDS = ["chicken", "beef", "rice", "lentil", "mango", "paneer", "spicy", "grilled", "fried", "sweet",
+         "biryani", "kebab", "curry", "naan", "tikka", "kheer", "lassi", "samosa", "korma", "halwa"]
+
+
+class FakeSupabase:
+    """Enough of PostgREST and Storage for the queries ``app.py`` sends.
+
+    Supports ``select`` with ``->``/``->>`` paths and aliases, ``eq``/``neq``/
+    ``gt``/``gte``/``lt``/``lte``/``is``/``in``/``imatch``/``or`` filters and
+    ``not.`` negation, multi-key
+    ``order``, ``offset``/``limit`` windows and ``count=exact``, plus the TUS
+    resumable upload endpoint. PATCH requests whose (1-based) number is in
+    ``fail_patches`` store half their chunk and then fail, like a connection
+    dropping mid-chunk.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self.objects = {}
+        self.uploads = {}
+        self.fail_patches = set()
+        self.patches = 0
+        self.requests = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    def seed(self, count, seed=0):
+        rng = random.Random(seed)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        self.rows = []
+        for i in range(count):
+            stamp = (start + timedelta(minutes=i)).isoformat()
+            words = rng.sample(WORDS, 3)
+            self.rows.append({
+                "id": i + 1,
+                "created_at": stamp,
+                "updated_at": stamp,
+                "content": " ".join(words) * 20,
+                "embedding": None,
+                "metadata": {
+                    "type": "menu",
+                    "item_id": f"item-{i + 1}",
+                    "item_name": f"{words[0].title()} {words[1].title()} {i + 1}",
+                    "price": rng.randrange(50, 900, 10),
+                    "basket_price": rng.choice([None, rng.randrange(100, 1500, 10)]),
+                    "category": CATEGORIES[i % len(CATEGORIES)],
+                    "active": rng.random() > 0.3,
+                    "popular": rng.random() > 0.8,
+                    "description": f"{words[2].title()} house special with {words[0]} and {words[1]}.",
+                    "ingredients": ", ".join(rng.sample(WORDS, 4)),
+                    "allergens": rng.choice([None, "nuts", "dairy", "gluten"]),
+                    "main_image_url": None,
+                },
+            })
+
+    @staticmethod
+    def _value(row, column):
+        match = re.match(r"(\w+)(?:(->>?)(\w+))?$", column)
+        base, arrow, key = match.groups()
+        value = row.get(base)
+        if key is not None:
+            value = value.get(key) if isinstance(value, dict) else None
+            if arrow == "->>" and value is not None:
+                value = json.dumps(value) if not isinstance(value, str) else value
+        return value, key or base
+
+    @classmethod
+    def _matches(cls, row, column, expression):
+        value, _ = cls._value(row, column)
+        op, _, operand = expression.partition(".")
+        text = None if value is None else json.dumps(value) if isinstance(value, bool) else str(value)
+        if op == "not":
+            # SQL negation: a NULL stays unmatched either way
+            return text is not None and not cls._matches(row, column, operand)
+        if len(operand) > 1 and operand[0] == operand[-1] == '"':
+            operand = operand[1:-1]
+        if op == "eq":
+            return text == operand
+        if op == "neq":
+            return text is not None and text != operand
+        if op == "is":
+            return value is None if operand == "null" else text == operand
+        if op == "in":
+            return text in operand.strip("()").split(",")
+        if text is None:
+            return False
+        if op == "imatch":
+            return re.search(operand.replace("[[:space:]]", r"\s"), text, re.IGNORECASE) is not None
+        if op in ("gt", "gte", "lt", "lte"):
+            try:
+                left, right = datetime.fromisoformat(text), datetime.fromisoformat(operand)
+            except ValueError:
+                left, right = text, operand
+            return {"gt": left > right, "gte": left >= right, "lt": left < right, "lte": left <= right}[op]
+        raise ValueError(f"Unsupported filter: {column}={expression}")
+
+    def _select(self, request):
+        query = parse_qsl(urlsplit(str(request.url)).query, keep_blank_values=True)
+        rows = self.rows
+        columns, order, offset, limit = "*", None, 0, None
+        for key, value in query:
+            if key == "select":
+                columns = value
+            elif key == "order":
+                order = value
+            elif key == "offset":
+                offset = int(value)
+            elif key == "limit":
+                limit = int(value)
+            elif key == "or":
+                # Split on commas outside double-quoted values
+                parts = [part.partition(".") for part in re.findall(r'(?:[^,"]|"[^"]*")+', value[1:-1])]
+                rows = [row for row in rows if any(self._matches(row, c, e) for c, _, e in parts)]
+            else:
+                rows = [row for row in rows if self._matches(row, key, value)]
+
+        if order:
+            rows = list(rows)
+            for part in reversed(order.split(",")):
+                column, *flags = part.split(".")
+
+                def sort_key(row, column=column):
+                    value = self._value(row, column)[0]
+                    return (value is None, value if value is not None else 0)
+                rows.sort(key=sort_key, reverse="desc" in flags)
+
+        total = len(rows)
+        rows = rows[offset:None if limit is None else offset + limit]
+        if columns != "*":
+            selected = []
+            for row in rows:
+                out = {}
+                for column in columns.split(","):
+                    alias, _, path = column.strip().rpartition(":")
+                    value, name = self._value(row, path)
+                    out[alias or name] = value
+                selected.append(out)
+            rows = selected
+
+        body = json.dumps(rows).encode()
+        with self.lock:
+            self.bytes_sent += len(body)
+        exact = "count=exact" in request.headers.get("prefer", "")
+        return httpx.Response(200, content=body, headers={
+            "content-type": "application/json",
+            "content-range": f"{offset}-{offset + len(rows) - 1}/{total if exact else '*'}",
+        })
+
+    def _resumable(self, request):
+        url = str(request.url)
+        if request.method == "POST":
+            metadata = dict(
+                (key, base64.b64decode(value).decode())
+                for key, value in (item.split(" ", 1) for item in request.headers["upload-metadata"].split(","))
+            )
+            upload_id = str(len(self.uploads) + 1)
+            self.uploads[upload_id] = {
+                "length": int(request.headers["upload-length"]),
+                "key": f"{metadata['bucketName']}/{metadata['objectName']}",
+                "data": bytearray(),
+            }
+            return httpx.Response(201, headers={"Location": f"{url.rstrip('/')}/{upload_id}"})
+
+        upload = self.uploads.get(url.rsplit("/", 1)[1])
+        if upload is None:
+            return httpx.Response(404)
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={
+                "Upload-Offset": str(len(upload["data"])), "Upload-Length": str(upload["length"]),
+            })
+        if int(request.headers["upload-offset"]) != len(upload["data"]):
+            return httpx.Response(409)
+        with self.lock:
+            self.patches += 1
+            failing = self.patches in self.fail_patches
+        chunk = request.content
+        if failing:
+            upload["data"] += chunk[:len(chunk) // 2]
+            return httpx.Response(500)
+        upload["data"] += chunk
+        if len(upload["data"]) >= upload["length"]:
+            self.objects[upload["key"]] = bytes(upload["data"])
+        return httpx.Response(204, headers={"Upload-Offset": str(len(upload["data"]))})
+
+    def handle(self, request):
+        with self.lock:
+            self.requests += 1
+        url = str(request.url)
+        if "/rest/v1/" in url and request.method == "GET":
+            return self._select(request)
+        if "/storage/v1/upload/resumable" in url:
+            return self._resumable(request)
+        if "/storage/v1/object/" in url:
+            key = url.split("/storage/v1/object/", 1)[1]
+            if request.method == "HEAD":
+                return httpx.Response(200 if key in self.objects else 400)
+            self.objects[key] = request.content
+            return httpx.Response(200, json={"Key": key})
+        return httpx.Response(404, json={"message": f"Not supported by the benchmark: {request.method} {url}"})
+
+    def install(self):
+        """Route every Supabase client ``app.py`` creates to this fake."""
+        create_client = supabase.create_client
+
+        def fake_create_client(url, key, options=None):
+            options = supabase.ClientOptions(httpx_client=httpx.Client(transport=httpx.MockTransport(self.handle)))
+            return create_client(url, key, options=options)
+        supabase.create_client = fake_create_client
+
+# ===========================
+# FAKE WEBHOOK SERVER
+# ===========================
+class FakeWebhookServer:
+    """Local HTTP server standing in for the n8n webhooks, with fixed latency."""
+
+    def __init__(self, latency=WEBHOOK_LATENCY):
+        self.latency = latency
+        self.received = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(server.latency)
+                server.received.append((time.perf_counter(), self.path, json.loads(body or b"null")))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b'{"ok": true}')
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def wait_for(self, count, timeout=DELIVERY_TIMEOUT):
+        """Wait until ``count`` requests have arrived; returns whether they did."""
+        deadline = time.time() + timeout
+        while len(self.received) < count and time.time() < deadline:
+            time.sleep(0.01)
+        return len(self.received) >= count
+
+    def close(self):
+        self.httpd.shutdown()
+
+# ===========================
+# APP DRIVER
+# ===========================
+# Runs app.py as a module so hot functions can be wrapped with timers, then calls main()
+DRIVER = """
+import functools, time
+import streamlit as st
+
+app = {"__name__": "kitchen_manager", "__file__": st.session_state["bench_app_path"]}
+exec(st.session_state["bench_code"], app)
+timings = st.session_state["bench_timings"] = {}
+
+def timed(name, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+    return wrapper
+
+for name in st.session_state["bench_timed"]:
+    app[name] = timed(name, app[name])
+
+start = time.perf_counter()
+app["main"]()
+timings["main"] = time.perf_counter() - start
+"""
+
+
+def new_app(data_dir, webhook_url, code):
+    """A logged-in AppTest session against fresh process-wide caches."""
+    # A new process would start with empty st.cache_resource holders. Clearing
+    # them here runs without a script context, so keep Streamlit's warning quiet.
+    streamlit_logger.set_log_level("error")
+    st.cache_resource.clear()
+    at = AppTest.from_string(DRIVER, default_timeout=600)
+    at.secrets["supabase"] = {"url": "http://supabase.bench", "key": "bench-key"}
+    at.secrets["n8n"] = {
+        "add_item_webhook": f"{webhook_url}/add",
+        "update_status_webhook": f"{webhook_url}/status",
+        "delete_item_webhook": f"{webhook_url}/delete",
+    }
+    at.secrets["tuning"] = {"data_dir": data_dir}
+    at.session_state["password_correct"] = True
+    at.session_state["logged_in_time"] = time.time()
+    at.session_state["bench_code"] = code
+    at.session_state["bench_app_path"] = APP_PATH
+    at.session_state["bench_timed"] = TIMED_FUNCTIONS
+    return at
+
+
+def timed_run(at, action=None):
+    """Run the page (after ``action``, e.g. a click) and return its measurements."""
+    start = time.perf_counter()
+    (action or at).run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].value}")
+    timings = at.session_state["bench_timings"] if "bench_timings" in at.session_state else {}
+    result = {"run_ms": round(elapsed * 1000, 2)}
+    result.update({f"{name}_ms": round(seconds * 1000, 2) for name, seconds in timings.items()})
+    return result
+
+
+def summarize(runs):
+    """Median of each measurement over several runs, plus p95 of the page time."""
+    summary = {key: round(statistics.median(run.get(key, 0.0) for run in runs), 2) for key in runs[0]}
+    page_times = sorted(run["run_ms"] for run in runs)
+    summary["run_ms_p95"] = page_times[min(len(page_times) - 1, int(len(page_times) * 0.95))]
+    return summary
+
+# ===========================
+# SCENARIOS
+# ===========================
+def bench_size(count, fake, webhooks, code, measure_memory=True):
+    """Measure one menu size; returns a JSON-ready dict."""
+    fake.seed(count)
+    data_dir = tempfile.mkdtemp(prefix="kitchen-bench-")
+    try:
+        result = {"items": count}
+
+        # Cold start: new process, no snapshot, full load from Supabase
+        at = new_app(data_dir, webhooks.url, code)
+        requests_before, bytes_before = fake.requests, fake.bytes_sent
+        result["cold_start"] = timed_run(at)
+        result["cold_start"]["supabase_requests"] = fake.requests - requests_before
+        result["cold_start"]["supabase_bytes"] = fake.bytes_sent - bytes_before
+
+        # Warm reruns: served from the shared menu cache
+        result["warm_rerun"] = summarize([timed_run(at) for _ in range(WARM_RERUNS)])
+
+        # Manual refresh: full reconciliation from Supabase
+        refresh = next(button for button in at.sidebar.button if button.label == "🔄 Refresh Data")
+        requests_before = fake.requests
+        result["refresh"] = timed_run(at, refresh.click())
+        result["refresh"]["supabase_requests"] = fake.requests - requests_before
+
+        # Search across the whole menu
+        result["search"] = timed_run(at, at.text_input(key="menu_search").input("chicken curry"))
+        at.text_input(key="menu_search").input("").run()
+
+        # Status toggle: page time plus delivery through the outbox to n8n
+        toggle = next(button for button in at.button if button.key and button.key.startswith("toggle_"))
+        received_before = len(webhooks.received)
+        clicked_at = time.perf_counter()
+        result["toggle"] = timed_run(at, toggle.click())
+        delivered = webhooks.wait_for(received_before + 1)
+        time.sleep(0.2)  # let any duplicate or retried posts land
+        result["toggle"]["webhook_requests"] = len(webhooks.received) - received_before
+        result["toggle"]["delivered"] = delivered
+        result["toggle"]["delivery_ms"] = (
+            round((webhooks.received[received_before][0] - clicked_at) * 1000, 2) if delivered else None
+        )
+
+        # Toggle burst on another card: the outbox should send only the final state
+        toggles = [button.key for button in at.button if button.key and button.key.startswith("toggle_")]
+        burst_key = toggles[1] if len(toggles) > 1 else toggles[0]
+        received_before = len(webhooks.received)
+        clicked_at = time.perf_counter()
+        for _ in range(TOGGLE_BURST):
+            at.button(key=burst_key).click().run()
+        clicks_ms = (time.perf_counter() - clicked_at) * 1000
+        final_active = at.button(key=burst_key).label.startswith("🔴")
+        delivered = webhooks.wait_for(received_before + 1)
+        time.sleep(BURST_SETTLE)
+        burst = webhooks.received[received_before:]
+        result["toggle_burst"] = {
+            "clicks": TOGGLE_BURST,
+            "clicks_ms": round(clicks_ms, 2),
+            "delivery_ms": round((burst[0][0] - clicked_at) * 1000, 2) if burst else None,
+            "webhook_requests": len(burst),
+            "delivered": delivered,
+            "final_state_sent": bool(burst) and burst[-1][2].get("active") == final_active,
+        }
+
+        # Snapshot start: new process warm-started from the snapshot written above
+        at = new_app(data_dir, webhooks.url, code)
+        result["snapshot_start"] = timed_run(at)
+
+        if measure_memory:
+            shutil.rmtree(data_dir, ignore_errors=True)
+            os.makedirs(data_dir)
+            at = new_app(data_dir, webhooks.url, code)
+            tracemalloc.start()
+            at.run()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["memory"] = {
+                "cold_start_peak_mb": round(peak / 2 ** 20, 2),
+                "retained_mb": round(current / 2 ** 20, 2),
+            }
+        return result
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def bench_resumable_upload(fake, code):
+    """Chunked upload with injected mid-chunk failures, then an abort and resume."""
+    app = {"__name__": "kitchen_manager", "__file__": APP_PATH}
+    exec(code, app)
+    # Measure throughput, not the retry backoff
+    app["UPLOAD_CHUNK_BACKOFF"] = 0
+    state_dir = tempfile.mkdtemp(prefix="kitchen-bench-uploads-")
+    try:
+        uploader = app["ResumableUploader"](
+            state_dir, app["Metrics"](), http=httpx.Client(transport=httpx.MockTransport(fake.handle))
+        )
+        chunks = -(-UPLOAD_SIZE // UPLOAD_CHUNK_SIZE)
+        data = os.urandom(UPLOAD_SIZE)
+
+        def upload(path, retries):
+            uploader.upload("http://supabase.bench", "bench-key", "bench", path, data,
+                            "application/octet-stream", chunk_size=UPLOAD_CHUNK_SIZE, retries=retries)
+
+        # Every Nth chunk drops halfway; only those chunks are resent
+        fake.patches = 0
+        fake.fail_patches = set(range(UPLOAD_FAIL_EVERY, 2 * chunks, UPLOAD_FAIL_EVERY))
+        start = time.perf_counter()
+        upload("public/flaky.bin", retries=3)
+        flaky_ms = (time.perf_counter() - start) * 1000
+        flaky_patches = fake.patches
+
+        # Connection lost for good halfway through, then the same file again
+        fake.patches = 0
+        fake.fail_patches = set(range(chunks // 2, 10 * chunks))
+        try:
+            upload("public/aborted.bin", retries=2)
+            aborted = False
+        except app["ResumableUploadError"]:
+            aborted = True
+        fake.fail_patches = set()
+        sent_before = fake.patches
+        start = time.perf_counter()
+        upload("public/aborted.bin", retries=2)
+        resume_ms = (time.perf_counter() - start) * 1000
+
+        return {
+            "size_mb": UPLOAD_SIZE / 2 ** 20,
+            "chunk_mb": UPLOAD_CHUNK_SIZE / 2 ** 20,
+            "flaky": {
+                "run_ms": round(flaky_ms, 2),
+                "chunks": chunks,
+                "patch_requests": flaky_patches,
+                "intact": fake.objects.get("bench/public/flaky.bin") == data,
+            },
+            "resume": {
+                "aborted": aborted,
+                "run_ms": round(resume_ms, 2),
+                "patch_requests": fake.patches - sent_before,
+                "intact": fake.objects.get("bench/public/aborted.bin") == data,
+            },
+            "uploader": uploader.stats(),
+        }
+    finally:
+        fake.fail_patches = set()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(APP_PATH), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "streamlit": st.__version__,
+        "platform": platform.platform(),
+    }
+
+# ===========================
+# REGRESSION CHECK
+# ===========================
+# (scenario, measurement) pairs compared against a baseline run
+TRACKED = [
+    ("cold_start", "run_ms"),
+    ("warm_rerun", "run_ms"),
+    ("refresh", "run_ms"),
+    ("search", "run_ms"),
+    ("toggle", "run_ms"),
+    ("snapshot_start", "run_ms"),
+]
+
+
+def find_regressions(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """List tracked measurements more than ``tolerance`` slower than the baseline."""
+    previous = {result["items"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get(result["items"])
+        if before is None:
+            continue
+        for scenario, key in TRACKED:
+            old, new = before.get(scenario, {}).get(key), result.get(scenario, {}).get(key)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append({
+                    "items": result["items"], "scenario": scenario, "measurement": key,
+                    "baseline": old, "current": new, "change": round(new / old - 1, 3),
+                })
+    return regressions
+
+# ===========================
+# MAIN
+# ===========================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="menu sizes to benchmark")
+    parser.add_argument("--webhook-latency", type=float, default=WEBHOOK_LATENCY, help="seconds per fake n8n call")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    fake = FakeSupabase()
+    fake.install()
+    webhooks = FakeWebhookServer(args.webhook_latency)
+    with open(APP_PATH, encoding="utf-8") as f:
+        code = compile(f.read(), APP_PATH, "exec")
+
+    try:
+        report = {
+            "environment": environment(),
+            "settings": {"webhook_latency": args.webhook_latency, "warm_reruns": WARM_RERUNS},
+            "results": [bench_size(count, fake, webhooks, code, not args.no_memory) for count in args.sizes],
+            "resumable_upload": bench_resumable_upload(fake, code),
+        }
+    finally:
+        webhooks.close()
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = find_regressions(report, json.load(f), args.tolerance)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,85 @@
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+import supabase
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.py calls st.set_page_config at import time; outside `streamlit run` that only logs warnings
+logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+import app  # noqa: E402
+from benchmark import FakeSupabase  # noqa: E402
+
+
+class FakeWebhookClient:
+    """Stands in for ``WebhookClient``: records posts and raises queued errors.
+
+    ``errors`` maps a URL to exceptions raised, one per call, before that URL
+    starts succeeding. ``on_post`` runs inside each call, before it returns.
+    """
+
+    def __init__(self):
+        self.posts = []
+        self.errors = {}
+        self.on_post = None
+
+    def post(self, url, payload, idempotent=False, name="webhook", headers=None, **options):
+        self.posts.append({"url": url, "payload": payload, "idempotent": idempotent, "headers": headers})
+        if self.on_post:
+            self.on_post(url, payload)
+        pending = self.errors.get(url)
+        if pending:
+            raise pending.pop(0)
+        return None
+
+
+@pytest.fixture
+def client():
+    return FakeWebhookClient()
+
+
+@pytest.fixture
+def outbox(tmp_path, client, monkeypatch):
+    """An outbox on a temp SQLite file whose rows only go out when the test calls ``drain``."""
+    monkeypatch.setattr(app.MutationOutbox, "_run", lambda self: None)
+    outbox = app.MutationOutbox(str(tmp_path / "outbox.sqlite3"), client)
+    yield outbox
+    outbox._db.close()
+
+
+@pytest.fixture
+def fake_supabase():
+    """The benchmark's in-process Supabase; ``fake_supabase.run`` sends operations to it like ``supabase_runner()``."""
+    fake = FakeSupabase()
+    client = supabase.create_client(
+        "http://supabase.test", "k" * 40,
+        options=supabase.ClientOptions(httpx_client=httpx.Client(transport=httpx.MockTransport(fake.handle)))
+    )
+    fake.run = lambda operation: operation(client)
+    return fake
+
+
+def menu_row(item_id, name="Dish", price=100, category="lunch", active=True, **metadata):
+    """A `kitchen_data` menu row as Supabase returns it."""
+    return {
+        "id": item_id,
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat(),
+        "metadata": {
+            "type": "menu",
+            "item_name": name,
+            "price": price,
+            "category": category,
+            "active": active,
+            "description": f"{name} description",
+            **metadata,
+        },
+    }
+
+
+def menu_item(item_id, **fields):
+    return app.MenuItem.from_row(menu_row(item_id, **fields))
@@ -0,0 +1,59 @@
+import csv
+import gzip
+import io
+import json
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import app
+
+FIELDS = {
+    "item_name": pa.string(),
+    "price": pa.float64(),
+    "active": pa.bool_(),
+    "other_image_urls": pa.list_(pa.string()),
+}
+PAGES = [
+    [
+        {"id": 1, "created_at": "2024-01-01", "metadata": {"item_name": "Dal", "price": "80", "active": "true",
+                                                            "other_image_urls": ["a", "b"]}},
+        {"id": 2, "created_at": "2024-01-02", "metadata": {"item_name": "Rice", "price": "cheap"}},
+    ],
+    [],
+    [{"id": 3, "created_at": None, "metadata": None}],
+]
+
+
+def test_export_csv():
+    output = io.BytesIO()
+
+    assert app.export_rows(iter(PAGES), "CSV", FIELDS, output) == 3
+
+    rows = list(csv.DictReader(io.StringIO(output.getvalue().decode())))
+    assert rows[0] == {"id": "1", "created_at": "2024-01-01", "item_name": "Dal", "price": "80.0", "active": "True",
+                       "other_image_urls": "a;b"}
+    assert rows[1]["price"] == ""
+    assert rows[2]["item_name"] == ""
+
+
+def test_export_gzipped_json_lines():
+    output = io.BytesIO()
+
+    app.export_rows(iter(PAGES), "JSON Lines", FIELDS, output, compress=True)
+
+    rows = [json.loads(line) for line in gzip.decompress(output.getvalue()).decode().splitlines()]
+    assert [row["id"] for row in rows] == ["1", "2", "3"]
+    assert rows[0]["other_image_urls"] == ["a", "b"]
+    assert rows[1]["price"] is None
+
+
+def test_export_parquet():
+    output = io.BytesIO()
+
+    assert app.export_rows(iter(PAGES), "Parquet", FIELDS, output) == 3
+
+    table = pq.read_table(io.BytesIO(output.getvalue()))
+    assert table.schema.field("price").type == pa.float64()
+    assert table.column("item_name").to_pylist() == ["Dal", "Rice", None]
+    assert table.column("active").to_pylist() == [True, None, None]
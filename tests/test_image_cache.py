@@ -0,0 +1,143 @@
+import functools
+import io
+import os
+import time
+
+import pytest
+from PIL import Image
+
+import app
+
+BUCKET_URL = "http://supabase.test/storage/v1/object/public/kitchen-images"
+
+
+def png(size=(800, 600), color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def bucket(tmp_path):
+    """A local directory standing in for the `kitchen-images` bucket."""
+    root = tmp_path / "bucket"
+    (root / "kitchen-images").mkdir(parents=True)
+    for name, color in (("a.png", "red"), ("b.png", "green"), ("c.png", "blue")):
+        (root / "kitchen-images" / name).write_bytes(png(color=color))
+    (root / "kitchen-images" / "broken.png").write_bytes(b"not an image")
+    return root
+
+
+class CountingFetch:
+    def __init__(self, source_dir):
+        self.urls = []
+        self.fetch = functools.partial(app.fetch_image_bytes, source_dir=str(source_dir))
+
+    def __call__(self, url):
+        self.urls.append(url)
+        return self.fetch(url)
+
+
+def make_cache(tmp_path, bucket, budget=10 ** 7):
+    fetch = CountingFetch(bucket)
+    return app.ImageCache(str(tmp_path / "cache"), budget, fetch, dimension=64, workers=1), fetch
+
+
+def load(cache, name):
+    """Look an image up and wait for the background load it starts."""
+    url = f"{BUCKET_URL}/{name}"
+    data = cache.get(url)
+    future = cache.prefetch(url)
+    if future is not None:
+        future.result()
+    return data
+
+
+def test_miss_serves_nothing_then_the_cached_thumbnail(tmp_path, bucket):
+    cache, fetch = make_cache(tmp_path, bucket)
+
+    assert load(cache, "a.png") is None
+    data = cache.get(f"{BUCKET_URL}/a.png")
+
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.format == "WEBP"
+        assert max(image.size) == 64
+    assert len(fetch.urls) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["loading"]) == (1, 1, 0)
+    assert stats["bytes_saved"] == 0
+
+
+def test_concurrent_misses_fetch_once(tmp_path, bucket):
+    cache, fetch = make_cache(tmp_path, bucket)
+    url = f"{BUCKET_URL}/a.png"
+
+    assert [cache.get(url) for _ in range(5)] == [None] * 5
+    cache.prefetch(url).result()
+
+    assert len(fetch.urls) == 1
+    assert cache.stats()["misses"] == 5
+    assert cache.stats()["hit_ratio"] == 0
+
+
+def test_least_recently_used_images_are_evicted_over_budget(tmp_path, bucket):
+    cache, _ = make_cache(tmp_path, bucket)
+    load(cache, "a.png")
+    cache.budget = cache.size * 2
+
+    load(cache, "b.png")
+    assert cache.get(f"{BUCKET_URL}/a.png") is not None
+    load(cache, "c.png")
+
+    assert cache.get(f"{BUCKET_URL}/b.png") is None
+    assert cache.get(f"{BUCKET_URL}/a.png") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.size <= cache.budget
+    assert len(os.listdir(cache.directory)) == 2
+
+
+def test_cached_images_survive_a_restart(tmp_path, bucket):
+    cache, _ = make_cache(tmp_path, bucket)
+    load(cache, "a.png")
+    load(cache, "b.png")
+
+    restarted, fetch = make_cache(tmp_path, bucket)
+
+    assert restarted.stats()["entries"] == 2
+    assert restarted.size == cache.size
+    assert restarted.get(f"{BUCKET_URL}/a.png") == cache.get(f"{BUCKET_URL}/a.png")
+    assert fetch.urls == []
+
+
+def test_failed_images_are_not_refetched_within_the_ttl(tmp_path, bucket, monkeypatch):
+    cache, fetch = make_cache(tmp_path, bucket)
+
+    for name in ("broken.png", "missing.png", "../../escape.png"):
+        assert load(cache, name) is None
+        assert load(cache, name) is None
+    assert len(fetch.urls) == 3
+    stats = cache.stats()
+    assert (stats["failures"], stats["misses"], stats["entries"]) == (3, 6, 0)
+
+    later = time.time() + app.IMAGE_FAILURE_TTL + 1
+    monkeypatch.setattr(app.time, "time", lambda: later)
+    load(cache, "broken.png")
+    assert len(fetch.urls) == 4
+
+
+def test_decompression_bombs_are_failures(tmp_path, bucket, monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+    cache, _ = make_cache(tmp_path, bucket)
+
+    assert load(cache, "a.png") is None
+    assert cache.stats()["failures"] == 1
+
+
+def test_clear_deletes_every_cached_image(tmp_path, bucket):
+    cache, _ = make_cache(tmp_path, bucket)
+    load(cache, "a.png")
+
+    cache.clear()
+
+    assert os.listdir(cache.directory) == []
+    assert cache.get(f"{BUCKET_URL}/a.png") is None
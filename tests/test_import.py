@@ -0,0 +1,89 @@
+import io
+import zipfile
+
+import pytest
+
+import app
+
+
+def import_row(**fields):
+    return {
+        "Item Name": "Kacchi",
+        "price": "450",
+        "description": "Mutton biryani",
+        "category": "Lunch",
+        "main_image": "https://img.test/kacchi.jpg",
+        **fields,
+    }
+
+
+def archive_with(*names, size=10):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in names:
+            archive.writestr(name, b"x" * size)
+    return app.archive_images(zipfile.ZipFile(buffer))
+
+
+def test_normalize_import_row_maps_aliases_and_coerces_values():
+    fields, errors = app.normalize_import_row(
+        import_row(basket_price="0", spice_level="None", popular="yes", other_images="a.jpg; ;https://img.test/b.jpg"),
+        archive_with("photos/A.JPG")
+    )
+
+    assert errors == []
+    assert fields["name"] == "Kacchi"
+    assert fields["price"] == 450.0
+    assert fields["basket_price"] is None
+    assert fields["category"] == "lunch"
+    assert fields["spice_level"] is None
+    assert fields["popular"] is True
+    assert fields["seasonal"] is False
+    assert fields["other_images"] == ["a.jpg", "https://img.test/b.jpg"]
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"Item Name": ""}, "name is required"),
+    ({"description": None}, "description is required"),
+    ({"category": "brunch"}, "category must be one of"),
+    ({"spice_level": "nuclear"}, "spice_level must be one of"),
+    ({"price": "0"}, "price must be greater than 0"),
+    ({"price": "free"}, "price is not a number"),
+    ({"basket_price": "n/a"}, "basket_price is not a number"),
+    ({"main_image": ""}, "main_image is required"),
+    ({"main_image": "missing.jpg"}, "image missing.jpg is not in the archive"),
+])
+def test_normalize_import_row_reports_errors(overrides, message):
+    _, errors = app.normalize_import_row(import_row(**overrides), {})
+
+    assert any(message in error for error in errors)
+
+
+def test_normalize_import_row_rejects_oversized_archive_images(monkeypatch):
+    monkeypatch.setattr(app, "IMPORT_MAX_IMAGE_BYTES", 5)
+
+    _, errors = app.normalize_import_row(import_row(main_image="big.png"), archive_with("big.png", size=6))
+
+    assert errors == ["image big.png is larger than 0 MB"]
+
+
+def test_normalize_import_row_rejects_non_objects():
+    assert app.normalize_import_row(["Kacchi"], {}) == (None, ["row is not an object"])
+
+
+def test_validate_import_checks_names_across_the_file_and_menu():
+    rows = [
+        import_row(),
+        import_row(**{"Item Name": "kacchi"}),
+        import_row(**{"Item Name": "Dal"}),
+        import_row(**{"Item Name": "Rice", "price": "-1"}),
+        "not a row",
+    ]
+
+    valid, report = app.validate_import(rows, {}, existing_names={"dal"})
+
+    assert [number for number, _ in valid] == [1]
+    assert [entry["status"] for entry in report] == ["✅ valid"] + ["❌ invalid"] * 4
+    assert report[1]["message"] == "duplicate name in this file"
+    assert report[2]["message"] == "an item with this name is already on the menu"
+    assert report[3]["message"] == "price must be greater than 0"
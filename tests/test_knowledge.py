@@ -0,0 +1,157 @@
+import io
+
+import pytest
+
+import app
+
+
+def chunks_of(pages, size, overlap):
+    return list(app.chunk_text(iter(pages), size, overlap))
+
+
+def test_short_text_is_one_chunk():
+    assert chunks_of([(1, "  Mutton   kacchi\nbiryani ")], 100, 10) == [(1, "Mutton kacchi biryani")]
+
+
+def test_chunks_respect_size_and_break_between_words():
+    text = " ".join(f"word{n}" for n in range(200))
+
+    chunks = chunks_of([(1, text)], 100, 20)
+
+    assert len(chunks) > 1
+    for _, chunk in chunks:
+        assert len(chunk) <= 100
+        assert all(word.startswith("word") and word[4:].isdigit() for word in chunk.split(" "))
+
+
+def test_chunks_overlap_and_cover_every_word():
+    words = [f"w{n}" for n in range(300)]
+
+    chunks = [chunk.split(" ") for _, chunk in chunks_of([(1, " ".join(words))], 60, 15)]
+
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current[0] in previous
+    covered = [word for chunk in chunks for word in chunk]
+    assert set(covered) == set(words)
+    assert covered[-1] == words[-1]
+
+
+def test_chunks_report_the_page_they_start_on():
+    pages = [(1, "a " * 30), (2, ""), (3, "b " * 30)]
+
+    chunks = chunks_of(pages, 40, 0)
+
+    assert chunks[0][0] == 1
+    assert all(page == 1 for page, chunk in chunks if chunk.startswith("a"))
+    assert all(page == 3 for page, chunk in chunks if chunk.startswith("b"))
+    assert chunks[-1][0] == 3
+
+
+def test_empty_pages_give_no_chunks():
+    assert chunks_of([(1, ""), (2, "   ")], 100, 10) == []
+
+
+@pytest.mark.parametrize("size, overlap", [(100, 100), (100, -1)])
+def test_overlap_must_be_smaller_than_size(size, overlap):
+    with pytest.raises(ValueError):
+        chunks_of([(1, "text")], size, overlap)
+
+
+class RecordingSupabase:
+    """Records the `kitchen_data` writes ``ingest_pdf`` sends, failing the insert numbered ``fail_insert``."""
+
+    def __init__(self, fail_insert=None):
+        self.inserted = []
+        self.deletes = []
+        self.fail_insert = fail_insert
+        self._filters = None
+
+    def run(self, operation):
+        return operation(self)
+
+    def table(self, name):
+        assert name == "kitchen_data"
+        return self
+
+    def insert(self, rows):
+        if len(self.inserted) + 1 == self.fail_insert:
+            raise RuntimeError("insert failed")
+        self.inserted.append([dict(row) for row in rows])
+        return self
+
+    def delete(self):
+        self._filters = []
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(("eq", column, value))
+        return self
+
+    def neq(self, column, value):
+        self._filters.append(("neq", column, value))
+        return self
+
+    def execute(self):
+        if self._filters is not None:
+            self.deletes.append(self._filters)
+            self._filters = None
+
+
+class FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        return self.text
+
+
+class FakePdfReader:
+    def __init__(self, file):
+        self.pages = [FakePage(" ".join(f"page{number}word{n}" for n in range(40))) for number in range(1, 6)]
+
+
+@pytest.fixture
+def pdf(monkeypatch):
+    monkeypatch.setattr(app, "PdfReader", FakePdfReader)
+    return io.BytesIO(b"%PDF-1.4 menu handbook")
+
+
+SETTINGS = {"knowledge_chunk_size": 200, "knowledge_chunk_overlap": 0, "knowledge_insert_batch": 2}
+
+
+def test_ingest_inserts_in_batches_then_replaces_the_earlier_ingest(pdf):
+    supabase = RecordingSupabase()
+
+    chunks, pages = app.ingest_pdf(supabase.run, pdf, "handbook.pdf", settings=SETTINGS)
+
+    rows = [row for batch in supabase.inserted for row in batch]
+    assert (len(rows), pages) == (chunks, 5)
+    assert all(len(batch) <= 2 for batch in supabase.inserted)
+    assert [row["metadata"]["chunk"] for row in rows] == list(range(chunks))
+    [ingest_id] = {row["metadata"]["ingest_id"] for row in rows}
+    [document_id] = {row["metadata"]["document_id"] for row in rows}
+    assert supabase.deletes == [[("eq", "metadata->>document_id", document_id),
+                                 ("neq", "metadata->>ingest_id", ingest_id)]]
+
+
+def test_failed_insert_removes_the_partial_ingest_and_keeps_the_earlier_one(pdf):
+    supabase = RecordingSupabase(fail_insert=3)
+
+    with pytest.raises(RuntimeError, match="insert failed"):
+        app.ingest_pdf(supabase.run, pdf, "handbook.pdf", settings=SETTINGS)
+
+    assert len(supabase.inserted) == 2
+    [ingest_id] = {row["metadata"]["ingest_id"] for batch in supabase.inserted for row in batch}
+    assert supabase.deletes == [[("eq", "metadata->>ingest_id", ingest_id)]]
+
+
+def test_failed_cleanup_still_raises_the_original_error(pdf):
+    supabase = RecordingSupabase(fail_insert=1)
+
+    def unreachable():
+        raise ConnectionError("down")
+
+    supabase.execute = unreachable
+
+    with pytest.raises(RuntimeError, match="insert failed"):
+        app.ingest_pdf(supabase.run, pdf, "handbook.pdf", settings=SETTINGS)
@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+
+
+class BlockingLoader:
+    """A loader that holds every call until ``release`` and counts them."""
+
+    def __init__(self, value="rows"):
+        self.value = value
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.value
+
+
+def test_hit_within_the_ttl_skips_the_loader():
+    cache = app.MenuCache()
+    calls = []
+
+    for _ in range(3):
+        assert cache.get_or_load("menu", 60, lambda: calls.append(1) or "rows") == "rows"
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 1
+
+
+def test_expired_entry_is_loaded_again():
+    cache = app.MenuCache()
+    calls = []
+
+    cache.get_or_load("menu", 0, lambda: calls.append(1))
+    cache.get_or_load("menu", 0, lambda: calls.append(1))
+
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_load():
+    cache = app.MenuCache()
+    loader = BlockingLoader()
+
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(cache.get_or_load, "menu", 60, loader) for _ in range(8)]
+        assert loader.started.wait(5)
+        loader.release.set()
+        results = [future.result(5) for future in futures]
+
+    assert results == ["rows"] * 8
+    assert loader.calls == 1
+    assert cache._load_locks == {}
+
+
+def test_other_keys_load_while_one_is_loading():
+    cache = app.MenuCache()
+    slow = BlockingLoader()
+
+    with ThreadPoolExecutor(2) as pool:
+        pending = pool.submit(cache.get_or_load, "slow", 60, slow)
+        assert slow.started.wait(5)
+        assert cache.get_or_load("fast", 60, lambda: "fast rows") == "fast rows"
+        slow.release.set()
+        assert pending.result(5) == "rows"
+
+
+def test_bypass_reloads_and_refreshes_the_entry():
+    cache = app.MenuCache()
+    cache.get_or_load("menu", 60, lambda: "old")
+
+    assert cache.get_or_load("menu", 60, lambda: "new", bypass=True) == "new"
+    assert cache.get_or_load("menu", 60, lambda: "unused") == "new"
+    assert cache.stats()["bypasses"] == 1
+
+
+def test_invalidate_drops_entries():
+    cache = app.MenuCache()
+    cache.get_or_load("menu", 60, lambda: "old")
+
+    cache.invalidate()
+
+    assert cache.get_or_load("menu", 60, lambda: "new") == "new"
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_load_overlapping_an_invalidation_is_not_cached():
+    cache = app.MenuCache()
+    loader = BlockingLoader("stale")
+
+    with ThreadPoolExecutor(1) as pool:
+        pending = pool.submit(cache.get_or_load, "menu", 60, loader)
+        assert loader.started.wait(5)
+        cache.invalidate()
+        loader.release.set()
+        assert pending.result(5) == "stale"
+
+    assert cache.get_or_load("menu", 60, lambda: "fresh") == "fresh"
+
+
+def test_patch_updates_the_entry_in_place():
+    cache = app.MenuCache()
+    cache.get_or_load("menu", 60, lambda: [1, 2])
+
+    cache.patch("menu", lambda items: items + [3])
+    cache.patch("missing", lambda items: items + [4])
+
+    assert cache.get_or_load("menu", 60, lambda: "unused") == [1, 2, 3]
+    assert "missing" not in cache._entries
+
+
+def test_load_overlapping_a_patch_of_its_key_is_not_cached():
+    cache = app.MenuCache()
+    loader = BlockingLoader([1])
+
+    with ThreadPoolExecutor(1) as pool:
+        pending = pool.submit(cache.get_or_load, "menu", 60, loader)
+        assert loader.started.wait(5)
+        cache.patch_matching(lambda key: key == "menu", lambda items: items + [2])
+        loader.release.set()
+        pending.result(5)
+
+    assert cache.get_or_load("menu", 60, lambda: [1, 2]) == [1, 2]
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import app
+
+from .conftest import menu_row
+
+
+@pytest.mark.parametrize("value, expected", [
+    (250, 250.0),
+    ("99.5", 99.5),
+    (None, 0.0),
+    ("", 0.0),
+])
+def test_parse_price(value, expected):
+    assert app.parse_price(value) == expected
+
+
+def test_parse_price_names_the_field_in_errors():
+    with pytest.raises(app.MenuRowError, match="basket_price is not a number"):
+        app.parse_price("cheap", "basket_price")
+
+
+def test_from_row_normalises_metadata():
+    row = menu_row(7, name="Kacchi", price="450", active="true", popular="yes", basket_price="",
+                   main_image_url="http://img/full.webp", main_image_thumbnail_url="http://img/thumb.webp")
+
+    item = app.MenuItem.from_row(row)
+
+    assert item.id == 7
+    assert item.name == "Kacchi"
+    assert item.price == 450.0
+    assert item.basket_price is None
+    assert item.active is True
+    assert item.popular is True
+    assert item.category == "lunch"
+    assert item.image_url == "http://img/thumb.webp"
+    assert item.created_at == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert item.metadata is row["metadata"]
+    assert not item.provisional
+
+
+def test_from_row_defaults():
+    item = app.MenuItem.from_row({"id": 1, "metadata": {}})
+
+    assert item.name == "Unnamed Item"
+    assert item.description == "No description"
+    assert item.category == "general"
+    assert item.active is False
+    assert item.created_at is None
+    assert item.image_url is None
+
+
+@pytest.mark.parametrize("row, message", [
+    ({"id": 1, "metadata": "oops"}, "metadata is str"),
+    ({"metadata": {}}, "row has no id"),
+    ({"id": 1, "created_at": "yesterday", "metadata": {}}, "created_at is not a timestamp"),
+    ({"id": 1, "metadata": {"price": "free"}}, "price is not a number"),
+])
+def test_from_row_rejects_malformed_rows(row, message):
+    with pytest.raises(app.MenuRowError, match=message):
+        app.MenuItem.from_row(row)
+
+
+def test_parse_menu_rows_collects_problems():
+    items, problems = app.parse_menu_rows([menu_row(1), {"id": 2, "metadata": None}])
+
+    assert list(items) == [1]
+    assert list(problems) == [2]
@@ -0,0 +1,48 @@
+import pytest
+
+import app
+
+from .conftest import menu_row
+
+FLAGS = [True, False, "true", "TRUE", " Yes ", "yes", "1", 1, 0, "no", "false", "", None]
+
+
+def run_query(fake_supabase, **options):
+    return fake_supabase.run(lambda supabase: app.build_menu_query(supabase, **options).execute())
+
+
+@pytest.mark.parametrize("status", ["Active", "Inactive"])
+def test_status_filter_agrees_with_parse_flag(fake_supabase, status):
+    fake_supabase.rows = [menu_row(item_id, active=flag) for item_id, flag in enumerate(FLAGS, start=1)]
+    fake_supabase.rows.append({"id": 99, "created_at": None, "metadata": {"type": "menu"}})
+
+    ids = [row["id"] for row in run_query(fake_supabase, status=status).data]
+
+    expected = [row["id"] for row in fake_supabase.rows
+                if app.MenuItem.from_row(row).active == (status == "Active")]
+    assert ids == expected
+
+
+def test_category_sort_and_window(fake_supabase):
+    fake_supabase.rows = [
+        menu_row(1, price=300, category="lunch"),
+        menu_row(2, price=80, category="lunch"),
+        menu_row(3, price=60, category="breakfast"),
+        menu_row(4, price=120, category="lunch"),
+        {"id": 5, "created_at": None, "metadata": {"type": "knowledge"}},
+    ]
+
+    response = fake_supabase.run(lambda supabase: app.build_menu_query(
+        supabase, category="lunch", sort_by="Price (High to Low)", count="exact"
+    ).range(1, 2).execute())
+
+    assert [row["id"] for row in response.data] == [4, 2]
+    assert response.count == 3
+
+
+def test_projection(fake_supabase):
+    fake_supabase.rows = [menu_row(1)]
+
+    [row] = run_query(fake_supabase, columns="id").data
+
+    assert row == {"id": 1}
@@ -0,0 +1,74 @@
+import gzip
+
+import httpx
+import pytest
+
+import app
+
+from .conftest import menu_row
+
+
+def synced_state(path, rows):
+    state = app.MenuSyncState(str(path))
+    state.replace_rows(rows)
+    state.watermark = "2024-01-01T00:05:00+00:00"
+    state.synced_at = 1700000000.0
+    state.save_snapshot()
+    return state
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "menu_snapshot.json.gz"
+    synced_state(path, [menu_row(1, name="Dal"), menu_row(2), {"id": 3, "metadata": {"price": "free"}}])
+
+    restored = app.MenuSyncState(str(path))
+
+    assert sorted(restored.items) == [1, 2]
+    assert restored.items[1].name == "Dal"
+    assert list(restored.problems) == [3]
+    assert restored.watermark == "2024-01-01T00:05:00+00:00"
+    assert restored.synced_at == 1700000000.0
+    assert not restored.live
+    assert not (tmp_path / "menu_snapshot.json.gz.tmp").exists()
+
+
+@pytest.mark.parametrize("content", [b"not gzip", gzip.compress(b"{truncated"), gzip.compress(b'{"watermark": null}')])
+def test_corrupt_snapshot_starts_empty(tmp_path, content):
+    path = tmp_path / "menu_snapshot.json.gz"
+    path.write_bytes(content)
+
+    state = app.MenuSyncState(str(path))
+
+    assert (state.rows, state.items, state.watermark) == ({}, {}, None)
+
+
+def test_missing_snapshot_starts_empty(tmp_path):
+    state = app.MenuSyncState(str(tmp_path / "menu_snapshot.json.gz"))
+
+    assert state.rows == {}
+
+
+def test_sync_saves_the_snapshot_for_the_next_process(tmp_path, fake_supabase):
+    path = tmp_path / "menu_snapshot.json.gz"
+    fake_supabase.rows = [menu_row(item_id) for item_id in range(1, 4)]
+
+    app.sync_menu_rows(state=app.MenuSyncState(str(path)), run=fake_supabase.run, cursor="created_at", interval=300,
+                       metrics=app.Metrics())
+
+    assert sorted(app.MenuSyncState(str(path)).items) == [1, 2, 3]
+
+
+def test_failed_sync_keeps_serving_the_snapshot(tmp_path):
+    path = tmp_path / "menu_snapshot.json.gz"
+    synced_state(path, [menu_row(1), menu_row(2)])
+    state = app.MenuSyncState(str(path))
+
+    def down(operation):
+        raise httpx.ConnectError("unreachable")
+
+    with pytest.raises(httpx.ConnectError):
+        app.sync_menu_rows(state=state, run=down, cursor="created_at", interval=300, metrics=app.Metrics())
+
+    assert sorted(state.items) == [1, 2]
+    assert not state.live
+    assert sorted(app.MenuSyncState(str(path)).items) == [1, 2]
@@ -0,0 +1,90 @@
+import app
+
+from .conftest import menu_row
+
+DELETE_URL = "http://n8n.test/delete"
+
+
+def synced_row(item_id, minute=0, **fields):
+    row = menu_row(item_id, **fields)
+    row["updated_at"] = f"2024-01-01T00:{minute:02d}:00+00:00"
+    return row
+
+
+def sync(state, fake_supabase, full=False):
+    items = app.sync_menu_rows(full=full, state=state, run=fake_supabase.run, cursor="updated_at", interval=300,
+                               metrics=app.Metrics())
+    return sorted(item.id for item in items)
+
+
+def test_merge_rows_parses_only_changed_rows():
+    state = app.MenuSyncState()
+    state.replace_rows([menu_row(1), menu_row(2)])
+    kept = state.items[1]
+
+    assert state.merge_rows([menu_row(1), menu_row(2, name="Dal"), menu_row(3)])
+
+    assert state.items[1] is kept
+    assert state.items[2].name == "Dal"
+    assert sorted(state.items) == [1, 2, 3]
+    assert not state.merge_rows([menu_row(3)])
+
+
+def test_merge_rows_applies_tombstones_and_tracks_malformed_rows():
+    state = app.MenuSyncState()
+    state.replace_rows([menu_row(1), menu_row(2)])
+
+    assert state.merge_rows([menu_row(1, deleted=True), {"id": 2, "metadata": {"price": "free"}}])
+
+    assert list(state.rows) == [2]
+    assert state.items == {}
+    assert list(state.problems) == [2]
+    assert not state.merge_rows([menu_row(9, deleted=True)])
+
+
+def test_delta_sync_fetches_only_changed_rows(fake_supabase):
+    fake_supabase.rows = [synced_row(item_id, minute=item_id) for item_id in range(1, 6)]
+    state = app.MenuSyncState()
+    assert sync(state, fake_supabase) == [1, 2, 3, 4, 5]
+    assert state.watermark == "2024-01-01T00:05:00+00:00"
+
+    fake_supabase.rows[1] = synced_row(2, minute=10, name="Dal")
+    fake_supabase.rows.append(synced_row(6, minute=10))
+    fake_supabase.rows[0] = synced_row(1, minute=11, deleted=True)
+
+    assert sync(state, fake_supabase) == [2, 3, 4, 5, 6]
+    assert state.items[2].name == "Dal"
+    assert (state.full_syncs, state.delta_syncs) == (1, 1)
+    # Three changed rows plus row 5, re-read inside the overlap behind the watermark
+    assert state.rows_fetched == 5 + 4
+
+
+def test_delivered_deletes_leave_the_held_menu(tmp_path, client, fake_supabase, monkeypatch):
+    fake_supabase.rows = [synced_row(item_id) for item_id in range(1, 6)]
+    state = app.MenuSyncState()
+    sync(state, fake_supabase)
+    monkeypatch.setattr(app.MutationOutbox, "_run", lambda self: None)
+    outbox = app.MutationOutbox(str(tmp_path / "outbox.sqlite3"), client, on_sent=state.forget_sent)
+
+    def n8n(url, payload):
+        # The workflow hard-deletes the rows, which a delta sync cannot see
+        deleted = payload.get("item_ids") or [payload.get("item_id")]
+        fake_supabase.rows = [row for row in fake_supabase.rows if row["id"] not in deleted]
+    client.on_post = n8n
+    outbox.enqueue("delete", DELETE_URL, {"item_id": 3}, item_id=3, idempotent=True)
+    outbox.enqueue("delete_batch", DELETE_URL, {"item_ids": [1, 5]}, idempotent=True)
+    outbox.drain()
+
+    assert sorted(state.items) == [2, 4]
+    assert sync(state, fake_supabase) == [2, 4]
+    outbox._db.close()
+
+
+def test_forget_sent_ignores_other_kinds():
+    state = app.MenuSyncState()
+    state.replace_rows([menu_row(1)])
+
+    state.forget_sent("status", {"item_id": 1, "active": False, "availability": "available"})
+    state.forget_sent("delete", {"item_id": 2})
+
+    assert list(state.items) == [1]
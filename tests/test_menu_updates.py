@@ -0,0 +1,172 @@
+from types import SimpleNamespace
+
+import pytest
+
+import app
+
+from .conftest import menu_item, menu_row
+
+
+def test_apply_mutation_status_and_delete():
+    items = [menu_item(1), menu_item(2), menu_item(3)]
+
+    updated = app.apply_mutation(items, "status_batch", {"item_ids": [1, 3], "active": False, "availability": "sold_out"})
+    assert [item.active for item in updated] == [False, True, False]
+    assert updated[0].metadata["availability"] == "sold_out"
+    assert updated[1] is items[1]
+    assert items[0].active is True
+
+    assert [item.id for item in app.apply_mutation(items, "delete", {"item_id": 2})] == [1, 3]
+    assert [item.id for item in app.apply_mutation(items, "delete_batch", {"item_ids": [1, 2]})] == [3]
+
+
+def test_apply_mutation_adds_provisional_items():
+    items = [menu_item(1)]
+
+    added = app.apply_mutation(items, "add_batch", {"items": [{"name": "Dal", "price": 80}, {"name": "Rice"}]}, outbox_id=9)
+
+    assert [item.id for item in added] == [1, "pending-9-0", "pending-9-1"]
+    assert added[1].name == "Dal"
+    assert added[1].provisional
+    assert added[1].active
+    assert app.apply_mutation(items, "add", {"name": "Dal"}, outbox_id=4)[-1].id == "pending-4"
+
+
+def test_apply_page_mutation_drops_items_leaving_the_filter():
+    page = app.MenuPage("Active", "All", 0, [menu_item(1), menu_item(2)], 20)
+
+    updated = app.apply_page_mutation(page, "status", {"item_id": 2, "active": False, "availability": "available"})
+
+    assert [item.id for item in updated.items] == [1]
+    assert updated.total == 19
+    assert page.total == 20
+
+
+def test_apply_page_mutation_shows_adds_on_the_first_page_only():
+    first = app.MenuPage("All", "lunch", 0, [menu_item(1)], 30)
+    later = app.MenuPage("All", "lunch", 20, [menu_item(21)], 30)
+    other = app.MenuPage("All", "dinner", 0, [], 5)
+    payload = {"name": "Dal", "category": "lunch"}
+
+    assert [item.id for item in app.apply_page_mutation(first, "add", payload, 3).items] == ["pending-3", 1]
+    assert app.apply_page_mutation(first, "add", payload, 3).total == 31
+    assert [item.id for item in app.apply_page_mutation(later, "add", payload, 3).items] == [21]
+    assert app.apply_page_mutation(later, "add", payload, 3).total == 31
+    unchanged = app.apply_page_mutation(other, "add", payload, 3)
+    assert (unchanged.items, unchanged.total) == (other.items, other.total)
+
+
+def test_apply_mutation_applies_an_add_once():
+    payload = {"items": [{"name": "Dal"}, {"name": "Rice"}]}
+    items = app.apply_mutation([menu_item(1)], "add_batch", payload, outbox_id=9)
+
+    again = app.apply_mutation(items, "add_batch", payload, outbox_id=9)
+
+    assert again is items
+    assert [item.id for item in app.apply_mutation(items, "add", {"name": "Dal"}, outbox_id=10)][-1] == "pending-10"
+
+
+def test_apply_page_mutation_applies_an_add_once():
+    payload = {"name": "Dal", "category": "lunch"}
+    for offset in (0, 20):
+        page = app.apply_page_mutation(app.MenuPage("All", "All", offset, [menu_item(1)], 30), "add", payload, 3)
+
+        again = app.apply_page_mutation(page, "add", payload, 3)
+
+        assert again.total == 31
+        assert [item.id for item in again.items] == [item.id for item in page.items]
+
+
+def test_add_loaded_before_its_patch_is_not_duplicated(monkeypatch, outbox):
+    cache = app.MenuCache()
+    monkeypatch.setattr(app, "get_menu_cache", lambda: cache)
+    cache.get_or_load("menu", 60, lambda: [menu_item(1)])
+    cache.get_or_load(("page", "All", "All", "Name", 0, 12), 60, lambda: app.MenuPage("All", "All", 0, [menu_item(1)], 1))
+    payload = {"name": "Dal", "category": "lunch"}
+    outbox_id = outbox.enqueue("add", "http://n8n.test/add", payload)
+
+    # Another session reloads between the enqueue and the patch
+    cache.invalidate()
+    cache.get_or_load("menu", 60, lambda: app.apply_mutation([menu_item(1)], "add", payload, outbox_id))
+    cache.get_or_load(
+        ("page", "All", "All", "Name", 0, 12), 60,
+        lambda: app.apply_page_mutation(app.MenuPage("All", "All", 0, [menu_item(1)], 1), "add", payload, outbox_id)
+    )
+    app.patch_menu_items("add", payload, outbox_id)
+
+    assert [item.id for item in cache.get_or_load("menu", 60, list)] == [1, f"pending-{outbox_id}"]
+    page = cache.get_or_load(("page", "All", "All", "Name", 0, 12), 60, list)
+    assert [item.id for item in page.items] == [f"pending-{outbox_id}", 1]
+    assert page.total == 2
+
+
+def held_menu():
+    return app.MenuIndex([
+        menu_item(1, name="Curry", price=300, category="lunch"),
+        menu_item(2, name="Biryani", price=450, category="lunch", active=False),
+        menu_item(3, name="Alu Paratha", price=60, category="breakfast"),
+        menu_item(4, name="Dal", price=80, category="lunch"),
+    ])
+
+
+@pytest.mark.parametrize("status, category, sort_by, expected", [
+    ("All", "All", "Name", [3, 2, 1, 4]),
+    ("All", "All", "Price (High to Low)", [2, 1, 4, 3]),
+    ("Active", "lunch", "Price (Low to High)", [4, 1]),
+    ("Inactive", "All", "Name", [2]),
+    ("All", "dinner", "Name", []),
+])
+def test_menu_index_query(status, category, sort_by, expected):
+    assert [item.id for item in held_menu().query(status, category, sort_by)] == expected
+
+
+def test_held_menu_page_is_a_window_of_the_query():
+    page = app.held_menu_page(held_menu(), "All", "All", "Name", offset=1, limit=2)
+
+    assert [item.id for item in page.items] == [2, 1]
+    assert page.total == 4
+    assert page.held
+
+
+@pytest.fixture
+def menu_state(monkeypatch, outbox):
+    state = app.MenuSyncState()
+    state.live = True
+    monkeypatch.setattr(app, "get_menu_sync_state", lambda: state)
+    monkeypatch.setattr(app, "get_menu_cache", app.MenuCache)
+    monkeypatch.setattr(app, "get_outbox", lambda: outbox)
+    return state
+
+
+def test_fetch_menu_page_pages_in_the_database_while_live(monkeypatch, menu_state):
+    response = SimpleNamespace(data=[menu_row(1, name="Curry")], count=9)
+    monkeypatch.setattr(app, "run_supabase", lambda operation: response)
+
+    page = app.fetch_menu_page(held_menu(), limit=2)
+
+    assert [item.id for item in page.items] == [1]
+    assert page.total == 9
+    assert not page.held
+
+
+@pytest.mark.parametrize("live, last_error", [(False, None), (True, "supabase down")])
+def test_fetch_menu_page_serves_the_held_menu_without_a_live_sync(monkeypatch, menu_state, live, last_error):
+    menu_state.live, menu_state.last_error = live, last_error
+    monkeypatch.setattr(app, "run_supabase", lambda operation: pytest.fail("queried the database"))
+
+    page = app.fetch_menu_page(held_menu(), "Active", "All", "Name", limit=2)
+
+    assert [item.id for item in page.items] == [3, 1]
+    assert page.total == 3
+    assert page.held
+
+
+def test_fetch_menu_page_falls_back_when_the_page_query_fails(monkeypatch, menu_state):
+    def down(operation):
+        raise ConnectionError("supabase down")
+    monkeypatch.setattr(app, "run_supabase", down)
+
+    page = app.fetch_menu_page(held_menu(), limit=10)
+
+    assert [item.id for item in page.items] == [3, 2, 1, 4]
+    assert page.held
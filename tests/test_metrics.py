@@ -0,0 +1,66 @@
+import pytest
+
+import app
+
+
+def test_snapshot_reports_percentiles_over_the_window():
+    metrics = app.Metrics(window=100)
+    for ms in range(1, 201):
+        metrics.observe("menu_load", ms / 1000)
+
+    span = metrics.snapshot()["spans"]["menu_load"]
+
+    # All-time count and total, percentiles over the last 100 samples only
+    assert (span["count"], span["total_ms"]) == (200, pytest.approx(20100))
+    assert span["mean_ms"] == pytest.approx(100.5)
+    assert (span["p50_ms"], span["p95_ms"], span["p99_ms"], span["max_ms"]) == (151, 196, 200, 200)
+
+
+def test_span_times_the_block_even_when_it_raises():
+    metrics = app.Metrics()
+
+    with pytest.raises(ValueError):
+        with metrics.span("webhook"):
+            raise ValueError("bad payload")
+
+    assert metrics.snapshot()["spans"]["webhook"]["count"] == 1
+
+
+def test_counters_and_reset():
+    metrics = app.Metrics()
+    metrics.count("webhook_retries")
+    metrics.count("menu_rows_fetched", 40)
+    metrics.count("webhook_retries")
+
+    assert metrics.snapshot()["counters"] == {"menu_rows_fetched": 40, "webhook_retries": 2}
+
+    metrics.reset()
+    assert metrics.snapshot() == {"enabled": True, "spans": {}, "counters": {}}
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = app.Metrics(enabled=False)
+
+    with metrics.span("menu_load") as span:
+        pass
+    metrics.count("webhook_retries")
+
+    assert span is None
+    assert metrics.snapshot() == {"enabled": False, "spans": {}, "counters": {}}
+
+
+def test_prometheus_exposition():
+    metrics = app.Metrics()
+    metrics.observe("menu_load", 0.25)
+    metrics.count("image-cache hits", 3)
+
+    lines = metrics.prometheus().splitlines()
+
+    assert lines[:2] == [
+        "# HELP kitchen_manager_operation_seconds Duration of instrumented operations over the recent window.",
+        "# TYPE kitchen_manager_operation_seconds summary",
+    ]
+    assert 'kitchen_manager_operation_seconds{operation="menu_load",quantile="0.99"} 0.25' in lines
+    assert 'kitchen_manager_operation_seconds_sum{operation="menu_load"} 0.25' in lines
+    assert 'kitchen_manager_operation_seconds_count{operation="menu_load"} 1' in lines
+    assert lines[-2:] == ["# TYPE kitchen_manager_image_cache_hits_total counter", "kitchen_manager_image_cache_hits_total 3"]
@@ -0,0 +1,262 @@
+import json
+
+import pytest
+import requests
+
+import app
+
+STATUS_URL = "http://n8n.test/status"
+DELETE_URL = "http://n8n.test/delete"
+ADD_URL = "http://n8n.test/add"
+BATCH_URL = "http://n8n.test/status-batch"
+
+
+def status(outbox, item_id, active=True, **options):
+    return outbox.enqueue(
+        "status", STATUS_URL, {"item_id": item_id, "active": active, "availability": "available"},
+        item_id=item_id, idempotent=True, **options
+    )
+
+
+def make_due(outbox):
+    outbox._query("UPDATE outbox SET next_attempt_at = 0")
+
+
+def sent(client):
+    return [(post["url"], post["payload"].get("item_id", post["payload"].get("item_ids"))) for post in client.posts]
+
+
+def test_drain_sends_rows_in_order_and_removes_them(outbox, client):
+    status(outbox, 1)
+    outbox.enqueue("delete", DELETE_URL, {"item_id": 2}, item_id=2, idempotent=True)
+    status(outbox, 3, active=False)
+
+    outbox.drain()
+
+    assert sent(client) == [(STATUS_URL, 1), (DELETE_URL, 2), (STATUS_URL, 3)]
+    assert outbox.rows() == []
+    assert outbox.sent == 3
+
+
+def test_every_send_carries_an_idempotency_key(outbox, client):
+    row_id = status(outbox, 1)
+    client.errors[STATUS_URL] = [requests.exceptions.ReadTimeout("slow")]
+
+    outbox.drain()
+    make_due(outbox)
+    outbox.drain()
+
+    keys = [post["headers"]["Idempotency-Key"] for post in client.posts]
+    assert len(keys) == 2
+    assert keys[0] == keys[1]
+    assert keys[0].startswith(f"kitchen-outbox-{row_id}-")
+
+
+def test_failed_row_holds_back_later_rows_for_the_same_item_only(outbox, client):
+    status(outbox, 1, active=False)
+    status(outbox, 1, active=True)
+    status(outbox, 2)
+    client.errors[STATUS_URL] = [requests.exceptions.ConnectTimeout("down")]
+
+    outbox.drain()
+
+    assert sent(client) == [(STATUS_URL, 1), (STATUS_URL, 2)]
+    remaining = outbox.rows()
+    assert [(row["item_id"], row["attempts"]) for row in remaining] == [("1", 1), ("1", 0)]
+
+    make_due(outbox)
+    outbox.drain()
+
+    assert [post["payload"]["active"] for post in client.posts if post["payload"]["item_id"] == 1] == [False, False, True]
+    assert outbox.rows() == []
+
+
+def test_row_not_yet_due_holds_back_later_rows_for_its_item(outbox, client):
+    status(outbox, 1, delay=60)
+    outbox.enqueue("delete", DELETE_URL, {"item_id": 1}, item_id=1, idempotent=True)
+    status(outbox, 2)
+
+    outbox.drain()
+
+    assert sent(client) == [(STATUS_URL, 2)]
+    assert [row["kind"] for row in outbox.rows()] == ["status", "delete"]
+
+
+def test_batch_row_waits_for_and_holds_back_every_item_it_touches(outbox, client):
+    status(outbox, 1, delay=60)
+    outbox.enqueue("status_batch", BATCH_URL, {"item_ids": [1, 2], "active": False, "availability": "available"},
+                   idempotent=True)
+    status(outbox, 2)
+    status(outbox, 3)
+
+    outbox.drain()
+
+    assert sent(client) == [(STATUS_URL, 3)]
+
+    make_due(outbox)
+    outbox.drain()
+
+    assert sent(client)[1:] == [(STATUS_URL, 1), (BATCH_URL, [1, 2]), (STATUS_URL, 2)]
+
+
+def test_ambiguous_failure_of_non_idempotent_row_is_not_resent(outbox, client):
+    outbox.enqueue("add", ADD_URL, {"name": "Dal"})
+    client.errors[ADD_URL] = [requests.exceptions.ReadTimeout("slow")]
+
+    outbox.drain()
+    make_due(outbox)
+    outbox.drain()
+
+    assert len(client.posts) == 1
+    [row] = outbox.rows()
+    assert row["status"] == "failed"
+    assert "Not resent" in row["last_error"]
+
+
+def test_non_idempotent_row_is_resent_when_it_never_reached_n8n(outbox, client):
+    outbox.enqueue("add", ADD_URL, {"name": "Dal"})
+    client.errors[ADD_URL] = [requests.exceptions.ConnectTimeout("down")]
+
+    outbox.drain()
+    [row] = outbox.rows()
+    assert (row["status"], row["attempts"]) == ("pending", 1)
+
+    make_due(outbox)
+    outbox.drain()
+
+    assert len(client.posts) == 2
+    assert outbox.rows() == []
+
+
+def test_ambiguous_failure_of_idempotent_row_is_retried(outbox, client):
+    status(outbox, 1)
+    client.errors[STATUS_URL] = [requests.exceptions.HTTPError("bad gateway", response=_response(502))]
+
+    outbox.drain()
+
+    [row] = outbox.rows()
+    assert (row["status"], row["attempts"]) == ("pending", 1)
+
+
+def test_open_circuit_does_not_use_up_attempts(outbox, client):
+    status(outbox, 1)
+    client.errors[STATUS_URL] = [app.CircuitOpenError("open")]
+
+    outbox.drain()
+
+    [row] = outbox.rows()
+    assert (row["status"], row["attempts"]) == ("pending", 0)
+    assert row["next_attempt_at"] > row["created_at"]
+
+
+def test_retry_sends_failed_rows_again(outbox, client):
+    outbox.enqueue("add", ADD_URL, {"name": "Dal"})
+    client.errors[ADD_URL] = [requests.exceptions.ReadTimeout("slow")]
+    outbox.drain()
+    assert outbox.counts()["failed"] == 1
+
+    outbox.retry()
+    outbox.drain()
+
+    assert len(client.posts) == 2
+    assert outbox.rows() == []
+
+
+def test_request_never_sent():
+    assert app.request_never_sent(app.CircuitOpenError("open"))
+    assert app.request_never_sent(requests.exceptions.ConnectTimeout("down"))
+    assert app.request_never_sent(requests.exceptions.HTTPError("busy", response=_response(429)))
+    assert not app.request_never_sent(requests.exceptions.ReadTimeout("slow"))
+    assert not app.request_never_sent(requests.exceptions.ConnectionError("reset"))
+    assert not app.request_never_sent(requests.exceptions.HTTPError("down", response=_response(503)))
+
+
+def _response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    return response
+
+
+def toggle(outbox, item_id, active, delay=0):
+    return status(outbox, item_id, active=active, coalesce=True, delay=delay)
+
+
+def test_coalesced_status_changes_are_last_write_wins(outbox, client):
+    row_ids = {toggle(outbox, 1, active) for active in (False, True, False)}
+    toggle(outbox, 2, True)
+
+    outbox.drain()
+
+    assert len(row_ids) == 1
+    assert outbox.coalesced == 2
+    assert [(post["payload"]["item_id"], post["payload"]["active"]) for post in client.posts] == [(1, False), (2, True)]
+
+
+def test_coalescing_pushes_the_send_back(outbox, client):
+    toggle(outbox, 1, False)
+    toggle(outbox, 1, True, delay=60)
+
+    outbox.drain()
+
+    assert client.posts == []
+    [row] = outbox.rows()
+    assert json_payload(row)["active"] is True
+
+
+def test_failed_row_is_not_coalesced(outbox, client):
+    outbox.enqueue("status", STATUS_URL, {"item_id": 1, "active": False, "availability": "available"}, item_id=1,
+                   idempotent=True)
+    outbox._query("UPDATE outbox SET status = 'failed'")
+
+    toggle(outbox, 1, True)
+
+    assert [row["status"] for row in outbox.rows()] == ["failed", "pending"]
+
+
+@pytest.mark.parametrize("kind, payload", [
+    ("status_batch", {"item_ids": [1, 2], "active": True, "availability": "available"}),
+    ("delete_batch", {"item_ids": [1, 2]}),
+])
+def test_no_coalescing_across_a_later_batch(outbox, client, kind, payload):
+    first = toggle(outbox, 1, False, delay=60)
+    outbox.enqueue(kind, BATCH_URL, payload, idempotent=True)
+
+    second = toggle(outbox, 1, False)
+
+    assert second != first
+    assert outbox.coalesced == 0
+    make_due(outbox)
+    outbox.drain()
+    assert [post["url"] for post in client.posts] == [STATUS_URL, BATCH_URL, STATUS_URL]
+
+
+def test_batch_for_other_items_does_not_stop_coalescing(outbox, client):
+    first = toggle(outbox, 1, False, delay=60)
+    outbox.enqueue("status_batch", BATCH_URL, {"item_ids": [2, 3], "active": True, "availability": "available"},
+                   idempotent=True)
+
+    assert toggle(outbox, 1, True) == first
+
+
+def test_row_coalesced_while_in_flight_is_resent(outbox, client):
+    toggle(outbox, 1, False)
+
+    def change_mind(url, payload):
+        if len(client.posts) == 1:
+            toggle(outbox, 1, True)
+
+    client.on_post = change_mind
+    outbox.drain()
+
+    [row] = outbox.rows()
+    assert json_payload(row)["active"] is True
+
+    outbox.drain()
+
+    assert [post["payload"]["active"] for post in client.posts] == [False, True]
+    assert client.posts[0]["headers"] != client.posts[1]["headers"]
+    assert outbox.rows() == []
+
+
+def json_payload(row):
+    return json.loads(row["payload"])
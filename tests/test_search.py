@@ -0,0 +1,64 @@
+import app
+
+from .conftest import menu_item
+
+
+def test_deletion_variants():
+    assert app.deletion_variants("dal") == {"al", "dl", "da"}
+    assert app.deletion_variants("aa") == {"a"}
+    assert app.deletion_variants("") == set()
+
+
+def index_of(*items):
+    index = app.SearchIndex()
+    index.sync(items)
+    return index
+
+
+def test_search_ranks_name_matches_first():
+    index = index_of(
+        menu_item(1, name="Chicken Curry"),
+        menu_item(2, name="Fried Rice", ingredients="rice, chicken"),
+        menu_item(3, name="Dal"),
+    )
+
+    assert index.search("chicken") == [1, 2]
+    assert index.search("") == []
+    assert index.search("lamb") == []
+
+
+def test_search_requires_every_word():
+    index = index_of(menu_item(1, name="Chicken Curry"), menu_item(2, name="Chicken Roast"))
+
+    assert index.search("chicken curry") == [1]
+
+
+def test_search_matches_prefixes_and_single_typos():
+    index = index_of(menu_item(1, name="Biryani"), menu_item(2, name="Bhuna Khichuri"))
+
+    assert index.search("bir") == [1]
+    assert index.search("biryni") == [1]    # missing letter
+    assert index.search("biryanni") == [1]  # extra letter
+    assert index.search("biryeni") == [1]   # wrong letter
+    assert index.search("khichri") == [2]
+
+
+def test_short_words_are_not_fuzzy_matched():
+    index = index_of(menu_item(1, name="Dal"))
+
+    assert index.search("dl") == []
+    assert index.search("da") == [1]
+
+
+def test_sync_reindexes_only_changed_items():
+    kept = menu_item(1, name="Dal")
+    index = index_of(kept, menu_item(2, name="Rice"))
+
+    index.sync([kept, menu_item(3, name="Khichuri")])
+
+    assert index.search("rice") == []
+    assert index.search("khichuri") == [3]
+    assert index.docs[1][0] is kept
+    assert "rice" not in index.postings
+    assert "rice" not in index.vocabulary
+    assert not any("rice" in terms for terms in index.variants.values())
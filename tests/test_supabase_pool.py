@@ -0,0 +1,94 @@
+import httpx
+import pytest
+
+import app
+
+URL = "http://supabase.test"
+KEY = "k" * 40
+
+
+@pytest.fixture
+def pool():
+    pool = app.SupabasePool()
+    yield pool
+    pool.reset()
+
+
+def test_client_is_built_once_and_reused(pool):
+    first = pool.get(URL, KEY)
+
+    assert pool.get(URL, KEY) is first
+    assert (pool.builds, pool.reuses) == (1, 1)
+
+
+def test_changed_secrets_rebuild_the_client(pool):
+    first = pool.get(URL, KEY)
+    http = pool._http
+
+    second = pool.get(URL, "j" * 40)
+
+    assert second is not first
+    assert pool.builds == 2
+    assert http.is_closed
+
+
+def test_reset_closes_the_pool_and_forces_a_rebuild(pool):
+    first = pool.get(URL, KEY)
+    http = pool._http
+
+    pool.reset()
+
+    assert http.is_closed
+    assert pool.healthy is False
+    assert pool.get(URL, KEY) is not first
+
+
+def test_run_reconnects_once_after_a_transport_error(pool):
+    clients = []
+
+    def operation(client):
+        clients.append(client)
+        if len(clients) == 1:
+            raise httpx.ConnectError("reset by peer")
+        return "rows"
+
+    assert pool.run(URL, KEY, operation) == "rows"
+    assert clients[0] is not clients[1]
+    assert (pool.builds, pool.reconnects) == (2, 1)
+
+
+def test_run_gives_up_after_one_reconnect(pool):
+    def operation(client):
+        raise httpx.ConnectError("down")
+
+    with pytest.raises(httpx.ConnectError):
+        pool.run(URL, KEY, operation)
+    assert pool.reconnects == 1
+
+
+def test_other_errors_do_not_reconnect(pool):
+    def operation(client):
+        raise ValueError("bad row")
+
+    with pytest.raises(ValueError):
+        pool.run(URL, KEY, operation)
+    assert (pool.builds, pool.reconnects) == (1, 0)
+
+
+def test_health_check_is_throttled_and_rebuilds_on_failure(pool, monkeypatch):
+    calls = []
+
+    def run(url, key, operation):
+        calls.append(url)
+        raise httpx.ConnectError("down")
+
+    first = pool.get(URL, KEY)
+    monkeypatch.setattr(pool, "run", run)
+
+    assert pool.health_check(URL, KEY) is False
+    assert pool.health_check(URL, KEY) is False
+    assert len(calls) == 1
+    assert pool.get(URL, KEY) is not first
+
+    monkeypatch.setattr(pool, "run", lambda url, key, operation: None)
+    assert pool.health_check(URL, KEY, force=True) is True
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+
+import httpx
+import pytest
+
+import app
+
+BASE_URL = "http://supabase.test"
+
+
+class FakeTus:
+    """Minimal TUS server for Supabase's resumable upload endpoint.
+
+    ``fail_patches`` holds 1-based PATCH numbers that store half the chunk and
+    answer 500; ``statuses`` maps PATCH numbers to a bare status code.
+    """
+
+    def __init__(self, fail_patches=(), statuses=None):
+        self.uploads = {}
+        self.objects = {}
+        self.patches = 0
+        self.fail_patches = set(fail_patches)
+        self.statuses = statuses or {}
+        self.lock = threading.Lock()
+
+    def handle(self, request):
+        url = str(request.url)
+        if request.method == "POST":
+            upload_id = str(len(self.uploads) + 1)
+            self.uploads[upload_id] = {"length": int(request.headers["upload-length"]), "data": bytearray()}
+            return httpx.Response(201, headers={"Location": f"{url}/{upload_id}"})
+
+        upload_id = url.rsplit("/", 1)[1]
+        upload = self.uploads.get(upload_id)
+        if upload is None:
+            return httpx.Response(404)
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"Upload-Offset": str(len(upload["data"]))})
+        with self.lock:
+            self.patches += 1
+            patch = self.patches
+        if patch in self.statuses:
+            return httpx.Response(self.statuses[patch])
+        if int(request.headers["upload-offset"]) != len(upload["data"]):
+            return httpx.Response(409)
+        if patch in self.fail_patches:
+            upload["data"] += request.content[:len(request.content) // 2]
+            return httpx.Response(500)
+        upload["data"] += request.content
+        if len(upload["data"]) >= upload["length"]:
+            self.objects[upload_id] = bytes(upload["data"])
+        return httpx.Response(204, headers={"Upload-Offset": str(len(upload["data"]))})
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(app, "UPLOAD_CHUNK_BACKOFF", 0)
+
+
+def uploader(tmp_path, server, **options):
+    http = httpx.Client(transport=httpx.MockTransport(server.handle))
+    return app.ResumableUploader(str(tmp_path / "uploads"), app.Metrics(), http=http, **options)
+
+
+def upload(uploader, data, **options):
+    uploader.upload(BASE_URL, "key", "kitchen-documents", "public/menu.pdf", data, "application/pdf", **options)
+
+
+DATA = bytes(range(256)) * 40  # 10240 bytes
+
+
+def test_upload_in_chunks(tmp_path):
+    server = FakeTus()
+    progress = []
+    tus = uploader(tmp_path, server)
+
+    upload(tus, DATA, chunk_size=4096, on_progress=lambda sent, total: progress.append(sent))
+
+    assert server.objects["1"] == DATA
+    assert progress == [4096, 8192, 10240]
+    assert tus.stats()["chunks"] == 3
+    assert tus.pending() == []
+
+
+def test_failed_chunk_resumes_from_the_server_offset(tmp_path):
+    server = FakeTus(fail_patches={2})
+    tus = uploader(tmp_path, server)
+
+    upload(tus, DATA, chunk_size=4096)
+
+    assert server.objects["1"] == DATA
+    assert tus.stats()["chunk_retries"] == 1
+    assert tus.stats()["bytes_sent"] == len(DATA) - 2048
+
+
+def test_interrupted_upload_resumes_on_the_next_attempt(tmp_path):
+    server = FakeTus(fail_patches={2, 3})
+    tus = uploader(tmp_path, server)
+
+    with pytest.raises(app.ResumableUploadError):
+        upload(tus, DATA, chunk_size=4096, retries=2)
+    [state] = tus.pending()
+    assert state["offset"] == 4096 + 2048
+
+    upload(tus, DATA, chunk_size=4096)
+
+    assert len(server.uploads) == 1
+    assert server.objects["1"] == DATA
+    assert tus.stats()["resumed"] == 1
+    assert tus.pending() == []
+
+
+def test_rejected_upload_drops_its_state(tmp_path):
+    server = FakeTus(statuses={1: 403})
+    tus = uploader(tmp_path, server)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        upload(tus, DATA, chunk_size=4096)
+
+    assert tus.pending() == []
+
+
+def test_stale_state_is_expired(tmp_path):
+    state_dir = tmp_path / "uploads"
+    state_dir.mkdir()
+    (state_dir / "old.json").write_text(json.dumps({"size": 1, "created_at": time.time() - 120}))
+    (state_dir / "new.json").write_text(json.dumps({"size": 2, "created_at": time.time()}))
+    (state_dir / "broken.json").write_text("{")
+
+    tus = uploader(tmp_path, FakeTus(), state_ttl=60)
+
+    assert [state["size"] for state in tus.pending()] == [2]
+    assert sorted(os.listdir(state_dir)) == ["new.json"]
+
+
+def test_expired_state_starts_a_new_upload(tmp_path):
+    server = FakeTus(fail_patches={2, 3})
+    tus = uploader(tmp_path, server, state_ttl=60)
+    with pytest.raises(app.ResumableUploadError):
+        upload(tus, DATA, chunk_size=4096, retries=2)
+    [state_file] = os.listdir(tus.state_dir)
+    state_path = os.path.join(tus.state_dir, state_file)
+    with open(state_path) as f:
+        state = json.load(f)
+    state["created_at"] -= 120
+    with open(state_path, "w") as f:
+        json.dump(state, f)
+
+    upload(tus, DATA, chunk_size=4096)
+
+    assert len(server.uploads) == 2
+    assert server.objects["2"] == DATA
+    assert tus.stats()["resumed"] == 0
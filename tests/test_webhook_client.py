@@ -0,0 +1,122 @@
+import pytest
+import requests
+
+import app
+
+URL = "http://n8n.test/status"
+
+
+def response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    response.url = URL
+    return response
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """A client whose session answers from ``webhook.script`` and never sleeps between retries."""
+    monkeypatch.setattr(app.time, "sleep", lambda seconds: None)
+    webhook = app.WebhookClient(app.Metrics())
+    webhook.script = []
+
+    def post(url, json=None, timeout=None, headers=None):
+        outcome = webhook.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return response(outcome)
+
+    monkeypatch.setattr(webhook.session, "post", post)
+    return webhook
+
+
+def test_idempotent_call_is_retried_until_it_succeeds(webhook):
+    webhook.script = [requests.exceptions.ConnectionError("reset"), 503, 200]
+
+    assert webhook.post(URL, {}, idempotent=True).status_code == 200
+    assert (webhook.calls, webhook.retries, webhook.failures) == (3, 2, 0)
+    assert webhook.metrics.snapshot()["counters"] == {"webhook_retries": 2}
+
+
+def test_non_idempotent_call_is_sent_once(webhook):
+    webhook.script = [requests.exceptions.ReadTimeout("slow")]
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        webhook.post(URL, {})
+    assert (webhook.calls, webhook.retries, webhook.failures) == (1, 0, 1)
+
+
+def test_retries_stop_after_the_configured_attempts(webhook):
+    webhook.script = [502, 502, 502]
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        webhook.post(URL, {}, idempotent=True, retries=2)
+    assert webhook.calls == 3
+    assert webhook.script == []
+
+
+def test_client_errors_are_not_retried_or_counted_against_the_circuit(webhook):
+    webhook.script = [400] * app.WEBHOOK_BREAKER_THRESHOLD
+
+    for _ in range(app.WEBHOOK_BREAKER_THRESHOLD):
+        with pytest.raises(requests.exceptions.HTTPError):
+            webhook.post(URL, {}, idempotent=True)
+
+    assert webhook.calls == app.WEBHOOK_BREAKER_THRESHOLD
+    assert webhook.failures == 0
+    assert webhook.state == "closed"
+
+
+def fail_until_open(webhook):
+    webhook.script = [500] * app.WEBHOOK_BREAKER_THRESHOLD
+    for _ in range(app.WEBHOOK_BREAKER_THRESHOLD):
+        with pytest.raises(requests.exceptions.HTTPError):
+            webhook.post(URL, {})
+
+
+def test_circuit_opens_after_consecutive_failures_and_short_circuits(webhook):
+    fail_until_open(webhook)
+
+    assert webhook.state == "open"
+    with pytest.raises(app.CircuitOpenError):
+        webhook.post(URL, {})
+    assert webhook.calls == app.WEBHOOK_BREAKER_THRESHOLD
+    assert webhook.short_circuits == 1
+
+
+def test_success_resets_the_failure_count(webhook):
+    webhook.script = [500] * (app.WEBHOOK_BREAKER_THRESHOLD - 1) + [200, 500]
+
+    for _ in range(app.WEBHOOK_BREAKER_THRESHOLD + 1):
+        try:
+            webhook.post(URL, {})
+        except requests.exceptions.HTTPError:
+            pass
+
+    assert webhook.state == "closed"
+
+
+def test_half_open_circuit_lets_one_trial_through(webhook, monkeypatch):
+    fail_until_open(webhook)
+    later = app.time.time() + app.WEBHOOK_BREAKER_COOLDOWN
+    monkeypatch.setattr(app.time, "time", lambda: later)
+    assert webhook.state == "half-open"
+
+    webhook._admit()
+    with pytest.raises(app.CircuitOpenError):
+        webhook.post(URL, {})
+
+    webhook._record(True)
+    assert webhook.state == "closed"
+
+
+def test_failed_trial_reopens_the_circuit(webhook, monkeypatch):
+    fail_until_open(webhook)
+    later = app.time.time() + app.WEBHOOK_BREAKER_COOLDOWN
+    monkeypatch.setattr(app.time, "time", lambda: later)
+    webhook.script = [requests.exceptions.ConnectTimeout("down")]
+
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        webhook.post(URL, {})
+
+    assert webhook.state == "open"